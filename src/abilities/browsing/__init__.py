@@ -1,8 +1,13 @@
+import atexit
 import os
 from abilities import ability, ability_action
 from abilities.base_ability import BaseAbility
+from config.config_manager import ConfigManager
 from utils.shell_utils import print_fancy
+from abilities.browsing.browser_pool import BrowserPool
+from abilities.browsing.utils import get_driver
 from abilities.browsing.view_webpage import handle_view_webpage
+from abilities.browsing.view_webpages import handle_view_webpages
 from abilities.browsing.perform_google_search import handle_perform_google_search
 
 
@@ -10,7 +15,10 @@ from abilities.browsing.perform_google_search import handle_perform_google_searc
 class Browsing(BaseAbility):
     """
     The browsing ability allows Buddy to search Google, look at webpages and perform other browsing tasks.
+    A pool of headless browsers is shared by every instance of the ability for the lifetime of the process.
     """
+    
+    browser_pool = None
 
     def enable(self, args=None):
         """
@@ -26,10 +34,61 @@ class Browsing(BaseAbility):
     def disable(self):
         pass
     
+    @classmethod
+    def get_browser_pool(cls):
+        """
+        Retrieves the shared browser pool, creating and warming it up on first use.
+        The pool is shut down when the process exits.
+        
+        Returns:
+            BrowserPool: The browser pool
+        """
+        
+        if cls.browser_pool is None:
+            config = ConfigManager()
+            
+            cls.browser_pool = BrowserPool(
+                get_driver,
+                size=config.get_setting("browsing.pool_size", 2),
+                max_uses=config.get_setting("browsing.max_browser_uses", 20)
+            )
+            cls.browser_pool.warm_up()
+            
+            atexit.register(cls.__shutdown_browser_pool)
+            
+        return cls.browser_pool
+    
+    @classmethod
+    def __shutdown_browser_pool(cls):
+        metrics = cls.browser_pool.get_metrics()
+        cls.browser_pool.shutdown()
+        
+        if metrics["acquisitions"] > 0:
+            print_fancy(f"Browser pool: {metrics['launches']} launches averaging {metrics['average_launch_seconds']:.1f}s, {metrics['reuse_rate']:.0%} of pages reused a running browser", italic=True, color="light_gray")
+    
     @ability_action("view_webpage_url", "Opens a webpage URL to seek information using the instructions provided", {"url": "string", "instructions": "string"}, ["url", "instructions"])
     def view_webpage(self, args):
-        return handle_view_webpage(args)
+        return handle_view_webpage(args, self.get_browser_pool())
+    
+    @ability_action(
+        "view_webpages",
+        "Reads several webpage URLs at the same time, each with its own instructions. Prefer this over view_webpage_url when there is more than one page to read",
+        {
+            "pages": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"url": {"type": "string"}, "instructions": {"type": "string"}},
+                    "required": ["url", "instructions"]
+                }
+            },
+            "time_budget_seconds": {"type": "integer", "description": "How long reading all of the pages may take"}
+        },
+        ["pages"]
+    )
+    def view_webpages(self, args):
+        return handle_view_webpages(args, self.get_browser_pool())
     
     @ability_action("google_search_get_url", "Search Google for web results", {"query": {"type": "string", "description": "A search query. Do NOT use a URL for a search"}, "instructions": "string"}, ["query", "instructions"])
     def perform_google_search(self, args):
-        return handle_perform_google_search(args)
+        return handle_perform_google_search(args, self.get_browser_pool())
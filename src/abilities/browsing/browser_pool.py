@@ -0,0 +1,258 @@
+import threading
+import time
+from contextlib import contextmanager
+from selenium.common.exceptions import WebDriverException
+
+
+class PooledBrowser:
+    """
+    A browser instance owned by a BrowserPool.
+
+    Attributes:
+        driver (WebDriver): The browser's driver
+        home_handle (str): The window handle of the browser's original tab, which is kept open between uses
+        uses (int): How many times the browser has been handed out
+        is_broken (bool): Whether the browser crashed and must not be reused
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.home_handle = driver.current_window_handle
+        self.uses = 0
+        self.is_broken = False
+
+
+class BrowserPool:
+    """
+    Keeps a number of headless browsers running so that browsing actions don't pay for a browser launch each time.
+    Each acquisition gets a fresh tab in an idle browser, and browsers are recycled after a number of uses or when
+    they crash.
+
+    Attributes:
+        driver_factory (Callable): Launches a new browser and returns its driver
+        size (int): The maximum number of browsers to keep running
+        max_uses (int): How many times a browser is handed out before it is replaced
+    """
+
+    def __init__(self, driver_factory, size=2, max_uses=20):
+        self.driver_factory = driver_factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.__idle = []
+        self.__busy_count = 0
+        self.__launching_count = 0
+        self.__is_shut_down = False
+        self.__condition = threading.Condition()
+        # Concurrent launches race each other while patching the chromedriver binary, so they are serialized
+        self.__launch_lock = threading.Lock()
+        self.__metrics = {
+            "launches": 0,
+            "launch_seconds": 0.0,
+            "acquisitions": 0,
+            "reuses": 0,
+            "recycled": 0,
+            "crashes": 0
+        }
+
+    def warm_up(self, count=None):
+        """
+        Launches browsers in the background until the pool is full (or `count` more have been started).
+
+        Args:
+            count (int | None): How many browsers to launch, defaults to filling the pool
+        """
+
+        with self.__condition:
+            available = self.size - self.__total_count()
+            count = available if count is None else min(count, available)
+            self.__launching_count += count
+
+        for _ in range(count):
+            threading.Thread(target=self.__launch_into_pool, daemon=True).start()
+
+    @contextmanager
+    def acquire(self, timeout=120):
+        """
+        Hands out a fresh tab in one of the pool's browsers for the duration of a `with` block.
+
+        Args:
+            timeout (float): How many seconds to wait for a browser to become available
+
+        Yields:
+            WebDriver: The driver, switched to a new tab
+
+        Raises:
+            TimeoutError: If no browser became available in time
+        """
+
+        browser = self.__take_browser(timeout)
+
+        try:
+            browser.driver.switch_to.new_window("tab")
+            yield browser.driver
+        except WebDriverException:
+            browser.is_broken = True
+            raise
+        finally:
+            self.__release_browser(browser)
+
+    def shutdown(self):
+        """
+        Quits every idle browser and stops the pool from handing out more. Browsers that are still in use are quit
+        when they are released.
+        """
+
+        with self.__condition:
+            self.__is_shut_down = True
+            idle_browsers = self.__idle
+            self.__idle = []
+            self.__condition.notify_all()
+
+        for browser in idle_browsers:
+            self.__quit_browser(browser)
+
+    def get_metrics(self):
+        """
+        Returns:
+            dict: Launch counts and timings along with how often browsers were reused rather than launched
+        """
+
+        with self.__condition:
+            metrics = dict(self.__metrics)
+
+        metrics["average_launch_seconds"] = metrics["launch_seconds"] / metrics["launches"] if metrics["launches"] > 0 else 0.0
+        metrics["reuse_rate"] = metrics["reuses"] / metrics["acquisitions"] if metrics["acquisitions"] > 0 else 0.0
+
+        return metrics
+
+    def __total_count(self):
+        return len(self.__idle) + self.__busy_count + self.__launching_count
+
+    def __take_browser(self, timeout):
+        """
+        Takes an idle browser, launching one if the pool has room, or waits for one to be released.
+        """
+
+        deadline = time.monotonic() + timeout
+
+        with self.__condition:
+            while True:
+                if self.__is_shut_down:
+                    raise RuntimeError("The browser pool has been shut down")
+
+                if len(self.__idle) > 0:
+                    browser = self.__idle.pop()
+                    self.__busy_count += 1
+                    self.__metrics["acquisitions"] += 1
+
+                    if browser.uses > 0:
+                        self.__metrics["reuses"] += 1
+
+                    browser.uses += 1
+
+                    return browser
+
+                if self.__total_count() < self.size:
+                    self.__launching_count += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a browser")
+
+                self.__condition.wait(remaining)
+
+        # Launch outside of the condition so other threads can keep taking and releasing browsers meanwhile
+        try:
+            browser = self.__launch()
+        finally:
+            with self.__condition:
+                self.__launching_count -= 1
+
+        with self.__condition:
+            self.__busy_count += 1
+            self.__metrics["acquisitions"] += 1
+            browser.uses += 1
+
+        return browser
+
+    def __release_browser(self, browser):
+        """
+        Closes the tab that was handed out and returns the browser to the pool, or replaces it if it's worn out.
+        """
+
+        if not browser.is_broken:
+            try:
+                browser.driver.close()
+                browser.driver.switch_to.window(browser.home_handle)
+                browser.driver.delete_all_cookies()
+            except WebDriverException:
+                browser.is_broken = True
+
+        with self.__condition:
+            self.__busy_count -= 1
+
+            if browser.is_broken:
+                self.__metrics["crashes"] += 1
+            elif browser.uses >= self.max_uses:
+                self.__metrics["recycled"] += 1
+
+            should_keep = not browser.is_broken and browser.uses < self.max_uses and not self.__is_shut_down
+
+            if should_keep:
+                self.__idle.append(browser)
+
+            self.__condition.notify()
+
+        if not should_keep:
+            self.__quit_browser(browser)
+
+            # Keep a replacement warm
+            if not self.__is_shut_down:
+                self.warm_up(1)
+
+    def __launch_into_pool(self):
+        """
+        Launches a browser in the background and adds it to the idle list.
+        """
+
+        try:
+            browser = self.__launch()
+        except Exception:
+            browser = None
+
+        with self.__condition:
+            self.__launching_count -= 1
+
+            if browser is not None and not self.__is_shut_down:
+                self.__idle.append(browser)
+                browser = None
+
+            self.__condition.notify()
+
+        # The pool was shut down while this browser was launching
+        if browser is not None:
+            self.__quit_browser(browser)
+
+    def __launch(self):
+        """
+        Launches a new browser and records how long it took.
+        """
+
+        with self.__launch_lock:
+            started_at = time.monotonic()
+            driver = self.driver_factory()
+            launch_seconds = time.monotonic() - started_at
+
+        with self.__condition:
+            self.__metrics["launches"] += 1
+            self.__metrics["launch_seconds"] += launch_seconds
+
+        return PooledBrowser(driver)
+
+    def __quit_browser(self, browser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,205 @@
+import re
+
+# Rough number of characters per token for English text
+CHARS_PER_TOKEN = 4
+
+# Pages with less readable text than this are probably rendered with images or canvases
+MIN_HELPFUL_TEXT_LENGTH = 400
+
+# A readability-style scoring pass: every block of text credits its parent in full and its grandparent in half,
+# scores are discounted by how much of an element's text is links, and the best scoring element is the main content
+READABILITY_SCRIPT = """
+const UNLIKELY = /comment|footer|nav|sidebar|menu|banner|advert|promo|cookie|share|social|related|breadcrumb/i;
+const LIKELY = /article|main|content|body|post|entry|docs|readme/i;
+const scores = new Map();
+
+function describe(element) {
+    return (element.id || "") + " " + (element.getAttribute("class") || "");
+}
+
+function linkDensity(element) {
+    const textLength = (element.innerText || "").length;
+
+    if (textLength === 0) {
+        return 1;
+    }
+
+    let linkLength = 0;
+    element.querySelectorAll("a").forEach(link => linkLength += (link.innerText || "").length);
+
+    return linkLength / textLength;
+}
+
+document.querySelectorAll("p, pre, td, li, blockquote, h1, h2, h3, h4, dd").forEach(block => {
+    const length = (block.innerText || "").trim().length;
+
+    if (length < 25) {
+        return;
+    }
+
+    const score = 1 + Math.min(length / 100, 3) + (block.innerText.split(",").length - 1);
+    const parent = block.parentElement;
+    const grandparent = parent ? parent.parentElement : null;
+
+    if (parent) {
+        scores.set(parent, (scores.get(parent) || 0) + score);
+    }
+
+    if (grandparent) {
+        scores.set(grandparent, (scores.get(grandparent) || 0) + score / 2);
+    }
+});
+
+let best = null;
+let bestScore = 0;
+
+scores.forEach((score, element) => {
+    const description = describe(element);
+
+    if (UNLIKELY.test(description) && !LIKELY.test(description)) {
+        return;
+    }
+
+    const adjusted = score * (1 - linkDensity(element));
+
+    if (adjusted > bestScore) {
+        best = element;
+        bestScore = adjusted;
+    }
+});
+
+const semantic = document.querySelector("article, main, [role=main]");
+
+if (best === null || (semantic && semantic.contains(best) && (semantic.innerText || "").length < best.innerText.length * 3)) {
+    best = semantic || best;
+}
+
+const root = best || document.body;
+
+return {
+    title: document.title,
+    text: root ? root.innerText : "",
+    body_text_length: document.body ? (document.body.innerText || "").length : 0,
+    image_count: document.images.length,
+    canvas_count: document.querySelectorAll("canvas").length
+};
+"""
+
+
+class PageExtraction:
+    """
+    The readable content extracted from a webpage.
+
+    Attributes:
+        title (str): The page title
+        text (str): The main readable text of the page
+        image_count (int): How many images are on the page
+        canvas_count (int): How many canvas elements are on the page
+    """
+
+    def __init__(self, title, text, image_count=0, canvas_count=0):
+        self.title = title or ""
+        self.text = normalize_whitespace(text or "")
+        self.image_count = image_count
+        self.canvas_count = canvas_count
+
+    def is_helpful(self):
+        """
+        Determines if the extracted text is likely to hold the page's content, as opposed to a page that is mostly
+        drawn on canvases or made up of images.
+
+        Returns:
+            bool: True if the text is worth reading instead of screenshots
+        """
+
+        if len(self.text) < MIN_HELPFUL_TEXT_LENGTH:
+            return False
+
+        # Canvas heavy pages (apps, charts, games) rarely put their content in the DOM
+        if self.canvas_count > 0 and len(self.text) < MIN_HELPFUL_TEXT_LENGTH * 5:
+            return False
+
+        # Image galleries and scanned documents have little text for the amount of images
+        if self.image_count > 0 and len(self.text) / self.image_count < 100:
+            return False
+
+        return True
+
+
+def extract_main_content(driver):
+    """
+    Extracts the main readable content from the page currently loaded in the browser.
+
+    Args:
+        driver (WebDriver): The driver with the page loaded
+
+    Returns:
+        PageExtraction: The extracted content
+    """
+
+    result = driver.execute_script(READABILITY_SCRIPT) or {}
+
+    return PageExtraction(
+        result.get("title"),
+        result.get("text"),
+        image_count=result.get("image_count", 0),
+        canvas_count=result.get("canvas_count", 0)
+    )
+
+
+def chunk_text(text, max_tokens=1500):
+    """
+    Splits text into segments that fit within a token budget, breaking between paragraphs where possible.
+
+    Args:
+        text (str): The text to split
+        max_tokens (int): The approximate maximum number of tokens per segment
+
+    Returns:
+        list: The text segments
+    """
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = ""
+
+    for paragraph in text.split("\n"):
+        # Paragraphs that are too long on their own are split up as well
+        while len(paragraph) > max_chars:
+            split_at = paragraph.rfind(" ", 0, max_chars)
+            split_at = max_chars if split_at <= 0 else split_at
+
+            if len(current) > 0:
+                chunks.append(current)
+                current = ""
+
+            chunks.append(paragraph[:split_at])
+            paragraph = paragraph[split_at:].lstrip()
+
+        if len(current) + len(paragraph) + 1 > max_chars and len(current) > 0:
+            chunks.append(current)
+            current = ""
+
+        current = f"{current}\n{paragraph}" if len(current) > 0 else paragraph
+
+    if len(current.strip()) > 0:
+        chunks.append(current)
+
+    return chunks
+
+
+def normalize_whitespace(text):
+    """
+    Collapses runs of blank lines and trailing spaces left behind by page layout.
+
+    Args:
+        text (str): The text to clean up
+
+    Returns:
+        str: The cleaned up text
+    """
+
+    text = re.sub(r"[ \t\r\f\v]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+
+    return text.strip()
@@ -0,0 +1,374 @@
+import json
+import re
+import threading
+import time
+import requests
+from charset_normalizer import from_bytes
+from html.parser import HTMLParser
+from requests.adapters import HTTPAdapter
+from abilities.browsing.content_extraction import PageExtraction
+
+# Sent so that sites serve the same markup they would to the browser
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+
+# Pages larger than this are left to the browser rather than downloaded and parsed here
+MAX_CONTENT_BYTES = 4 * 1024 * 1024
+
+# Markers of bot checks and interstitials that only a real browser gets through
+BLOCKED_PAGE_PATTERN = re.compile(
+    r"captcha|cf-browser-verification|challenge-platform|just a moment\.\.\.|are you a robot|unusual traffic",
+    re.IGNORECASE
+)
+
+# Markers of pages that render their content with JavaScript
+JAVASCRIPT_REQUIRED_PATTERN = re.compile(
+    r"(enable|requires?) javascript|javascript (is )?(required|disabled)|id=[\"'](root|app|__next)[\"']>\s*</div>",
+    re.IGNORECASE
+)
+
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+TEXT_CONTENT_TYPES = ("text/plain", "text/markdown", "text/csv", "text/x-", "application/x-sh", "application/xml", "text/xml")
+JSON_CONTENT_TYPES = ("application/json", "+json")
+
+# Tags whose content is never shown to the reader
+HIDDEN_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe", "object"}
+
+# Tags that start a new line in the rendered page
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset", "figcaption", "figure",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+    "section", "table", "tr", "ul"
+}
+
+# Tags that hold navigation rather than content
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form"}
+
+__session = None
+__session_lock = threading.Lock()
+
+
+class FetchResult:
+    """
+    The outcome of fetching a page over plain HTTP.
+
+    Attributes:
+        url (str): The final URL after redirects
+        status_code (int | None): The HTTP status code, or None if the request failed
+        content_type (str): The media type of the response
+        extraction (PageExtraction | None): The readable content of the page
+        needs_browser (bool): Whether the page has to be loaded in the browser instead
+        reason (str | None): Why the page needs the browser
+        elapsed (float): How many seconds the fetch took
+        headers (dict): The response headers
+    """
+
+    def __init__(self, url, status_code=None, content_type="", extraction=None, needs_browser=False, reason=None, elapsed=0.0, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content_type = content_type
+        self.extraction = extraction
+        self.needs_browser = needs_browser
+        self.reason = reason
+        self.elapsed = elapsed
+        self.headers = headers or {}
+
+
+class HtmlTextExtractor(HTMLParser):
+    """
+    Converts HTML to the text a reader would see, keeping the text inside <main> or <article> separately so it can be
+    preferred over the page's navigation and footers.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.image_count = 0
+        self.canvas_count = 0
+        self.__parts = []
+        self.__main_parts = []
+        self.__hidden_depth = 0
+        self.__boilerplate_depth = 0
+        self.__main_depth = 0
+        self.__pre_depth = 0
+        self.__in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self.__in_title = True
+        elif tag == "img":
+            self.image_count += 1
+        elif tag == "canvas":
+            self.canvas_count += 1
+
+        # Void elements never get an end tag, so they mustn't count towards the nesting depths
+        if tag in ("br", "hr"):
+            self.__append("\n")
+            return
+
+        if tag in HIDDEN_TAGS:
+            self.__hidden_depth += 1
+        elif tag in BOILERPLATE_TAGS:
+            self.__boilerplate_depth += 1
+        elif tag in ("main", "article"):
+            self.__main_depth += 1
+        elif tag == "pre":
+            self.__pre_depth += 1
+
+        if tag in BLOCK_TAGS:
+            self.__append("\n")
+
+        if tag == "li":
+            self.__append("- ")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self.__in_title = False
+        elif tag in HIDDEN_TAGS:
+            self.__hidden_depth = max(0, self.__hidden_depth - 1)
+        elif tag in BOILERPLATE_TAGS:
+            self.__boilerplate_depth = max(0, self.__boilerplate_depth - 1)
+        elif tag in ("main", "article"):
+            self.__main_depth = max(0, self.__main_depth - 1)
+        elif tag == "pre":
+            self.__pre_depth = max(0, self.__pre_depth - 1)
+
+        if tag in BLOCK_TAGS:
+            self.__append("\n")
+        elif tag in ("td", "th"):
+            self.__append(" | ")
+
+    def handle_data(self, data):
+        if self.__in_title:
+            self.title += data
+            return
+
+        if self.__hidden_depth > 0:
+            return
+
+        # Outside of <pre>, whitespace in HTML is only a separator
+        if self.__pre_depth == 0:
+            data = re.sub(r"\s+", " ", data)
+
+        self.__append(data)
+
+    def get_text(self):
+        """
+        Returns:
+            str: The text inside <main>/<article> if there is enough of it, otherwise the text of the whole page
+        """
+
+        main_text = "".join(self.__main_parts)
+
+        if len(main_text.strip()) > 200:
+            return main_text
+
+        return "".join(self.__parts)
+
+    def __append(self, text):
+        if self.__hidden_depth > 0:
+            return
+
+        if self.__boilerplate_depth == 0:
+            self.__parts.append(text)
+
+        if self.__main_depth > 0:
+            self.__main_parts.append(text)
+
+
+def get_http_session():
+    """
+    Gets the session shared by all plain HTTP fetches, so connections to the same hosts are kept alive and reused.
+
+    Returns:
+        requests.Session: The session
+    """
+
+    global __session
+
+    with __session_lock:
+        if __session is None:
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=1)
+            __session = requests.Session()
+            __session.mount("http://", adapter)
+            __session.mount("https://", adapter)
+            __session.headers.update({
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/json,text/plain;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.9"
+            })
+
+        return __session
+
+
+def fetch_page(url, timeout=10):
+    """
+    Fetches a page without a browser and converts it to readable text. Pages that are blocked, rendered with
+    JavaScript or not made of text are flagged as needing the browser instead.
+
+    Args:
+        url (str): The URL of the page
+        timeout (float): How many seconds to wait for the server
+
+    Returns:
+        FetchResult: The outcome of the fetch
+    """
+
+    started_at = time.monotonic()
+
+    try:
+        with get_http_session().get(url, timeout=timeout, stream=True, allow_redirects=True) as response:
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+
+            # Errors are often bot protection (403, 429, 503) that a real browser gets past
+            if response.status_code >= 400:
+                return __needs_browser(url, f"HTTP {response.status_code}", started_at, response.status_code, content_type)
+
+            content_length = int(response.headers.get("Content-Length") or 0)
+
+            if content_length > MAX_CONTENT_BYTES:
+                return __needs_browser(url, "the page is too large", started_at, response.status_code, content_type)
+
+            content = response.raw.read(MAX_CONTENT_BYTES + 1, decode_content=True)
+            final_url = response.url
+            status_code = response.status_code
+            headers = dict(response.headers)
+            header_encoding = response.encoding if "charset" in response.headers.get("Content-Type", "").lower() else None
+    except (requests.RequestException, ValueError) as e:
+        return __needs_browser(url, f"the request failed ({type(e).__name__})", started_at)
+
+    if len(content) > MAX_CONTENT_BYTES:
+        return __needs_browser(final_url, "the page is too large", started_at, status_code, content_type)
+
+    if content_type == "":
+        content_type = sniff_content_type(content)
+
+    text = decode_content(content, header_encoding)
+
+    if content_type.endswith(JSON_CONTENT_TYPES):
+        try:
+            text = json.dumps(json.loads(text), indent=2, ensure_ascii=False)
+        except ValueError:
+            pass
+
+        extraction = PageExtraction(final_url, text)
+    elif content_type.startswith(TEXT_CONTENT_TYPES):
+        extraction = PageExtraction(final_url, text)
+    elif content_type in ("text/html", "application/xhtml+xml"):
+        if BLOCKED_PAGE_PATTERN.search(text[:20000]):
+            return __needs_browser(final_url, "the page is a bot check", started_at, status_code, content_type)
+
+        extraction = html_to_extraction(text)
+
+        if not extraction.is_helpful():
+            reason = "the page renders with JavaScript" if JAVASCRIPT_REQUIRED_PATTERN.search(text) else "the page has little text"
+            return __needs_browser(final_url, reason, started_at, status_code, content_type)
+    else:
+        return __needs_browser(final_url, f"the page is {content_type}", started_at, status_code, content_type)
+
+    if len(extraction.text) == 0:
+        return __needs_browser(final_url, "the page is empty", started_at, status_code, content_type)
+
+    return FetchResult(
+        final_url,
+        status_code=status_code,
+        content_type=content_type,
+        extraction=extraction,
+        elapsed=time.monotonic() - started_at,
+        headers=headers
+    )
+
+
+def html_to_extraction(html):
+    """
+    Converts an HTML document to its readable content.
+
+    Args:
+        html (str): The HTML document
+
+    Returns:
+        PageExtraction: The readable content
+    """
+
+    parser = HtmlTextExtractor()
+
+    parser.feed(html)
+    parser.close()
+
+    return PageExtraction(
+        " ".join(parser.title.split()),
+        parser.get_text(),
+        image_count=parser.image_count,
+        canvas_count=parser.canvas_count
+    )
+
+
+def sniff_content_type(content):
+    """
+    Guesses the media type of a response that didn't declare one.
+
+    Args:
+        content (bytes): The start of the response body
+
+    Returns:
+        str: The media type
+    """
+
+    start = content[:512].lstrip().lower()
+
+    if start.startswith((b"<!doctype html", b"<html")) or b"<body" in start or b"<head" in start:
+        return "text/html"
+
+    if start.startswith((b"{", b"[")):
+        return "application/json"
+
+    if start.startswith(b"<?xml"):
+        return "application/xml"
+
+    # Control characters mean it's some binary format
+    if re.search(rb"[\x00-\x08\x0e-\x1f]", content[:512]):
+        return "application/octet-stream"
+
+    return "text/plain"
+
+
+def decode_content(content, header_encoding=None):
+    """
+    Decodes a response body using the charset from the headers, a <meta> tag, or a guess, in that order.
+
+    Args:
+        content (bytes): The response body
+        header_encoding (str | None): The charset declared in the Content-Type header
+
+    Returns:
+        str: The decoded text
+    """
+
+    encoding = header_encoding
+    meta_match = META_CHARSET_PATTERN.search(content[:4096])
+
+    if encoding is None and meta_match is not None:
+        encoding = meta_match.group(1).decode("ascii")
+
+    if encoding is None:
+        try:
+            return content.decode("utf-8")
+        except UnicodeDecodeError:
+            best_match = from_bytes(content[:65536]).best()
+            encoding = best_match.encoding if best_match is not None else "latin-1"
+
+    try:
+        return content.decode(encoding, errors="replace")
+    except LookupError:
+        return content.decode("utf-8", errors="replace")
+
+
+def __needs_browser(url, reason, started_at, status_code=None, content_type=""):
+    return FetchResult(
+        url,
+        status_code=status_code,
+        content_type=content_type,
+        needs_browser=True,
+        reason=reason,
+        elapsed=time.monotonic() - started_at
+    )
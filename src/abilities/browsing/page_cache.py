@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import re
+import time
+from email.utils import parsedate_to_datetime
+from config.config_manager import ConfigManager
+from utils.file_lock import FileLock, write_atomically
+
+CACHE_DIRECTORY = os.path.expanduser("~/.buddy_cli/cache/browsing")
+
+MAX_AGE_PATTERN = re.compile(r"(?:s-maxage|max-age)\s*=\s*(\d+)", re.IGNORECASE)
+
+
+class PageCache:
+    """
+    An on-disk cache for the browsing ability, shared between concurrent Buddy processes.
+    Every entry is a JSON file named after a hash of its key. Writes are atomic so readers never see partial entries,
+    and a file's modification time doubles as its last access time for least recently used eviction.
+
+    Attributes:
+        directory (str): The directory the entries are stored in
+        max_bytes (int): The total size the entries may take up before the least recently used are evicted
+        default_ttl (float): How many seconds entries stay fresh when the server doesn't say
+    """
+
+    def __init__(self, directory=CACHE_DIRECTORY, max_bytes=100 * 1024 * 1024, default_ttl=3600):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, *key_parts):
+        """
+        Gets an entry if it exists and is still fresh.
+
+        Args:
+            kind (str): The kind of entry (e.g. "page" or "notes")
+            *key_parts (str): The values the entry is keyed by
+
+        Returns:
+            Any: The cached value, or None if there is no fresh entry
+        """
+
+        path = self.__get_path(kind, key_parts)
+
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        if entry.get("expires_at", 0) < time.time():
+            self.misses += 1
+            self.__remove(path)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+
+        return entry["value"]
+
+    def put(self, kind, *key_parts, value, ttl=None):
+        """
+        Stores an entry, evicting the least recently used entries if the cache grows too large.
+
+        Args:
+            kind (str): The kind of entry (e.g. "page" or "notes")
+            *key_parts (str): The values the entry is keyed by
+            value (Any): The JSON serializable value to store
+            ttl (float | None): How many seconds the entry stays fresh, defaults to the cache's TTL
+        """
+
+        ttl = self.default_ttl if ttl is None else ttl
+
+        if ttl <= 0:
+            return
+
+        entry = {
+            "kind": kind,
+            "key": list(key_parts),
+            "created_at": time.time(),
+            "expires_at": time.time() + ttl,
+            "value": value
+        }
+
+        write_atomically(self.__get_path(kind, key_parts), json.dumps(entry))
+        self.__evict()
+
+    def clear(self):
+        """
+        Removes every entry from the cache.
+        """
+
+        with FileLock(self.__get_lock_path()):
+            for path in self.__list_entries():
+                self.__remove(path)
+
+    def get_summary(self):
+        """
+        Returns:
+            str | None: A description of how often the cache was used, or None if it wasn't
+        """
+
+        if self.hits + self.misses == 0:
+            return None
+
+        return f"Browsing cache: {self.hits} hits, {self.misses} misses"
+
+    def __get_path(self, kind, key_parts):
+        digest = hashlib.sha256("\0".join([kind, *key_parts]).encode("utf-8")).hexdigest()
+
+        return os.path.join(self.directory, f"{kind}-{digest}.json")
+
+    def __get_lock_path(self):
+        return os.path.join(self.directory, ".lock")
+
+    def __list_entries(self):
+        try:
+            return [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+        except OSError:
+            return []
+
+    def __evict(self):
+        """
+        Removes the least recently used entries until the cache fits in its size budget. Expired entries are removed
+        when they are next read.
+        """
+
+        # Only one process needs to evict at a time
+        with FileLock(self.__get_lock_path()):
+            entries = []
+
+            for path in self.__list_entries():
+                try:
+                    stat = os.stat(path)
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                except OSError:
+                    pass
+
+            total_bytes = sum(size for _, size, _ in entries)
+
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+
+                self.__remove(path)
+                total_bytes -= size
+
+    def __remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def create_page_cache():
+    """
+    Creates the page cache configured from the browsing settings.
+
+    Returns:
+        PageCache | None: The cache, or None if caching is turned off
+    """
+
+    config = ConfigManager()
+
+    if not config.get_setting("browsing.cache_enabled", True):
+        return None
+
+    return PageCache(
+        max_bytes=config.get_setting("browsing.cache_max_mb", 100) * 1024 * 1024,
+        default_ttl=config.get_setting("browsing.cache_ttl", 3600)
+    )
+
+
+def get_cache_ttl(headers, default_ttl):
+    """
+    Works out how long a response may be cached for from its HTTP caching headers.
+
+    Args:
+        headers (dict): The response headers
+        default_ttl (float): The TTL to use if the headers don't specify one
+
+    Returns:
+        float: How many seconds the response stays fresh, 0 if it mustn't be cached
+    """
+
+    headers = {name.lower(): value for name, value in headers.items()}
+    cache_control = headers.get("cache-control", "").lower()
+
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+
+    max_age_match = MAX_AGE_PATTERN.search(cache_control)
+
+    if max_age_match is not None:
+        return min(int(max_age_match.group(1)), default_ttl)
+
+    if headers.get("expires"):
+        try:
+            return max(0, min(parsedate_to_datetime(headers["expires"]).timestamp() - time.time(), default_ttl))
+        except (TypeError, ValueError):
+            # An invalid Expires header means the response is already stale
+            return 0
+
+    return default_ttl
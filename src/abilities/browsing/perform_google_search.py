@@ -1,30 +1,155 @@
+from urllib.parse import quote_plus
 from models.base_model_factory import ModelFactory
 from utils.shell_utils import print_fancy
 from selenium.webdriver.common.by import By
-from abilities.browsing.utils import get_driver, is_scrolled_to_bottom, scroll_page
+from abilities.browsing.page_cache import create_page_cache
+from abilities.browsing.screenshots import FrameDeduplicator, create_screenshot_pipeline
+from abilities.browsing.serp_parser import format_results_table, parse_search_results
+from abilities.browsing.utils import is_scrolled_to_bottom, load_page, scroll_page
+from abilities.browsing.vision_context import evict_old_screenshots
+from config.config_manager import ConfigManager
 
 
-def handle_perform_google_search(args):
+def handle_perform_google_search(args, browser_pool):
     """
-    Allows Buddy to perform a Google search using a web browser with vision capabilities.
-    Buddy is provided with the following tools:
-        get_link_url: Retrieves the URL by using the title of the search result
+    Allows Buddy to perform a Google search using a web browser.
+    The results are parsed from the page and a model picks the best match from a text table in a single inference.
+    If the results can't be parsed, Buddy falls back to reading screenshots of the results page with vision capabilities.
+    Chosen results are cached on disk, so repeating a search with the same instructions doesn't open the browser.
     
     Args:
         args (dict): The arguments for the search from the model
             query (str): The search query
             instructions (str): The instructions for the search
-            
+        browser_pool (BrowserPool): The pool to take a browser from
+        
     Returns:
         str | None: The URL of the first search result, or None if no matching results were found
     """
     
-    model = ModelFactory().get_model(require_vision=True)
-    
     instructions = args["instructions"]
     query = args["query"]
     
-    search_url = f"https://www.google.com/search?q={query}"
+    search_url = f"https://www.google.com/search?q={quote_plus(query)}"
+    
+    print_fancy(f"Performing Google search for '{query}': {instructions}", italic=True, color="cyan")
+    
+    page_cache = create_page_cache()
+    
+    if page_cache is not None:
+        cached_result = page_cache.get("search", query, instructions)
+        
+        if cached_result is not None:
+            print_fancy("Using the result from an earlier search", italic=True, color="light_gray")
+            return cached_result
+            
+    with browser_pool.acquire() as driver:
+        load_seconds = load_page(driver, search_url)
+        print_fancy(f"Loaded the page in {load_seconds:.1f}s", italic=True, color="light_gray")
+        
+        print_fancy("Checking results...", italic=True, color="cyan")
+        
+        search_results = parse_search_results(driver)
+        
+        if len(search_results) > 0:
+            is_done, result = __select_from_results(instructions, search_results)
+        else:
+            is_done, result = False, None
+            
+        if not is_done:
+            print_fancy("Falling back to reading the results page...", italic=True, color="cyan")
+            result = __select_from_screenshots(instructions, driver)
+            
+    if result is None:
+        return "No results found"
+        
+    if page_cache is not None:
+        page_cache.put("search", query, instructions, value=result)
+        
+    return result
+
+
+def __select_from_results(instructions, search_results):
+    """
+    Has a model pick the search result that best matches the instructions from a text table of results.
+    
+    Args:
+        instructions (str): The instructions for the search
+        search_results (list): The parsed SearchResults
+        
+    Returns:
+        tuple: Whether the model came to a decision, and the URL of the chosen result (or None if nothing matched)
+    """
+    
+    model = ModelFactory().get_model(lowest_cost=True)
+    
+    messages = [
+        {
+            "role": "system",
+            "content": f"""
+You are choosing a Google search result based on the instructions provided to you by the user. You will be given the results as a table with their rank, title, URL and snippet.
+When you have found the first result that best matches the goal of the search, use your select_result tool with its rank.
+If none of the results match, use your no_match tool.
+"""
+        },
+        {
+            "role": "user",
+            "content": f"{instructions}\n\n{format_results_table(search_results)}"
+        }
+    ]
+    tools = [
+        model.make_tool(
+            "select_result",
+            "Selects the search result that best matches the instructions",
+            {"rank": "integer"},
+            ["rank"]
+        ),
+        model.make_tool(
+            "no_match",
+            "Reports that none of the search results match the instructions",
+            {},
+            []
+        )
+    ]
+    
+    response = model.run_inference(
+        messages=messages,
+        tools=tools,
+        require_tool_usage=True
+    )
+    
+    if model.get_tool_call("no_match", response)[0] is not None:
+        return True, None
+        
+    call_id, call_args, _ = model.get_tool_call("select_result", response)
+    
+    if call_id is None:
+        return False, None
+        
+    for search_result in search_results:
+        if str(search_result.rank) == str(call_args.get("rank")):
+            return True, search_result.url
+            
+    # The model picked a rank that isn't in the table
+    return False, None
+
+
+def __select_from_screenshots(instructions, driver):
+    """
+    Has a vision model scroll through the results page until it finds a result that matches the instructions.
+    Buddy is provided with the following tools:
+        get_link_url: Retrieves the URL by using the title of the search result
+        
+    Args:
+        instructions (str): The instructions for the search
+        driver (WebDriver): The driver with the results page loaded
+        
+    Returns:
+        str | None: The URL of the chosen result, or None if no matching results were found
+    """
+    
+    model = ModelFactory().get_model(require_vision=True)
+    
     messages = [
         {
             "role": "system",
@@ -49,58 +174,49 @@ When you have found a result that you believe matches the goal of the search, yo
         )
     ]
     
-    driver = get_driver()
-    
-    print_fancy(f"Performing Google search for '{query}': {instructions}", italic=True, color="cyan")
-    
-    driver.get(search_url)
-    
-    print_fancy("Checking results...", italic=True, color="cyan")
-    
     result = None
+    screenshot_pipeline = create_screenshot_pipeline()
+    screenshots_in_context = ConfigManager().get_setting("browsing.screenshots_in_context", 2)
     
-    # Keep scrolling and providing screenshots until a result is found or we've hit the end of the page
-    while result is None and not is_scrolled_to_bottom(driver):
-        screen_base64 = driver.get_screenshot_as_base64()
-        messages.append({
-            "role": "user",
-            "content": [
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{screen_base64}"
-                    }
-                }
-            ]
-        })
-        
-        response = model.run_inference(
-            messages=messages,
-            tools=tools
-        )
-        
-        messages.append(response.choices[0].message)
-        
-        call_id, call_args, call = model.get_tool_call("get_link_url", response)
+    deduplicator = FrameDeduplicator()
+    
+    # Keep scrolling and providing screenshots until a result is found, the end of the page is hit or it stops moving
+    while True:
+        screenshot = screenshot_pipeline.capture(driver)
         
-        if call_id is not None:
-            link_text = call_args["link_text"]
-            link = driver.find_element(By.PARTIAL_LINK_TEXT, link_text)
+        # Screens that look the same as the last one read have nothing new, so they're skipped without an inference
+        if not deduplicator.is_duplicate(screenshot_pipeline.last_hash):
+            messages.append(screenshot)
+            evict_old_screenshots(messages, keep_last=screenshots_in_context)
             
-            # If its not an anchor, find the closest one
-            if link.tag_name != "a":
-                link = link.find_element_by_tag_name("a")
+            response = model.run_inference(
+                messages=messages,
+                tools=tools
+            )
+            
+            messages.append(response.choices[0].message)
+            
+            call_id, call_args, call = model.get_tool_call("get_link_url", response)
+            
+            if call_id is not None:
+                link_text = call_args["link_text"]
+                link = driver.find_element(By.PARTIAL_LINK_TEXT, link_text)
                 
-            result = link.get_attribute("href")
+                # If its not an anchor, find the closest one
+                if link.tag_name != "a":
+                    link = link.find_element(By.TAG_NAME, "a")
+                    
+                result = link.get_attribute("href")
+                
+                messages.append(model.make_tool_result(call, result))
+                break
+        elif deduplicator.is_stuck():
+            break
             
-            messages.append(model.make_tool_result(call, result))
+        if is_scrolled_to_bottom(driver) or not scroll_page(driver):
             break
             
-        scroll_page(driver)
-    
-    driver.quit()
-    
-    if result is None:
-        return "No results found"
-    
+    if screenshot_pipeline.get_summary() is not None:
+        print_fancy(screenshot_pipeline.get_summary(), italic=True, color="light_gray")
+        
     return result
@@ -0,0 +1,362 @@
+import base64
+import io
+import math
+from config.config_manager import ConfigManager
+
+try:
+    from PIL import Image, ImageChops, ImageFilter, ImageStat
+except ImportError:
+    Image = None
+
+# Vision token accounting used by OpenAI models
+LOW_DETAIL_TOKENS = 85
+TOKENS_PER_TILE = 170
+TILE_SIZE = 512
+MAX_IMAGE_SIDE = 2048
+SHORT_SIDE_TARGET = 768
+
+# Average edge intensity (0-255) below which a screenshot has too little fine detail to need a high detail read
+LOW_DETAIL_EDGE_THRESHOLD = 12
+
+# Screenshots whose 1024 bit difference hashes differ in this many bits or fewer look the same to a reader. The hash
+# is larger than the usual 64 bits because smaller hashes can't tell two screens of plain text apart
+DUPLICATE_HASH_DISTANCE = 40
+
+
+class ScreenshotPipeline:
+    """
+    Prepares browser screenshots for vision models. Screenshots are cropped to the page's content, downscaled to a
+    tile budget and re-encoded as JPEG or WebP, and a `detail` level is picked based on how much fine detail
+    (e.g. text) they contain. Keeps track of the bytes and image tokens saved compared to sending the raw PNG.
+
+    Attributes:
+        max_tiles (int): The maximum number of 512px tiles a high detail image may cover
+        image_format (str): The format to encode images in ("jpeg" or "webp")
+        quality (int): The encoding quality (1-100)
+        last_hash (int | None): The perceptual hash of the last processed screenshot, None without Pillow
+    """
+
+    def __init__(self, max_tiles=4, image_format="jpeg", quality=70):
+        self.max_tiles = max_tiles
+        self.image_format = image_format.lower()
+        self.quality = quality
+        self.last_hash = None
+        self.original_bytes = 0
+        self.sent_bytes = 0
+        self.original_tokens = 0
+        self.sent_tokens = 0
+
+    def capture(self, driver, detail=None):
+        """
+        Takes a screenshot of the browser's viewport and builds a user message containing it.
+
+        Args:
+            driver (WebDriver): The driver to take the screenshot with
+            detail (str | None): Forces a detail level ("low" or "high"), otherwise one is picked automatically
+
+        Returns:
+            dict: The message containing the screenshot
+        """
+
+        png_bytes = driver.get_screenshot_as_png()
+
+        # Exclude the vertical scrollbar from the screenshot
+        content_ratio = driver.execute_script("return document.documentElement.clientWidth / window.innerWidth")
+
+        return {
+            "role": "user",
+            "content": [self.process(png_bytes, content_ratio=content_ratio, detail=detail)]
+        }
+
+    def process(self, png_bytes, content_ratio=None, detail=None):
+        """
+        Turns a PNG screenshot into an `image_url` content part.
+
+        Args:
+            png_bytes (bytes): The raw screenshot
+            content_ratio (float | None): The fraction of the screenshot's width that is page content
+            detail (str | None): Forces a detail level ("low" or "high"), otherwise one is picked automatically
+
+        Returns:
+            dict: The `image_url` content part
+        """
+
+        # Without Pillow there's nothing we can do but send the original
+        if Image is None:
+            return self.__make_content_part(png_bytes, "image/png", None)
+
+        image = Image.open(io.BytesIO(png_bytes)).convert("RGB")
+        self.original_bytes += len(png_bytes)
+        self.original_tokens += estimate_image_tokens(image.width, image.height, "high")
+
+        image = self.__crop_to_content(image, content_ratio)
+        self.last_hash = compute_difference_hash(image)
+
+        # Low detail is lossless for images that already fit in a single tile
+        if detail is None:
+            is_small = max(image.width, image.height) <= TILE_SIZE
+            detail = "low" if is_small or self.__measure_edge_density(image) < LOW_DETAIL_EDGE_THRESHOLD else "high"
+
+        image = self.__resize_for_detail(image, detail)
+        encoded, mime_type = self.__encode(image)
+        self.sent_bytes += len(encoded)
+        self.sent_tokens += estimate_image_tokens(image.width, image.height, detail)
+
+        return self.__make_content_part(encoded, mime_type, detail)
+
+    def get_summary(self):
+        """
+        Returns:
+            str | None: A description of the bytes and image tokens saved so far, or None if nothing was processed
+        """
+
+        if self.original_bytes == 0:
+            return None
+
+        return (
+            f"Screenshots: sent {self.sent_bytes // 1024} KB instead of {self.original_bytes // 1024} KB, "
+            f"about {self.sent_tokens} image tokens instead of {self.original_tokens}"
+        )
+
+    def __encode(self, image):
+        """
+        Encodes an image in the configured lossy format, falling back to PNG for the (mostly flat, text-only)
+        screenshots where PNG turns out smaller.
+        """
+
+        lossy_buffer = io.BytesIO()
+
+        if self.image_format == "webp":
+            image.save(lossy_buffer, format="WEBP", quality=self.quality, method=4)
+            lossy_type = "image/webp"
+        else:
+            image.save(lossy_buffer, format="JPEG", quality=self.quality, optimize=True)
+            lossy_type = "image/jpeg"
+
+        png_buffer = io.BytesIO()
+        image.save(png_buffer, format="PNG", optimize=True)
+
+        if png_buffer.tell() < lossy_buffer.tell():
+            return png_buffer.getvalue(), "image/png"
+
+        return lossy_buffer.getvalue(), lossy_type
+
+    def __make_content_part(self, image_bytes, mime_type, detail):
+        image_url = {
+            "url": f"data:{mime_type};base64,{base64.b64encode(image_bytes).decode('ascii')}"
+        }
+
+        if detail is not None:
+            image_url["detail"] = detail
+
+        return {
+            "type": "image_url",
+            "image_url": image_url
+        }
+
+    def __crop_to_content(self, image, content_ratio):
+        """
+        Crops away the scrollbar and any uniform margins around the page content.
+        """
+
+        if content_ratio is not None and 0.5 < content_ratio < 1:
+            image = image.crop((0, 0, int(image.width * content_ratio), image.height))
+
+        background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+        difference = ImageChops.difference(image, background).convert("L").point(lambda value: 255 if value > 16 else 0)
+        bbox = difference.getbbox()
+
+        if bbox is None:
+            return image
+
+        # Keep a little padding so content isn't flush against the edge
+        left, top, right, bottom = bbox
+        padding = 8
+
+        return image.crop((
+            max(0, left - padding),
+            max(0, top - padding),
+            min(image.width, right + padding),
+            min(image.height, bottom + padding)
+        ))
+
+    def __measure_edge_density(self, image):
+        """
+        Measures how much fine detail an image contains, on average, from 0 to 255.
+        """
+
+        thumbnail = image.convert("L")
+        thumbnail.thumbnail((512, 512))
+
+        return ImageStat.Stat(thumbnail.filter(ImageFilter.FIND_EDGES)).mean[0]
+
+    def __resize_for_detail(self, image, detail):
+        """
+        Downscales an image to what the model will actually look at for the chosen detail level.
+        """
+
+        width, height = image.size
+
+        if detail == "low":
+            scale = min(1.0, TILE_SIZE / max(width, height))
+        else:
+            scale = min(1.0, _fit_scale(width, height), _tile_budget_scale(width, height, self.max_tiles))
+
+        if scale >= 1.0:
+            return image
+
+        return image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+
+
+class FrameDeduplicator:
+    """
+    Spots screenshots that look the same as the last one the model read, such as when a page didn't actually scroll
+    or only a sticky overlay is in view, so they can be skipped instead of paying for another vision call.
+
+    Attributes:
+        max_distance (int): The largest hash distance at which two screenshots count as the same
+        max_consecutive_duplicates (int): How many duplicates in a row mean the page has stopped changing
+    """
+
+    def __init__(self, max_distance=DUPLICATE_HASH_DISTANCE, max_consecutive_duplicates=3):
+        self.max_distance = max_distance
+        self.max_consecutive_duplicates = max_consecutive_duplicates
+        self.skipped_count = 0
+        self.__last_hash = None
+        self.__consecutive_duplicates = 0
+
+    def is_duplicate(self, frame_hash):
+        """
+        Checks a screenshot against the last one that was read. Screenshots that aren't duplicates become the new
+        reference.
+
+        Args:
+            frame_hash (int | None): The perceptual hash of the screenshot, None if it couldn't be hashed
+
+        Returns:
+            bool: True if the screenshot can be skipped
+        """
+
+        if frame_hash is None or self.__last_hash is None or hash_distance(frame_hash, self.__last_hash) > self.max_distance:
+            self.__last_hash = frame_hash
+            self.__consecutive_duplicates = 0
+            return False
+
+        self.skipped_count += 1
+        self.__consecutive_duplicates += 1
+
+        return True
+
+    def is_stuck(self):
+        """
+        Returns:
+            bool: True if enough duplicates came in a row that scrolling further won't show anything new
+        """
+
+        return self.__consecutive_duplicates >= self.max_consecutive_duplicates
+
+
+def create_screenshot_pipeline():
+    """
+    Creates a screenshot pipeline configured from the browsing settings.
+
+    Returns:
+        ScreenshotPipeline: The pipeline
+    """
+
+    config = ConfigManager()
+
+    return ScreenshotPipeline(
+        max_tiles=config.get_setting("browsing.screenshot_max_tiles", 4),
+        image_format=config.get_setting("browsing.screenshot_format", "jpeg"),
+        quality=config.get_setting("browsing.screenshot_quality", 70)
+    )
+
+
+def estimate_image_tokens(width, height, detail):
+    """
+    Estimates how many tokens a vision model charges for an image.
+
+    Args:
+        width (int): The width of the image
+        height (int): The height of the image
+        detail (str): The detail level the image is sent with
+
+    Returns:
+        int: The estimated number of tokens
+    """
+
+    if detail == "low":
+        return LOW_DETAIL_TOKENS
+
+    scale = _fit_scale(width, height)
+    tiles = math.ceil(width * scale / TILE_SIZE) * math.ceil(height * scale / TILE_SIZE)
+
+    return LOW_DETAIL_TOKENS + TOKENS_PER_TILE * tiles
+
+
+def compute_difference_hash(image, hash_size=32):
+    """
+    Computes a difference hash (dHash) of an image: each bit records whether a pixel of a tiny grayscale version is
+    brighter than its right-hand neighbour, so visually similar images get hashes that differ in only a few bits.
+
+    Args:
+        image (Image): The image to hash
+        hash_size (int): The width and height of the hash grid, the hash has hash_size squared bits
+
+    Returns:
+        int: The hash
+    """
+
+    pixels = list(image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR).getdata())
+    frame_hash = 0
+
+    for row in range(hash_size):
+        for column in range(hash_size):
+            left = pixels[row * (hash_size + 1) + column]
+            right = pixels[row * (hash_size + 1) + column + 1]
+            frame_hash = (frame_hash << 1) | (1 if left > right else 0)
+
+    return frame_hash
+
+
+def hash_distance(first_hash, second_hash):
+    """
+    Args:
+        first_hash (int): A perceptual hash
+        second_hash (int): Another perceptual hash
+
+    Returns:
+        int: How many bits the hashes differ in
+    """
+
+    return bin(first_hash ^ second_hash).count("1")
+
+
+def _fit_scale(width, height):
+    """
+    The scale a vision model applies to an image before tiling it: fit within 2048px, then shrink the short side to 768px.
+    """
+
+    scale = min(1.0, MAX_IMAGE_SIDE / max(width, height))
+    short_side = min(width, height) * scale
+
+    if short_side > SHORT_SIDE_TARGET:
+        scale *= SHORT_SIDE_TARGET / short_side
+
+    return scale
+
+
+def _tile_budget_scale(width, height, max_tiles):
+    """
+    The largest scale at which an image covers no more than `max_tiles` tiles.
+    """
+
+    best_scale = 0.0
+
+    for columns in range(1, max_tiles + 1):
+        rows = max_tiles // columns
+        scale = min(columns * TILE_SIZE / width, rows * TILE_SIZE / height)
+        best_scale = max(best_scale, scale)
+
+    return min(1.0, best_scale)
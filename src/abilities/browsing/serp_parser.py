@@ -0,0 +1,125 @@
+from urllib.parse import parse_qs, urlparse
+
+# Organic results are the links wrapping an <h3> title, the snippet lives further down the same result block
+SERP_SCRIPT = """
+const results = [];
+const seen = new Set();
+
+document.querySelectorAll("#search a h3, #rso a h3").forEach(title => {
+    const link = title.closest("a");
+
+    if (!link || !link.href || seen.has(link.href)) {
+        return;
+    }
+
+    seen.add(link.href);
+
+    const block = link.closest("[data-hveid], .g") || link.parentElement;
+    let snippet = "";
+
+    if (block) {
+        const candidates = block.querySelectorAll("[data-sncf], .VwiC3b, [style*='-webkit-line-clamp']");
+        snippet = Array.from(candidates).map(element => element.innerText).join(" ");
+    }
+
+    results.push({
+        title: title.innerText,
+        url: link.href,
+        snippet: snippet
+    });
+});
+
+return results;
+"""
+
+MAX_SNIPPET_LENGTH = 200
+
+
+class SearchResult:
+    """
+    A single organic result from a search results page.
+
+    Attributes:
+        rank (int): The position of the result on the page, starting at 1
+        title (str): The title of the result
+        url (str): The URL the result links to
+        snippet (str): The text shown under the title
+    """
+
+    def __init__(self, rank, title, url, snippet=""):
+        self.rank = rank
+        self.title = title.strip()
+        self.url = url
+        self.snippet = " ".join(snippet.split())
+
+
+def parse_search_results(driver):
+    """
+    Parses the organic results from the Google results page currently loaded in the browser.
+
+    Args:
+        driver (WebDriver): The driver with the results page loaded
+
+    Returns:
+        list: The SearchResults in page order, empty if the page couldn't be parsed
+    """
+
+    raw_results = driver.execute_script(SERP_SCRIPT) or []
+    results = []
+
+    for raw_result in raw_results:
+        url = unwrap_redirect_url(raw_result.get("url", ""))
+
+        if not url.startswith("http") or len(raw_result.get("title", "").strip()) == 0:
+            continue
+
+        results.append(SearchResult(len(results) + 1, raw_result["title"], url, raw_result.get("snippet", "")))
+
+    return results
+
+
+def format_results_table(results):
+    """
+    Formats search results as a compact text table for a model to choose from.
+
+    Args:
+        results (list): The SearchResults to format
+
+    Returns:
+        str: The table
+    """
+
+    lines = ["rank | title | url | snippet"]
+
+    for result in results:
+        snippet = result.snippet
+
+        if len(snippet) > MAX_SNIPPET_LENGTH:
+            snippet = snippet[:MAX_SNIPPET_LENGTH].rsplit(" ", 1)[0] + "..."
+
+        lines.append(f"{result.rank} | {result.title} | {result.url} | {snippet}")
+
+    return "\n".join(lines)
+
+
+def unwrap_redirect_url(url):
+    """
+    Resolves Google's `/url?q=` redirect links to the URL they point at.
+
+    Args:
+        url (str): The link's URL
+
+    Returns:
+        str: The destination URL
+    """
+
+    parsed_url = urlparse(url)
+
+    if parsed_url.path == "/url" and "google." in parsed_url.netloc:
+        query = parse_qs(parsed_url.query)
+
+        for key in ("q", "url"):
+            if key in query:
+                return query[key][0]
+
+    return url
@@ -1,23 +1,210 @@
 import os
+import time
 import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from config.config_manager import ConfigManager
 from utils.network import download_file
-from utils.shell_utils import is_included_in_path, add_to_path, print_fancy, run_command
-from utils.system_packages import is_installed, update_packages, install_package, get_package_manager, PackageManager
+from utils.shell_utils import is_included_in_path, add_to_path, print_fancy
+from utils.system_packages import is_installed, install_package, get_package_manager, PackageManager, PackageTransaction
+
+
+# URL patterns for resources the model never needs, blocked by category through the Chrome DevTools Protocol
+BLOCKED_RESOURCE_PATTERNS = {
+    "fonts": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*use.typekit.net*"],
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.mpd", "*.mp3", "*.ogg", "*.wav", "*.mov", "*.m4a", "*.m4s"],
+    "images": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp"],
+    "trackers": [
+        "*doubleclick.net*", "*googlesyndication.com*", "*googleadservices.com*", "*google-analytics.com*",
+        "*googletagmanager.com*", "*googletagservices.com*", "*adservice.google.*", "*connect.facebook.net*",
+        "*amazon-adsystem.com*", "*adnxs.com*", "*criteo.com*", "*criteo.net*", "*taboola.com*", "*outbrain.com*",
+        "*scorecardresearch.com*", "*quantserve.com*", "*hotjar.com*", "*mixpanel.com*", "*segment.io*",
+        "*cdn.segment.com*", "*nr-data.net*", "*optimizely.com*", "*chartbeat.com*", "*moatads.com*",
+        "*pubmatic.com*", "*rubiconproject.com*", "*casalemedia.com*", "*clarity.ms*"
+    ]
+}
+
+# Images are left alone by default since screenshots are read when a page has little text
+DEFAULT_BLOCKED_RESOURCES = ["fonts", "media", "trackers"]
+
+# Waits for the DOM to be parsed and its text to stop changing, which is when client side rendering has settled
+CONTENT_LENGTH_SCRIPT = """
+if (document.readyState === "loading" || !document.body) {
+    return -1;
+}
+
+return document.body.innerText.length;
+"""
+
+# Finds the element the page actually scrolls with. Most pages scroll the document, but app-like pages often keep
+# the document fixed and scroll a nested container instead, in which case the largest visible one is used
+FIND_SCROLL_CONTAINER_SCRIPT = """
+function findScrollContainer() {
+    const root = document.scrollingElement || document.documentElement;
+
+    if (root.scrollHeight - window.innerHeight > 1) {
+        return root;
+    }
+
+    let best = root;
+    let bestArea = 0;
+
+    document.querySelectorAll("body *").forEach(element => {
+        if (element.scrollHeight - element.clientHeight <= 1) {
+            return;
+        }
+
+        const overflow = getComputedStyle(element).overflowY;
+
+        if (overflow !== "auto" && overflow !== "scroll" && overflow !== "overlay") {
+            return;
+        }
+
+        const rect = element.getBoundingClientRect();
+        const area = Math.max(0, Math.min(rect.bottom, window.innerHeight) - Math.max(rect.top, 0)) * rect.width;
+
+        if (area > bestArea) {
+            best = element;
+            bestArea = area;
+        }
+    });
+
+    return best;
+}
+
+function getViewportHeight(container) {
+    return container === (document.scrollingElement || document.documentElement) ? window.innerHeight : container.clientHeight;
+}
+"""
 
 
 def get_driver():
-    return uc.Chrome(headless=True, use_subprocess=False, loglevel=50)
+    """
+    Launches a headless browser that returns from page loads once the DOM is ready (the "eager" strategy) rather than
+    waiting for every image, font and script to finish loading.
+    
+    Returns:
+        WebDriver: The driver
+    """
+    
+    options = uc.ChromeOptions()
+    options.page_load_strategy = "eager"
+    
+    return uc.Chrome(options=options, headless=True, use_subprocess=False, loglevel=50)
+
+
+def get_blocked_url_patterns():
+    """
+    Builds the list of URL patterns to block from the browsing settings.
+    "browsing.blocked_resources" picks categories from BLOCKED_RESOURCE_PATTERNS and "browsing.blocked_url_patterns"
+    adds any extra patterns.
+    
+    Returns:
+        list: The URL patterns, with * wildcards
+    """
+    
+    config = ConfigManager()
+    patterns = []
+    
+    for category in config.get_setting("browsing.blocked_resources", DEFAULT_BLOCKED_RESOURCES):
+        patterns.extend(BLOCKED_RESOURCE_PATTERNS.get(category, []))
+        
+    patterns.extend(config.get_setting("browsing.blocked_url_patterns", []))
+    
+    return patterns
+
+
+def block_resources(driver, patterns):
+    """
+    Blocks requests matching URL patterns in the driver's current tab. Blocking is set per tab, so it has to be done
+    for every tab a page is loaded in.
+    
+    Args:
+        driver (WebDriver): The driver to block requests in
+        patterns (list): The URL patterns, with * wildcards
+    """
+    
+    if len(patterns) == 0:
+        return
+        
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except WebDriverException:
+        # Not every driver speaks the DevTools Protocol, pages just load slower without it
+        pass
+
+
+def load_page(driver, url, timeout=20, settle_timeout=5):
+    """
+    Loads a page with unneeded resources blocked, then waits for its content to settle.
+    
+    Args:
+        driver (WebDriver): The driver to load the page in
+        url (str): The URL of the page
+        timeout (float): How many seconds to wait for the DOM to be ready before reading whatever has loaded
+        settle_timeout (float): How many seconds to wait for client side rendering to finish after the DOM is ready
+        
+    Returns:
+        float: How many seconds loading took
+    """
+    
+    started_at = time.monotonic()
+    
+    block_resources(driver, get_blocked_url_patterns())
+    driver.set_page_load_timeout(timeout)
+    
+    try:
+        driver.get(url)
+    except TimeoutException:
+        # Whatever has arrived so far is usually enough to read
+        driver.execute_script("window.stop()")
+        
+    wait_for_content_to_settle(driver, settle_timeout)
+    
+    return time.monotonic() - started_at
+
+
+def wait_for_content_to_settle(driver, timeout=5, interval=0.25):
+    """
+    Waits until the DOM has been parsed and the amount of text on the page stops changing between checks.
+    
+    Args:
+        driver (WebDriver): The driver with the page loading
+        timeout (float): The maximum number of seconds to wait
+        interval (float): How many seconds to wait between checks
+    """
+    
+    deadline = time.monotonic() + timeout
+    previous_length = None
+    
+    while time.monotonic() < deadline:
+        length = driver.execute_script(CONTENT_LENGTH_SCRIPT)
+        
+        if length > 0 and length == previous_length:
+            return
+            
+        previous_length = length
+        time.sleep(interval)
 
 
 def scroll_page(driver):
     """
-    Scrolls by the height of the window
+    Scrolls the page's scroll container (the document, or a nested container on app-like pages) by its visible height
     
     Args:
         driver (WebDriver): The WebDriver instance to scroll
+        
+    Returns:
+        bool: True if the page moved, False if the scroll position is stuck
     """
     
-    driver.execute_script("window.scrollBy(0, window.innerHeight)")
+    return driver.execute_script(FIND_SCROLL_CONTAINER_SCRIPT + """
+        const container = findScrollContainer();
+        const before = container.scrollTop;
+        container.scrollTop = before + getViewportHeight(container);
+        
+        return Math.abs(container.scrollTop - before) >= 1;
+    """)
 
     
 def is_scrolled_to_bottom(driver):
@@ -31,7 +218,11 @@ def is_scrolled_to_bottom(driver):
         bool: True if the page is scrolled to the bottom, False otherwise
     """
     
-    return driver.execute_script("return window.innerHeight + window.scrollY >= document.body.scrollHeight")
+    return driver.execute_script(FIND_SCROLL_CONTAINER_SCRIPT + """
+        const container = findScrollContainer();
+        
+        return container.scrollTop + getViewportHeight(container) >= container.scrollHeight - 2;
+    """)
 
 
 def check_chrome_installation():
@@ -54,26 +245,27 @@ def check_chrome_installation():
 def handle_chrome_install():
     """
     Handles the Chrome install process based on the available package manager.
+    The package index is only refreshed if it's stale, and Chrome is installed along with its dependencies in a
+    single package manager invocation.
     """
     
     print_fancy("Chrome not found. Installing...", bold=True, color="yellow")
     
     package_manager = get_package_manager()
     
-    print_fancy("Updating package list...", italic=True, color="light_gray")
-    update_packages()
-    
     if package_manager == PackageManager.APT:
         print_fancy("Downloading Chrome Stable...", italic=True, color="light_gray")
         download_file("https://dl.google.com/linux/direct/google-chrome-stable_current_amd64.deb", "/tmp/google-chrome-stable_current_amd64.deb")
         
-        print_fancy("Installing...", italic=True, color="light_gray")
-        run_command("dpkg -i /tmp/google-chrome-stable_current_amd64.deb", superuser=True, display_output=False)
-        run_command("dpkg --configure -a", superuser=True, display_output=False)
-        run_command("apt-get install -f -y --fix-missing", superuser=True, display_output=False)
-        
-        # Clean it up
-        os.remove("/tmp/google-chrome-stable_current_amd64.deb")
+        # Installing the local .deb through apt resolves its dependencies in the same transaction
+        try:
+            with PackageTransaction(package_manager) as transaction:
+                transaction.add("/tmp/google-chrome-stable_current_amd64.deb")
+        except RuntimeError:
+            return False
+        finally:
+            # Clean it up
+            os.remove("/tmp/google-chrome-stable_current_amd64.deb")
     elif package_manager == PackageManager.CHOCO:
         print_fancy("Installing Chrome stable...", italic=True, color="light_gray")
         
@@ -96,7 +288,12 @@ def handle_chrome_install():
                 "gpgkey=https://dl-ssl.google.com/linux/linux_signing_key.pub\n"
             )
             
-        run_command("yum install -y google-chrome-stable", superuser=True, display_output=False)
+        # The new repository's metadata is fetched by the install itself
+        try:
+            with PackageTransaction(package_manager) as transaction:
+                transaction.add("google-chrome-stable")
+        except RuntimeError:
+            return False
     elif package_manager == PackageManager.BREW:
         print_fancy("Installing Chrome stable...", italic=True, color="light_gray")
         install_package("google-chrome")
@@ -1,45 +1,172 @@
-from abilities.browsing.utils import get_driver, is_scrolled_to_bottom, scroll_page
+import time
+from abilities.browsing.content_extraction import PageExtraction, chunk_text, extract_main_content
+from abilities.browsing.http_fetch import fetch_page
+from abilities.browsing.page_cache import create_page_cache, get_cache_ttl
+from abilities.browsing.screenshots import FrameDeduplicator, create_screenshot_pipeline
+from abilities.browsing.utils import is_scrolled_to_bottom, load_page, scroll_page
+from abilities.browsing.vision_context import evict_old_screenshots
+from config.config_manager import ConfigManager
 from models.base_model_factory import ModelFactory
 from utils.shell_utils import print_fancy
 
 
-def handle_view_webpage(args):
+def handle_view_webpage(args, browser_pool, deadline=None):
     """
-    Allows Buddy to view a webpage using a web browser with vision capabilities.
+    Allows Buddy to view a webpage using a web browser.
+    The page is first fetched over plain HTTP, which is enough for static HTML, plaintext and JSON. Pages that are
+    blocked or rendered with JavaScript are loaded in the browser and their text is extracted from the DOM instead.
+    The main readable text is read in token-budgeted sections, and Buddy falls back to reading screenshots with vision
+    capabilities when the page has little useful text (e.g. canvas or image-heavy pages) or when it asks to see the page.
+    Extracted text and the final notes are cached on disk, so revisiting a page with the same instructions is free.
     Buddy is provided with the following tools:
         stop_reading: Allows Buddy to stop reading the webpage when the instructions have been fulfilled
         add_note: Allows Buddy to add a note to the findings
+        view_screenshots: Allows Buddy to switch from reading text to looking at screenshots of the page
     
     Args:
         args (dict): The arguments for the search from the model
             url (str): The URL of the webpage to view
             instructions (str): The instructions for what to do on the page
+        browser_pool (BrowserPool): The pool to take a browser from
+        deadline (float | None): The `time.monotonic()` time by which reading has to stop, keeping the notes so far
             
     Returns:
         str: An explanation of the findings
     """
     
-    model = ModelFactory().get_model(require_vision=True)
-    
     url = args["url"]
     instructions = args["instructions"]
-    messages = [
-        {
-            "role": "system",
-            "content": f"""
-You are viewing a webpage to look for information. You will be provided with instructions on what to do on the webpage.
+    
+    print_fancy(f"Opening webpage {url}: {instructions}", italic=True, color="cyan")
+    
+    page_cache = create_page_cache()
+    
+    if page_cache is not None:
+        cached_notes = page_cache.get("notes", url, instructions)
+        
+        if cached_notes is not None:
+            print_fancy("Using the notes from an earlier visit", italic=True, color="light_gray")
+            return cached_notes
+            
+    model = ModelFactory().get_model(require_vision=True)
+    
+    result_segments = []
+    screenshot_pipeline = create_screenshot_pipeline()
+    
+    text_was_read = False
+    needs_screenshots = True
+    extraction, page_ttl = __load_page_text(url, page_cache, deadline)
+    
+    if extraction is not None:
+        needs_screenshots = __read_page_text(model, instructions, extraction, result_segments, deadline)
+        text_was_read = True
+        
+    if needs_screenshots and not is_past_deadline(deadline):
+        acquire_timeout = 120 if deadline is None else max(0, deadline - time.monotonic())
+        
+        with browser_pool.acquire(timeout=acquire_timeout) as driver:
+            load_seconds = load_page(driver, url)
+            print_fancy(f"Loaded the page in {load_seconds:.1f}s", italic=True, color="light_gray")
+            
+            # The text of fetched pages has already been read, so only the screenshots are left for those
+            if not text_was_read:
+                extraction = extract_main_content(driver)
+                
+                if extraction.is_helpful():
+                    if page_cache is not None:
+                        page_cache.put("page", url, value={"title": extraction.title, "text": extraction.text, "ttl": page_ttl, "cached_at": time.time()}, ttl=page_ttl)
+                        
+                    needs_screenshots = __read_page_text(model, instructions, extraction, result_segments, deadline)
+                    
+            if needs_screenshots:
+                __read_page_screenshots(model, instructions, driver, screenshot_pipeline, result_segments, deadline)
+                
+    print_fancy("Finished reading the webpage", italic=True, color="cyan")
+    
+    if screenshot_pipeline.get_summary() is not None:
+        print_fancy(screenshot_pipeline.get_summary(), italic=True, color="light_gray")
+        
+    if len(result_segments) == 0:
+        return "No information found"
+        
+    result = "\\n\\n".join(result_segments)
+    
+    # Notes cut short by the deadline are incomplete, so they aren't worth keeping
+    if page_cache is not None and not is_past_deadline(deadline):
+        page_cache.put("notes", url, instructions, value=result, ttl=page_ttl)
+        
+    return result
 
-Obey the following guidelines:
-- Provide supporting information back to the user by using the add_note tool
-- Upon fulfilling the instructions, stop reading the webpage using the stop_reading tool
-- Your notes should be formatted as markdown text
-"""
-        },
-        {
-            "role": "user",
-            "content": instructions
-        }
-    ]
+
+def is_past_deadline(deadline):
+    """
+    Args:
+        deadline (float | None): A `time.monotonic()` time, or None for no deadline
+        
+    Returns:
+        bool: True if the deadline has passed
+    """
+    
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def __load_page_text(url, page_cache, deadline=None):
+    """
+    Loads the readable text of a webpage without the browser, from the cache or over plain HTTP.
+    
+    Args:
+        url (str): The URL of the webpage
+        page_cache (PageCache | None): The cache to check and fill
+        deadline (float | None): The `time.monotonic()` time by which the page has to be loaded
+        
+    Returns:
+        tuple: The PageExtraction (or None if the page needs the browser), and how much longer the page may be cached for
+    """
+    
+    default_ttl = page_cache.default_ttl if page_cache is not None else 0
+    
+    if page_cache is not None:
+        cached_page = page_cache.get("page", url)
+        
+        if cached_page is not None:
+            print_fancy("Using the page's text from an earlier visit", italic=True, color="light_gray")
+            
+            # Whatever is cached from this copy of the page can only stay fresh for as long as the copy itself
+            remaining_ttl = max(0, cached_page["ttl"] - (time.time() - cached_page.get("cached_at", 0)))
+            return PageExtraction(cached_page["title"], cached_page["text"]), remaining_ttl
+            
+    if not ConfigManager().get_setting("browsing.http_fetch", True):
+        return None, default_ttl
+        
+    fetch_result = fetch_page(url, timeout=10 if deadline is None else max(1, min(10, deadline - time.monotonic())))
+    
+    if fetch_result.needs_browser:
+        print_fancy(f"Opening in the browser because {fetch_result.reason}", italic=True, color="light_gray")
+        return None, default_ttl
+        
+    print_fancy(f"Fetched without the browser in {int(fetch_result.elapsed * 1000)} ms", italic=True, color="light_gray")
+    
+    extraction = fetch_result.extraction
+    page_ttl = get_cache_ttl(fetch_result.headers, default_ttl)
+    
+    if page_cache is not None:
+        page_cache.put("page", url, value={"title": extraction.title, "text": extraction.text, "ttl": page_ttl, "cached_at": time.time()}, ttl=page_ttl)
+        
+    return extraction, page_ttl
+
+
+def __make_reading_tools(model, can_view_screenshots=False):
+    """
+    Creates the tools used while reading a webpage.
+    
+    Args:
+        model (BaseModel): The model doing the reading
+        can_view_screenshots (bool): Whether to offer switching to screenshots
+        
+    Returns:
+        list: The tools
+    """
+    
     tools = [
         model.make_tool(
             "stop_reading",
@@ -55,30 +182,65 @@ Obey the following guidelines:
         )
     ]
     
-    driver = get_driver()
+    if can_view_screenshots:
+        tools.append(
+            model.make_tool(
+                "view_screenshots",
+                "Switch to looking at screenshots of the webpage, for when the text is missing content you need or the page's images or layout matter",
+                {},
+                []
+            )
+        )
+        
+    return tools
+
+
+def __read_page_text(model, instructions, extraction, result_segments, deadline=None):
+    """
+    Reads the extracted text of a webpage one section at a time.
     
-    print_fancy(f"Opening webpage {url}: {instructions}", italic=True, color="cyan")
+    Args:
+        model (BaseModel): The model doing the reading
+        instructions (str): The instructions for what to do on the page
+        extraction (PageExtraction): The text extracted from the page
+        result_segments (list): The list to add notes to
+        deadline (float | None): The `time.monotonic()` time by which reading has to stop
+        
+    Returns:
+        bool: Whether screenshots of the page still need to be read
+    """
     
-    driver.get(url)
+    chunks = chunk_text(extraction.text, max_tokens=ConfigManager().get_setting("browsing.text_chunk_tokens", 1500))
+    tools = __make_reading_tools(model, can_view_screenshots=True)
+    messages = [
+        {
+            "role": "system",
+            "content": f"""
+You are reading the text content of a webpage to look for information. You will be provided with instructions on what to do on the webpage, followed by the page's text in numbered sections.
+
+Obey the following guidelines:
+- Provide supporting information back to the user by using the add_note tool
+- Upon fulfilling the instructions, stop reading the webpage using the stop_reading tool
+- If the text is missing content you need, or the page's images or layout are important, use the view_screenshots tool
+- Your notes should be formatted as markdown text
+"""
+        },
+        {
+            "role": "user",
+            "content": instructions
+        }
+    ]
     
-    result_segments = []
-    first_look = True
+    print_fancy(f"Reading the text of '{extraction.title}' ({len(chunks)} sections)...", italic=True, color="cyan")
     
-    # Process the first look at the page and keep reading until the bottom is reached
-    # There's a break condition for if the model decides to stop reading
-    while first_look or not is_scrolled_to_bottom(driver):
-        first_look = False
-        screen_base64 = driver.get_screenshot_as_base64()
+    for index, chunk in enumerate(chunks):
+        if is_past_deadline(deadline):
+            print_fancy("Ran out of time reading the webpage", italic=True, color="light_gray")
+            return False
+            
         messages.append({
             "role": "user",
-            "content": [
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{screen_base64}"
-                    }
-                }
-            ]
+            "content": f"Section {index + 1} of {len(chunks)}:\n\n{chunk}"
         })
         
         response = model.run_inference(
@@ -96,18 +258,100 @@ Obey the following guidelines:
             
         # Check if the model is done reading and wants to stop
         if model.get_tool_call("stop_reading", response)[0] is not None:
-            break
+            return False
             
-        # Scroll and continue if there's more to read
-        if not is_scrolled_to_bottom(driver):
-            print_fancy("Scrolling for more information...", italic=True, color="cyan")
-            scroll_page(driver)
-        
-    driver.close()
+        # Check if the model needs to see the page instead
+        if model.get_tool_call("view_screenshots", response)[0] is not None:
+            print_fancy("Switching to screenshots...", italic=True, color="cyan")
+            return True
+            
+    return False
+
+
+def __read_page_screenshots(model, instructions, driver, screenshot_pipeline, result_segments, deadline=None):
+    """
+    Reads a webpage by scrolling through it and looking at screenshots with vision capabilities.
     
-    print_fancy("Finished reading the webpage", italic=True, color="cyan")
+    Args:
+        model (BaseModel): The model doing the reading
+        instructions (str): The instructions for what to do on the page
+        driver (WebDriver): The driver with the page loaded
+        screenshot_pipeline (ScreenshotPipeline): The pipeline to prepare screenshots with
+        result_segments (list): The list to add notes to, which may already hold notes taken from the page's text
+        deadline (float | None): The `time.monotonic()` time by which reading has to stop
+    """
     
-    if len(result_segments) == 0:
-        return "No information found"
+    screenshots_in_context = ConfigManager().get_setting("browsing.screenshots_in_context", 2)
+    tools = __make_reading_tools(model)
+    messages = [
+        {
+            "role": "system",
+            "content": f"""
+You are viewing a webpage to look for information. You will be provided with instructions on what to do on the webpage.
+
+Obey the following guidelines:
+- Provide supporting information back to the user by using the add_note tool
+- Upon fulfilling the instructions, stop reading the webpage using the stop_reading tool
+- Your notes should be formatted as markdown text
+"""
+        },
+        {
+            "role": "user",
+            "content": instructions
+        }
+    ]
     
-    return "\\n\\n".join(result_segments)
+    if len(result_segments) > 0:
+        notes_str = "\n".join([f"- {note}" for note in result_segments])
+        messages.append({
+            "role": "user",
+            "content": f"Notes already taken from the page's text:\n{notes_str}"
+        })
+        
+    deduplicator = FrameDeduplicator()
+    
+    # Keep reading a screen at a time until the model stops, the bottom is reached or the page stops moving
+    while True:
+        if is_past_deadline(deadline):
+            print_fancy("Ran out of time reading the webpage", italic=True, color="light_gray")
+            break
+            
+        screenshot = screenshot_pipeline.capture(driver)
+        
+        # Screens that look the same as the last one read have nothing new, so they're skipped without an inference
+        if not deduplicator.is_duplicate(screenshot_pipeline.last_hash):
+            messages.append(screenshot)
+            evict_old_screenshots(messages, keep_last=screenshots_in_context, notes=result_segments)
+            
+            response = model.run_inference(
+                messages=messages,
+                tools=tools
+            )
+            
+            messages.append(response.choices[0].message)
+            
+            # Check to see if the model would like to take notes
+            note_call_id, note_call_args, note_call = model.get_tool_call("add_note", response)
+            if note_call_id is not None:
+                result_segments.append(note_call_args["note"])
+                messages.append(model.make_tool_result(note_call, "Success"))
+                
+            # Check if the model is done reading and wants to stop
+            if model.get_tool_call("stop_reading", response)[0] is not None:
+                break
+        elif deduplicator.is_stuck():
+            print_fancy("The page stopped changing", italic=True, color="light_gray")
+            break
+            
+        if is_scrolled_to_bottom(driver):
+            break
+            
+        # Scroll and continue since there's more to read
+        print_fancy("Scrolling for more information...", italic=True, color="cyan")
+        
+        if not scroll_page(driver):
+            print_fancy("The page can't be scrolled any further", italic=True, color="light_gray")
+            break
+            
+    if deduplicator.skipped_count > 0:
+        print_fancy(f"Skipped {deduplicator.skipped_count} screenshots that looked the same as the one before", italic=True, color="light_gray")
@@ -0,0 +1,66 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from abilities.browsing.view_webpage import handle_view_webpage
+from config.config_manager import ConfigManager
+from utils.shell_utils import print_fancy
+
+
+def handle_view_webpages(args, browser_pool):
+    """
+    Allows Buddy to read several webpages at once. Each page is read the same way as with view_webpage_url, on its own
+    worker with its own browser tab when it needs one, and everything stops when the time budget runs out.
+
+    Args:
+        args (dict): The arguments from the model
+            pages (list): The pages to read, each a dict with a `url` and `instructions`
+            time_budget_seconds (int): How long reading all of the pages may take (optional)
+        browser_pool (BrowserPool): The pool to take browsers from
+
+    Returns:
+        str: The notes from every page, each under a heading naming its source
+    """
+
+    config = ConfigManager()
+    pages = [page for page in args.get("pages", []) if page.get("url")]
+
+    if len(pages) == 0:
+        return "No pages were provided"
+
+    time_budget = args.get("time_budget_seconds") or config.get_setting("browsing.multi_page_time_budget", 180)
+    max_workers = min(len(pages), config.get_setting("browsing.max_concurrent_pages", 4))
+    deadline = time.monotonic() + time_budget
+
+    print_fancy(f"Reading {len(pages)} webpages with a {time_budget}s time budget...", italic=True, color="cyan")
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="view_webpages")
+    futures = [
+        executor.submit(
+            handle_view_webpage,
+            {"url": page["url"], "instructions": page.get("instructions", "")},
+            browser_pool,
+            deadline=deadline
+        )
+        for page in pages
+    ]
+
+    # Workers check the deadline between inferences, so give an inference in flight a little time to come back
+    wait(futures, timeout=max(0, deadline - time.monotonic()) + 30)
+
+    # Pages still waiting for a worker are dropped, and late workers finish on their own without holding us up
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    sections = []
+
+    for page, future in zip(pages, futures):
+        if not future.done() or future.cancelled():
+            notes = "Not read within the time budget"
+        elif future.exception() is not None:
+            notes = f"Failed to read the page: {future.exception()}"
+        else:
+            notes = future.result()
+
+        sections.append(f"## Source: {page['url']}\n\n{notes}")
+
+    print_fancy("Finished reading the webpages", italic=True, color="cyan")
+
+    return "\n\n".join(sections)
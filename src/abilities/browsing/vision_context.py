@@ -0,0 +1,60 @@
+EVICTED_SCREENSHOT_PREFIX = "[Earlier screenshot removed to save space]"
+
+
+def evict_old_screenshots(messages, keep_last=2, notes=None):
+    """
+    Keeps only the most recent screenshots inline in a browsing conversation so each step costs about the same as
+    the first. Older screenshots are replaced with a text stub; the newest stub also carries the notes captured so
+    far, so nothing learned from the removed screenshots is lost.
+
+    Args:
+        messages (list): The conversation, modified in place
+        keep_last (int): How many of the most recent screenshots to keep
+        notes (list | None): The notes captured so far
+    """
+
+    screenshot_indexes = [index for index, message in enumerate(messages) if is_screenshot_message(message)]
+    stub_indexes = [index for index, message in enumerate(messages) if __is_stub_message(message)]
+
+    evicted_indexes = screenshot_indexes[:max(0, len(screenshot_indexes) - keep_last)]
+
+    if len(evicted_indexes) == 0:
+        return
+
+    all_stub_indexes = sorted(stub_indexes + evicted_indexes)
+
+    for index in all_stub_indexes:
+        messages[index] = {
+            "role": "user",
+            "content": EVICTED_SCREENSHOT_PREFIX
+        }
+
+    # Only the newest stub repeats the notes, older stubs would just be paying for them again
+    if notes is not None and len(notes) > 0:
+        notes_str = "\n".join([f"- {note}" for note in notes])
+        messages[all_stub_indexes[-1]]["content"] = f"{EVICTED_SCREENSHOT_PREFIX}\nNotes captured so far:\n{notes_str}"
+
+
+def is_screenshot_message(message):
+    """
+    Checks if a message is a user message that contains an image.
+
+    Args:
+        message (dict | ChatCompletionMessage): The message to check
+
+    Returns:
+        bool: True if the message contains an image
+    """
+
+    if not isinstance(message, dict) or message.get("role") != "user" or not isinstance(message.get("content"), list):
+        return False
+
+    return any(part.get("type") == "image_url" for part in message["content"])
+
+
+def __is_stub_message(message):
+    return (
+        isinstance(message, dict)
+        and isinstance(message.get("content"), str)
+        and message["content"].startswith(EVICTED_SCREENSHOT_PREFIX)
+    )
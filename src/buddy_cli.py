@@ -3,7 +3,7 @@ import sys
 import os
 
 import initialize_flows
-from flows import get_flow_name, create_flow
+from flows import route_flow, create_flow
 from models import ModelTag
 
 # Add the current directory to the Python path to ensure modules can be found
@@ -13,6 +13,7 @@ from commands.install import install
 from commands.use import use
 from commands.remove import remove
 from commands.info import display_info
+from commands.route import route
 from models.base_model_factory import ModelFactory
 
 model_factory = ModelFactory()
@@ -48,19 +49,19 @@ def main():
     elif command == "remove":
         remove(sys.argv[2:])
         sys.exit(0)
+        
+    # Which flow a task would be handled by, without running it
+    elif command == "route":
+        route(sys.argv[2:])
+        sys.exit(0)
     
     # Find a model to use for this command
     model = model_factory.get_model(require_vision=False, tags=[ModelTag.BALANCED])
     
-    flow_name = get_flow_name(suffix_str)
+    flow_name, flow_command_str = route_flow(suffix_str)
 
     if flow_name is None:
         handle_unknown_operation()
-    
-    if flow_name != "__default":
-        flow_command_str = suffix_str[len(flow_name):].strip()
-    else:
-        flow_command_str = suffix_str
         
     flow = create_flow(flow_name, model)
     
@@ -52,6 +52,7 @@ Usage:
     buddy info commands                 - Display information about available commands
     buddy use provider <name> [api_key] - Configure Buddy to use a model provider
     buddy use ability <name>            - Enable an ability
+    buddy route <task>                  - Show which flow a task would be handled by
 
 Examples:
     buddy what's my local IP address            - Get your local IP address without supervision
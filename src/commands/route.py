@@ -0,0 +1,29 @@
+import initialize_flows
+import sys
+from flows import FLOWS, route_flow
+from utils.shell_utils import print_fancy
+
+
+def route(args):
+    """
+    Entry point for the 'route' command. Shows which flow a task would be handled by, and what it would be given.
+
+    Args:
+        args (list): List of arguments passed to the command
+    """
+
+    if len(args) == 0:
+        print_fancy("Usage: buddy route <task>", color="red")
+        sys.exit(1)
+
+    flow_name, flow_command_str = route_flow(" ".join(args))
+
+    if flow_name is None:
+        print_fancy("No flow would handle this task", color="red")
+        sys.exit(1)
+
+    prefix_str = "none (default flow)" if flow_name == "__default" else f"\"{flow_name}\""
+
+    print_fancy(f"Flow: {FLOWS[flow_name].__name__}", bold=True, color="cyan")
+    print_fancy(f"Matched prefix: {prefix_str}", color="light_gray")
+    print_fancy(f"Task: {flow_command_str}", color="light_gray")
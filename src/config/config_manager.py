@@ -1,5 +1,5 @@
 import os
-import json
+from config.json_store import get_json_store
 
 CONFIG_FILE = os.path.expanduser('~/.buddy_cli/config.json')
 
@@ -7,6 +7,8 @@ CONFIG_FILE = os.path.expanduser('~/.buddy_cli/config.json')
 class ConfigManager:
     """
     Manages the configuration of the Buddy CLI.
+    The configuration file is shared by every ConfigManager in the process and is only re-read when it changes on disk,
+    so constructing one is cheap.
     
     Attributes:
         config (dict): The configuration settings for Buddy
@@ -17,19 +19,19 @@ class ConfigManager:
         Initializes the ConfigManager by loading the configuration file.
         """
         
-        self.config = {}
+        self.store = get_json_store(CONFIG_FILE, lambda: {"current_model_provider": "", "abilities": []})
         self.load_config()
 
+    @property
+    def config(self):
+        return self.store.read()
+
     def load_config(self):
         """
         Loads the configuration file. If the file does not exist, initializes it with default values.
         """
         
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r') as f:
-                self.config = json.load(f)
-        else:
-            self.config = {"current_model_provider": "", "abilities": []}
+        if not self.store.exists():
             self.save_config()
 
     def save_config(self):
@@ -37,9 +39,8 @@ class ConfigManager:
         Saves the current configuration to disk.
         """
         
-        os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        config = dict(self.config)
+        self.store.update(lambda saved_config: saved_config.update(config))
 
     def set_current_model_provider(self, provider_name):
         """
@@ -49,8 +50,10 @@ class ConfigManager:
             provider_name (str): The name of the model provider to use
         """
         
-        self.config["current_model_provider"] = provider_name
-        self.save_config()
+        def set_provider(config):
+            config["current_model_provider"] = provider_name
+            
+        self.store.update(set_provider)
         
     def get_current_model_provider(self):
         """
@@ -64,18 +67,24 @@ class ConfigManager:
         Enables an ability for Buddy to use and saves the configuration.
         """
         
-        if ability not in self.config["abilities"]:
-            self.config["abilities"].append(ability)
-            self.save_config()
+        def add(config):
+            if ability not in config.setdefault("abilities", []):
+                config["abilities"].append(ability)
+                
+        if ability not in self.get_abilities():
+            self.store.update(add)
             
     def remove_ability(self, ability):
         """
         Disables an ability for Buddy and saves the configuration.
         """
         
-        if ability in self.config["abilities"]:
-            self.config["abilities"].remove(ability)
-            self.save_config()
+        def remove(config):
+            if ability in config.get("abilities", []):
+                config["abilities"].remove(ability)
+                
+        if ability in self.get_abilities():
+            self.store.update(remove)
 
     def get_abilities(self):
         """
@@ -83,3 +92,15 @@ class ConfigManager:
         """
         
         return self.config.get("abilities", [])
+    
+    def get_setting(self, name, default=None):
+        """
+        Retrieves an advanced setting, such as a tuning parameter for an ability.
+        Settings live under "settings" in the configuration file, keyed by name (e.g. "browsing.pool_size").
+        
+        Args:
+            name (str): The name of the setting
+            default (Any): The value to use if the setting isn't configured
+        """
+        
+        return self.config.get("settings", {}).get(name, default)
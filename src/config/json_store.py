@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+from utils.file_lock import FileLock, write_atomically
+
+__stores = {}
+__stores_lock = threading.Lock()
+
+
+class JsonStore:
+    """
+    A JSON file shared by everything in the process that reads or writes it.
+    The parsed contents are cached and only re-read when the file's modification time or size changes, so reads
+    cost a stat rather than a parse. Writes are atomic and serialized across processes with a lock file, and always
+    start from the latest contents on disk so concurrent writers don't undo each other's changes.
+
+    Attributes:
+        path (str): The path of the JSON file
+        default_factory (Callable): Creates the contents to use while the file doesn't exist
+    """
+
+    def __init__(self, path, default_factory=dict):
+        self.path = path
+        self.default_factory = default_factory
+        self.__data = None
+        self.__signature = None
+        self.__lock = threading.RLock()
+
+    def read(self):
+        """
+        Gets the contents of the file, re-reading it only if it changed since it was last read.
+        The returned dictionary is shared, so it must not be modified; use `update` to make changes.
+
+        Returns:
+            dict: The contents of the file
+        """
+
+        with self.__lock:
+            signature = self.__get_signature()
+
+            if self.__data is None or signature != self.__signature:
+                self.__data = self.__load()
+                self.__signature = signature
+
+            return self.__data
+
+    def update(self, mutator):
+        """
+        Changes the contents of the file and writes them back to disk.
+
+        Args:
+            mutator (Callable): Called with the latest contents, which it modifies in place
+
+        Returns:
+            Any: Whatever the mutator returned
+        """
+
+        with self.__lock, FileLock(f"{self.path}.lock"):
+            data = self.__load()
+            result = mutator(data)
+
+            write_atomically(self.path, json.dumps(data, indent=4))
+
+            self.__data = data
+            self.__signature = self.__get_signature()
+
+            return result
+
+    def exists(self):
+        """
+        Returns:
+            bool: True if the file has been written to disk
+        """
+
+        return self.__get_signature() is not None
+
+    def __get_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def __load(self):
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self.default_factory()
+
+
+def get_json_store(path, default_factory=dict):
+    """
+    Gets the store for a JSON file, creating it on first use. Every caller in the process shares the same store.
+
+    Args:
+        path (str): The path of the JSON file
+        default_factory (Callable): Creates the contents to use while the file doesn't exist
+
+    Returns:
+        JsonStore: The store
+    """
+
+    path = os.path.abspath(path)
+
+    with __stores_lock:
+        if path not in __stores:
+            __stores[path] = JsonStore(path, default_factory)
+
+        return __stores[path]
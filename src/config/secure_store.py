@@ -1,5 +1,5 @@
 import os
-import json
+from config.json_store import get_json_store
 
 API_KEYS_FILE = os.path.expanduser('~/.buddy_cli/api_keys.json')
 
@@ -7,6 +7,7 @@ API_KEYS_FILE = os.path.expanduser('~/.buddy_cli/api_keys.json')
 class SecureStore:
     """
     Manages the storage of API keys for secure services.
+    The keys file is shared by every SecureStore in the process and is only re-read when it changes on disk.
     TODO: Store keys in a more secure manner ;)
     """
     
@@ -15,37 +16,38 @@ class SecureStore:
         Initializes the SecureStore by loading the API keys file.
         """
         
-        self.api_keys = {}
+        self.store = get_json_store(API_KEYS_FILE)
         self.load_keys()
 
+    @property
+    def api_keys(self):
+        return self.store.read()
+
     def load_keys(self):
         """
         Loads the API keys file. If the file does not exist, initializes it with an empty dictionary.
         """
         
-        if os.path.exists(API_KEYS_FILE):
-            with open(API_KEYS_FILE, 'r') as f:
-                self.api_keys = json.load(f)
-        else:
-            self.api_keys = {}
+        if not self.store.exists():
             self.save_keys()
 
     def save_keys(self):
         """
-        Saves the current API keys to disk, overwriting the existing file.
+        Saves the current API keys to disk.
         """
         
-        os.makedirs(os.path.dirname(API_KEYS_FILE), exist_ok=True)
-        with open(API_KEYS_FILE, 'w') as f:
-            json.dump(self.api_keys, f, indent=4)
+        api_keys = dict(self.api_keys)
+        self.store.update(lambda saved_keys: saved_keys.update(api_keys))
 
     def set_api_key(self, service, key):
         """
         Sets the API key for a given service and saves the keys to disk.
         """
         
-        self.api_keys[service] = key
-        self.save_keys()
+        def set_key(api_keys):
+            api_keys[service] = key
+            
+        self.store.update(set_key)
 
     def get_api_key(self, service):
         """
@@ -1,12 +1,21 @@
 import importlib
 import os
-from typing import Dict, List, Type, Union
+import re
+from typing import Dict, List, Tuple, Type, Union
 from flows.base_flow import BaseFlow
 from models.base_model import BaseModel
 from utils.shell_utils import print_fancy
 
 FLOWS: Dict[str, Type['BaseFlow']] = {}
 
+# Words of every flow prefix, compiled into a trie the first time a task is routed after a flow is registered
+__routing_trie = None
+
+TOKEN_PATTERN = re.compile(r"\S+")
+
+# Punctuation that may follow a prefix word without being part of it, e.g. "carefully, update the system"
+TRAILING_PUNCTUATION = ",:;.!?"
+
 def flow(prefix: Union[str, List[str], None] = None):
     """
     Decorator to register a flow with the system.
@@ -34,6 +43,8 @@ def flow(prefix: Union[str, List[str], None] = None):
                     raise ValueError(f"Flow with prefix {name} already registered")
                 
                 FLOWS[name] = cls
+                
+            __invalidate_routing_trie()
         else:
             raise TypeError("Flow must inherit from BaseFlow")
         
@@ -92,13 +103,73 @@ def get_flow_name(arg_str: str) -> Union[str, None]:
         str: The flow name, or None if not found
     """
     
-    for prefix in FLOWS:
-        if arg_str.startswith(prefix):
-            return prefix
+    return route_flow(arg_str)[0]
+
+def route_flow(arg_str: str) -> Tuple[Union[str, None], str]:
+    """
+    Find the flow a task should be handled by, and the task without the flow's prefix.
+    Prefixes are matched on whole words and case-insensitively, and the longest matching prefix wins, so "helpful
+    script" doesn't go to the "help" flow and "teach me" beats a "teach" flow regardless of which was registered first.
+    Punctuation trailing a word is ignored, so "carefully, update the system" still goes to the "carefully" flow.
+    Routing walks the trie once, so it takes as long as the prefix is, however many flows there are.
+    
+    Args:
+        arg_str (str): The argument string
+    
+    Returns:
+        Tuple[Union[str, None], str]: The flow name ("__default" if no prefix matched, or None if there isn't a default
+                                      flow either) and the rest of the task
+    """
+    
+    node = __get_routing_trie()
+    flow_name = None
+    remainder_start = 0
+    
+    for match in TOKEN_PATTERN.finditer(arg_str):
+        node = node["children"].get(__normalize_token(match.group()))
+        
+        if node is None:
+            break
+            
+        if node["prefix"] is not None:
+            flow_name = node["prefix"]
+            remainder_start = match.end()
+            
+    if flow_name is not None:
+        return flow_name, arg_str[remainder_start:].strip()
         
     if "__default" in FLOWS:
-        return "__default"
+        return "__default", arg_str.strip()
     else:
         print_fancy("WARNING: No default flow found", bold=True, color="yellow")
         
-    return None
\ No newline at end of file
+    return None, arg_str.strip()
+
+def __get_routing_trie():
+    global __routing_trie
+    
+    if __routing_trie is None:
+        trie = {"children": {}, "prefix": None}
+        
+        for prefix in FLOWS:
+            if prefix == "__default":
+                continue
+                
+            node = trie
+            
+            for token in map(__normalize_token, TOKEN_PATTERN.findall(prefix)):
+                node = node["children"].setdefault(token, {"children": {}, "prefix": None})
+                
+            node["prefix"] = prefix
+            
+        __routing_trie = trie
+        
+    return __routing_trie
+
+def __normalize_token(token):
+    return token.lower().rstrip(TRAILING_PUNCTUATION)
+
+def __invalidate_routing_trie():
+    global __routing_trie
+    
+    __routing_trie = None
\ No newline at end of file
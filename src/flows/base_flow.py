@@ -1,7 +1,12 @@
 import json
 from typing import Callable
+from config.config_manager import ConfigManager
 from models.base_model import BaseModel
+from utils.background_jobs import JobTable
+from utils.command_cache import CommandResultCache
+from utils.command_history import CommandHistory
 from utils.shell_utils import get_system_context, print_fancy
+from utils.speculation import Speculation
 
 
 class BaseFlow:
@@ -10,6 +15,9 @@ class BaseFlow:
     
     def __init__(self, model: BaseModel):
         self.model = model
+        self.model.command_cache = CommandResultCache()
+        self.model.command_history = CommandHistory()
+        self.model.job_table = JobTable()
         
     def get_system_prompt(self):
         raise NotImplementedError("This method must be implemented by the derived class")
@@ -38,28 +46,84 @@ class BaseFlow:
         ]
         
         
-        while True:
-            response = self.model.run_inference(
-                messages=messages,
-                tools=self.__tools,
-                require_tool_usage=True
-            )
-            
-            messages.append(response.choices[0].message)
-            
-            is_finished, is_failure, returned_messages = self.model.handle_internal_tools(response, require_mutation_approval=self.model.require_supervision)
-            
-            if is_finished:
-                if is_failure:
-                    print_fancy("Task failed", bold=True, underline=True, color="red")
-                    
-                break
-            
-            messages.extend(returned_messages)
+        # Whether to work out the next turn while the user is still reading an approval prompt
+        speculate = self.__speculate if ConfigManager().get_setting("approvals.speculate", True) else None
+        response = None
+        
+        try:
+            while True:
+                if response is None:
+                    response = self.model.run_inference(
+                        messages=messages,
+                        tools=self.__tools,
+                        require_tool_usage=True
+                    )
+                
+                messages.append(response.choices[0].message)
+                
+                is_finished, is_failure, returned_messages = self.model.handle_internal_tools(
+                    response,
+                    require_mutation_approval=self.model.require_supervision,
+                    speculate=(lambda assumed_messages: speculate(messages, assumed_messages)) if speculate is not None else None
+                )
+                
+                if is_finished:
+                    if is_failure:
+                        print_fancy("Task failed", bold=True, underline=True, color="red")
+                        
+                    break
+                
+                messages.extend(returned_messages)
+                response = self.__take_speculative_response(returned_messages)
+        finally:
+            if self.model.speculation is not None:
+                self.model.speculation.discard()
+                self.model.speculation = None
+                
+
+            # Background jobs don't outlive the flow that started them
+            for job in self.model.job_table.stop_all():
+                print_fancy(f"Stopped background job {job.job_id}: {job.command}", italic=True, color="light_gray")
             
         # End of the process
         print_fancy("Task completed", bold=True, underline=True, color="green")
+        
+        cache_stats = self.model.command_cache.get_stats()
+        if cache_stats["hits"] > 0:
+            print_fancy(f"Command cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['invalidations']} invalidations", italic=True, color="light_gray")
+    
+    def __speculate(self, messages, assumed_messages):
+        """
+        Starts the next inference in the background as if the user's answer produced the assumed tool results.
+        """
+        
+        speculative_messages = messages + assumed_messages
+        
+        return Speculation(
+            lambda: self.model.run_inference(messages=speculative_messages, tools=self.__tools, require_tool_usage=True),
+            assumed_messages
+        )
     
+    def __take_speculative_response(self, returned_messages):
+        """
+        Uses the response worked out while the user was answering, if they answered the way it assumed.
+        
+        Returns:
+            The response, or None if there isn't one that can be used
+        """
+        
+        speculation = self.model.speculation
+        self.model.speculation = None
+        
+        if speculation is None:
+            return None
+        
+        if not speculation.matches(returned_messages):
+            speculation.discard()
+            return None
+        
+        return speculation.get_result()
+        
     def use_tool(self, tool_func: Callable[[BaseModel], None], *args, **kwargs):
         self.__tools.append(tool_func(self.model, *args, **kwargs))
         
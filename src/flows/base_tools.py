@@ -24,17 +24,20 @@ def provide_resolution_tool(model):
         ["resolution"]
     )
     
-def provide_command_tool(model):
+def run_step_tool(model):
     return model.make_tool(
-        "provide_command",
-        "Provides a command to be executed as part of a step, prior to execution, for the user to either ask questions about or approve for execution",
-        {"command": "string", "require_sudo": "boolean"},
-        ["command", "require_sudo"]
+        "run_step",
+        "Carries out a whole step with the user in one go: shows them the explanation, proposes the command, and executes it once they approve. Returns the command's output, or the user's answer if they did not approve. The title should be the step number or name",
+        {"title": "string", "explanation": "string", "command": "string"},
+        ["title", "explanation", "command"]
     )
 
 def execute_command_tool(model: BaseModel, can_mark_dangerous=False):
     model.require_supervision = can_mark_dangerous
-    params = {"command": "string"}
+    params = {
+        "command": "string",
+        "long_running": { "type": "boolean", "description": "Set for builds, installs, test suites and other commands that may take a while. Their output is monitored so they can be stopped early on a clear failure" }
+    }
     reqs = ["command"]
     
     if can_mark_dangerous:
@@ -48,6 +51,65 @@ def execute_command_tool(model: BaseModel, can_mark_dangerous=False):
         reqs
     )
     
+def start_background_command_tool(model: BaseModel, can_mark_dangerous=False):
+    params = {"command": "string"}
+    reqs = ["command"]
+    
+    if can_mark_dangerous:
+        params["dangerous"] = "boolean"
+        reqs.append("dangerous")
+    
+    return model.make_tool(
+        "start_background_command",
+        "Starts a command in the background and returns a job id without waiting for it to finish. Use this for servers, long downloads and long builds so you can continue with independent steps in the meantime",
+        params,
+        reqs
+    )
+    
+def install_packages_tool(model: BaseModel):
+    return model.make_tool(
+        "install_packages",
+        "Installs system packages with the system's package manager in a single transaction. List every package that is needed in one call. The package index is only refreshed when it is stale",
+        {"packages": {"type": "array", "items": {"type": "string"}, "description": "The names of the packages to install"}},
+        ["packages"]
+    )
+    
+def submit_plan_tool(model: BaseModel):
+    step_schema = {
+        "type": "object",
+        "properties": {
+            "id": { "type": "string", "description": "A short unique identifier for the step" },
+            "command": { "type": "string", "description": "The non-interactive command to run" },
+            "depends_on": { "type": "array", "items": { "type": "string" }, "description": "The ids of the steps that must succeed before this one runs" },
+            "expect_exit_code": { "type": "integer", "description": "The exit code that means the step succeeded, 0 if omitted" },
+            "expect_output": { "type": "string", "description": "A regular expression that must match the step's stdout or stderr for it to count as successful" }
+        },
+        "required": ["id", "command"]
+    }
+    
+    return model.make_tool(
+        "submit_plan",
+        "Runs a whole plan of commands at once. Steps whose dependencies have succeeded run in parallel, and the results only come back when the plan finishes or a step fails its expectations, in which case no further steps are started",
+        {"steps": { "type": "array", "items": step_schema, "description": "The steps of the plan" }},
+        ["steps"]
+    )
+    
+def poll_command_tool(model: BaseModel):
+    return model.make_tool(
+        "poll_command",
+        "Checks whether a background command is still running and returns the output it has produced since it was last polled",
+        {"job_id": "integer"},
+        ["job_id"]
+    )
+    
+def stop_command_tool(model: BaseModel):
+    return model.make_tool(
+        "stop_command",
+        "Stops a background command",
+        {"job_id": "integer"},
+        ["job_id"]
+    )
+    
 def end_process_tool(model: BaseModel, include_summary=True, include_details=True):
     params = {"success": "boolean"}
     reqs = ["success"]
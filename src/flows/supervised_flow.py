@@ -1,6 +1,6 @@
 from flows import flow
 from flows.base_flow import BaseFlow
-from flows.base_tools import end_process_tool, execute_command_tool
+from flows.base_tools import end_process_tool, execute_command_tool, install_packages_tool, poll_command_tool, start_background_command_tool, stop_command_tool
 from models.base_model import BaseModel
 
 @flow("carefully")
@@ -11,11 +11,17 @@ class SupervisedFlow(BaseFlow):
         self.enable_ability_tools()
         
         self.use_tool(execute_command_tool, can_mark_dangerous=True)
+        self.use_tool(start_background_command_tool, can_mark_dangerous=True)
+        self.use_tool(install_packages_tool)
+        self.use_tool(poll_command_tool)
+        self.use_tool(stop_command_tool)
         self.use_tool(end_process_tool)
         
     def get_system_prompt(self):
         return """
 You perform a tasks by using the system shell. Commands you execute should be non-interactive and not require user input, and should not be expecting CTRL+C or other signals. do not let any processes run indefinitely.
+Servers, long downloads and long builds should be started with start_background_command so you can continue with independent steps while they run. Use poll_command to check on them and stop_command when they are no longer needed; any that are still running will be stopped when the task ends.
+System packages should be installed with install_packages, listing everything that is needed in a single call, rather than by running the package manager yourself.
 
 Stick to the following process:
 1. Create a high-level plan that will be followed to accomplish the task from the shell
@@ -33,4 +39,5 @@ If you successfully complete the task, you will inform the user that the task wa
 
 Each command you execute will need to be marked as "dangerous", which is classified as any command that could modify the system or data in any way.
 If the user declines any of your commands, you will not execute them and you will either stop the task or follow the user's instructions.
+Some commands are approved or denied automatically by the user's approval policy. If a command is denied by the policy, do not try to run it another way.
 """
\ No newline at end of file
@@ -1,6 +1,6 @@
 from flows import flow
 from flows.base_flow import BaseFlow
-from flows.base_tools import end_process_tool, execute_command_tool
+from flows.base_tools import end_process_tool, execute_command_tool, install_packages_tool, poll_command_tool, start_background_command_tool, stop_command_tool, submit_plan_tool
 from models.base_model import BaseModel
 
 @flow()
@@ -11,21 +11,30 @@ class UnsupervisedFlow(BaseFlow):
         self.enable_ability_tools()
         
         self.use_tool(execute_command_tool)
+        self.use_tool(submit_plan_tool)
+        self.use_tool(start_background_command_tool)
+        self.use_tool(install_packages_tool)
+        self.use_tool(poll_command_tool)
+        self.use_tool(stop_command_tool)
         self.use_tool(end_process_tool)
         
     def get_system_prompt(self):
         return """
 You perform a tasks by using the system shell. Commands you execute should be non-interactive and not require user input, and should not be expecting CTRL+C or other signals. do not let any processes run indefinitely.
+Servers, long downloads and long builds should be started with start_background_command so you can continue with independent steps while they run. Use poll_command to check on them and stop_command when they are no longer needed; any that are still running will be stopped when the task ends.
+System packages should be installed with install_packages, listing everything that is needed in a single call, rather than by running the package manager yourself.
 
 Stick to the following process:
 1. Create a high-level plan that will be followed to accomplish the task from the shell
 1.1 Tools should be used instead of manual command execution where possible
-2. Iterate over each step in the plan
+1.2 If the commands for the steps are known up front, submit them all with submit_plan. Give each step its dependencies and, where the exit code alone doesn't show success, an expect_output pattern. Independent steps run in parallel and you will only hear back when the plan finishes or a step fails
+2. Iterate over each step in the plan that was not run by submit_plan
 2.1 Execute the command for the step
 2.2 Review the stdout & stderr output of the command
 2.2.1 If the output is as expected, continue to the next step
 2.2.2 If the output is not as expected, attempt to resolve the issue before moving on to the next step
-3. Repeat steps 2.1-2.2 until all steps in the plan are completed
+2.3 After resolving a failed step from a submitted plan, the remaining steps may be submitted again as a new plan
+3. Repeat steps 2.1-2.3 until all steps in the plan are completed
 4. End the process
 
 You will give each step a maximum of 5 attempts to complete successfully. If a step fails after 5 attempts, you will cancel the task and inform the user.
@@ -1,9 +1,16 @@
 import sys
 from abilities import get_ability
+from utils.approval_policy import ALLOW, ASK, DENY, evaluate_command, log_decision
 from config.secure_store import SecureStore
 from config.config_manager import ConfigManager
+from utils.command_classifier import is_cacheable_command, is_read_only_command
+from utils.command_history import make_output_diff
+from utils.command_monitor import CommandMonitor
+from utils.plan_executor import PlanExecutor
 from utils.shell_utils import format_markdown_for_terminal, print_fancy, run_command
-from utils.user_input import is_approval, is_denial
+from utils.speculation import CommandSpeculation
+from utils.system_packages import PackageTransaction
+from utils.user_input import is_approval, is_denial, prompt_user
 
 
 class BaseModel:
@@ -14,6 +21,10 @@ class BaseModel:
     ability_prompts = {}
     require_supervision = False
     is_executing_ability = False
+    command_cache = None
+    command_history = None
+    job_table = None
+    speculation = None
     
     def __init__(self):
         """
@@ -164,15 +175,20 @@ class BaseModel:
             
         return tools
 
-    def handle_internal_tools(self, response, require_mutation_approval=False):
+    def handle_internal_tools(self, response, require_mutation_approval=False, speculate=None):
         """
         Handles built-in tools for regular Buddy flows.
+        While the user is asked to approve something, the approved branch is worked out in the background: for a plan
+        the next inference through `speculate`, which is left in `speculation` for the flow to use or discard, and for
+        a read-only command the command itself.
         TODO: Might want to split this out in a later refactor
         
         Args:
             model (BaseModel): The model that the response is from
             response (dict): The response from the model
             require_mutation_approval (bool): Whether to require user approval for any commands that can change the system
+            speculate (Callable): Starts the next inference in the background given the tool results it assumes, or
+                                  None to not speculate
             
         Returns:
             is_finished (bool): Whether the process is finished
@@ -194,9 +210,12 @@ class BaseModel:
         if provide_plan_id is not None:
             format_markdown_for_terminal(provide_plan_args['plan'])
             
+            if speculate is not None:
+                self.speculation = speculate([self.make_tool_result(provide_plan_call, "The plan was approved by the user")])
+            
             print_fancy("Does this plan look right? (y/n)", bold=True, color="blue")
             
-            user_response = input("> ")
+            user_response = prompt_user()
             
             if is_approval(user_response):
                 content = "The plan was approved by the user"
@@ -223,59 +242,73 @@ class BaseModel:
                 
             returned_messages.append(self.make_tool_result(provide_resolution_call, "Success"))
            
-        # Handle provide_command 
-        provide_command_id, provide_command_args, provide_command_call = self.get_tool_call("provide_command", message)
-        if provide_command_id is not None:
-            print_fancy(f"Proposed command: {provide_command_args['command']}", bold=True, bg="yellow", color="black")
-            print_fancy("Do you approve? (y/n)", italic=True, color="blue")
-            
-            user_response = input("> ")
-            
-            if is_approval(user_response):
-                content = "The command was approved by the user"
-            elif is_denial(user_response):
-                content = "The user did not approve the command"
-            else:
-                content = user_response
-                
-            returned_messages.append(self.make_tool_result(provide_command_call, "Success"))
+        # Handle run_step
+        run_step_id, run_step_args, run_step_call = self.get_tool_call("run_step", message)
+        if run_step_id is not None:
+            returned_messages.append(self.make_tool_result(run_step_call, self.__run_step(run_step_args, speculate)))
             
         # Handle execute_command
         execute_command_id, execute_command_args, execute_command_call = self.get_tool_call("execute_command", message)
         if execute_command_id is not None:
-            if require_mutation_approval and "dangerous" in execute_command_args and execute_command_args["dangerous"]:
-                is_approved = False
-                print_fancy(f"Proposed command: {execute_command_args['command']}", bold=True, bg="yellow", color="black")
+            speculative_run = None
+            
+            if require_mutation_approval:
+                decision = evaluate_command(execute_command_args['command'])
                 
-                while True:
-                    print_fancy("OK to execute? (y/n)", italic=True, color="blue")
-                    user_approval_input = input("> ")
+                # Running a read-only command can't do any harm, so it runs while the user decides, unless a rule asks for it
+                if speculate is not None and decision.action in (None, ALLOW) and is_read_only_command(execute_command_args['command']):
+                    speculative_run = CommandSpeculation(execute_command_args['command'])
                     
-                    if is_approval(user_approval_input):
-                        is_approved = True
-                        
-                        break
-                    
-                    elif is_denial(user_approval_input):
-                        print_fancy("Please provide reasoning or provide other instructions", italic=True, color="blue")
-                        
-                        user_feedback = input("> ")
+                is_approved, denial_message = self.__approve_command(execute_command_args['command'], execute_command_args.get("dangerous", False), decision)
+                
+                if not is_approved:
+                    if speculative_run is not None:
+                        speculative_run.discard()
                         
-                        returned_messages.append(self.make_tool_result(execute_command_call, f"Command execution denied by user with reasoning: {user_feedback}"))
-                        break
+                    returned_messages.append(self.make_tool_result(execute_command_call, denial_message))
             else:
                 is_approved = True
             
-            if is_approved or not require_mutation_approval:
-                stdout, stderr = run_command(execute_command_args['command'], display_output=not self.is_executing_ability)
+            if is_approved:
+                command_result = self.execute_shell_command(
+                    execute_command_args['command'],
+                    monitored=execute_command_args.get("long_running", False),
+                    output=speculative_run.get_result() if speculative_run is not None else None
+                )
+                returned_messages.append(self.make_tool_result(execute_command_call, command_result))
                 
-                if len(stdout) > 1000:
-                    stdout = self.summarize(stdout)
+        # Handle start_background_command
+        start_background_id, start_background_args, start_background_call = self.get_tool_call("start_background_command", message)
+        if start_background_id is not None:
+            returned_messages.append(self.make_tool_result(start_background_call, self.__start_background_command(start_background_args, require_mutation_approval)))
+            
+        # Handle install_packages
+        install_packages_id, install_packages_args, install_packages_call = self.get_tool_call("install_packages", message)
+        if install_packages_id is not None:
+            returned_messages.append(self.make_tool_result(install_packages_call, self.__install_packages(install_packages_args['packages'], require_mutation_approval)))
+            
+        # Handle submit_plan
+        submit_plan_id, submit_plan_args, submit_plan_call = self.get_tool_call("submit_plan", message)
+        if submit_plan_id is not None:
+            returned_messages.append(self.make_tool_result(submit_plan_call, self.__execute_plan(submit_plan_args['steps'], require_mutation_approval)))
+            
+        # Handle poll_command
+        poll_command_id, poll_command_args, poll_command_call = self.get_tool_call("poll_command", message)
+        if poll_command_id is not None:
+            returned_messages.append(self.make_tool_result(poll_command_call, self.__poll_background_command(poll_command_args['job_id'])))
+            
+        # Handle stop_command
+        stop_command_id, stop_command_args, stop_command_call = self.get_tool_call("stop_command", message)
+        if stop_command_id is not None:
+            job = self.job_table.stop(stop_command_args['job_id']) if self.job_table is not None else None
+            
+            if job is None:
+                content = f"No background job with id {stop_command_args['job_id']}"
+            else:
+                print_fancy(f"Stopped background job {job.job_id}: {job.command}", italic=True, color="light_gray")
+                content = f"Background job {job.job_id} stopped"
                 
-                if len(stderr) > 1000:
-                    stderr = self.summarize(stderr)
-                    
-                returned_messages.append(self.make_tool_result(execute_command_call, f"Execution complete\n\n### Stdout Summary\n{stdout}\n\n### Stderr Summary\n{stderr}"))
+            returned_messages.append(self.make_tool_result(stop_command_call, content))
                
         # Handle end_process 
         end_process_id, end_process_args, end_process_call = self.get_tool_call("end_process", message)
@@ -331,6 +364,450 @@ class BaseModel:
 
         return is_finished, is_failure, returned_messages
 
+    def __approve_command(self, command, is_dangerous, decision=None):
+        """
+        Decides whether a command may run in a supervised flow. The approval policy is consulted first, and only when
+        it has no rule for the command does the model's own judgement of whether it's dangerous decide if the user is
+        asked. Every decision is logged.
+        
+        Args:
+            command (str): The command to approve
+            is_dangerous (bool): Whether the command was marked as dangerous
+            decision (ApprovalDecision): The policy's decision, if it has already been made
+            
+        Returns:
+            tuple: Whether the command was approved, and the tool result content to send back if it wasn't
+        """
+        
+        if decision is None:
+            decision = evaluate_command(command)
+            
+        if decision.action == DENY:
+            print_fancy(f"Denied by the approval policy: {command}", italic=True, color="red")
+            return False, f"Command execution denied by the approval policy: {decision.reason}"
+        
+        if decision.action == ALLOW:
+            print_fancy(f"Approved by the approval policy ({decision.reason}): {command}", italic=True, color="light_gray")
+            return True, None
+        
+        if decision.action != ASK and not is_dangerous:
+            return True, None
+        
+        is_approved, user_feedback = self.__request_command_approval(command)
+        log_decision(command, ALLOW if is_approved else DENY, "approved by the user" if is_approved else f"denied by the user: {user_feedback}")
+        
+        if not is_approved:
+            return False, f"Command execution denied by user with reasoning: {user_feedback}"
+        
+        return True, None
+    
+    def __request_command_approval(self, command):
+        """
+        Asks the user to approve a command before it is executed.
+        
+        Args:
+            command (str): The command to approve
+            
+        Returns:
+            tuple: Whether the command was approved, and the user's reasoning if it wasn't
+        """
+        
+        print_fancy(f"Proposed command: {command}", bold=True, bg="yellow", color="black")
+        
+        while True:
+            print_fancy("OK to execute? (y/n)", italic=True, color="blue")
+            user_approval_input = prompt_user()
+            
+            if is_approval(user_approval_input):
+                return True, None
+            
+            elif is_denial(user_approval_input):
+                print_fancy("Please provide reasoning or provide other instructions", italic=True, color="blue")
+                
+                return False, prompt_user()
+    
+    def __run_step(self, args, speculate=None):
+        """
+        Explains a step, proposes its command and runs it once the user approves, all for a single tool call.
+        
+        Args:
+            args (dict): The tool call arguments
+            speculate (Callable): Set when speculation is enabled, in which case a read-only command runs while the user
+                                  decides
+            
+        Returns:
+            str: The tool result content
+        """
+        
+        command = args['command']
+        
+        format_markdown_for_terminal(f"### {args['title']}\n{args['explanation']}")
+        
+        speculative_run = None
+        
+        # Only commands the policy would allow run ahead of time, never ones the user asked to deny or be asked about
+        if speculate is not None and evaluate_command(command).action == ALLOW and is_read_only_command(command):
+            speculative_run = CommandSpeculation(command)
+            
+        print_fancy(f"Proposed command: {command}", bold=True, bg="yellow", color="black")
+        print_fancy("Do you approve? (y/n)", italic=True, color="blue")
+        
+        user_response = prompt_user()
+        
+        if not is_approval(user_response) and speculative_run is not None:
+            speculative_run.discard()
+            
+        if is_denial(user_response):
+            return "The user did not approve the command, so it was not executed"
+        
+        if not is_approval(user_response):
+            return f"The command was not executed. The user responded: {user_response}"
+        
+        return self.execute_shell_command(command, output=speculative_run.get_result() if speculative_run is not None else None)
+    
+    def __start_background_command(self, args, require_mutation_approval=False):
+        """
+        Starts a command in the background, asking the user for approval first if required.
+        
+        Args:
+            args (dict): The tool call arguments
+            require_mutation_approval (bool): Whether to require user approval for commands that can change the system
+            
+        Returns:
+            str: The tool result content
+        """
+        
+        command = args['command']
+        
+        if self.job_table is None:
+            return "Background commands are not available"
+        
+        if require_mutation_approval:
+            is_approved, denial_message = self.__approve_command(command, args.get("dangerous", False))
+            
+            if not is_approved:
+                return denial_message
+            
+        if self.command_cache is not None:
+            self.command_cache.invalidate()
+        
+        try:
+            job = self.job_table.start(command)
+        except (RuntimeError, OSError) as e:
+            return f"Failed to start background command: {e}"
+        
+        print_fancy(f"Started background job {job.job_id}: {command}", italic=True, color="light_gray")
+        
+        return f"Started background job {job.job_id}. Use poll_command with this job_id to check its progress and stop_command to stop it"
+    
+    def __install_packages(self, packages, require_mutation_approval=False):
+        """
+        Installs system packages in a single package manager transaction, asking the user for approval first if required.
+        
+        Args:
+            packages (list): The names of the packages to install
+            require_mutation_approval (bool): Whether to require user approval for commands that can change the system
+            
+        Returns:
+            str: The tool result content
+        """
+        
+        transaction = PackageTransaction()
+        transaction.add(*packages)
+        command = transaction.get_command()
+        
+        if command is None:
+            return "No packages were installed: no packages were given or the package manager could not be determined"
+        
+        # Installing always changes the system
+        if require_mutation_approval:
+            is_approved, denial_message = self.__approve_command(command, True)
+            
+            if not is_approved:
+                return denial_message
+            
+        if self.command_cache is not None:
+            self.command_cache.invalidate()
+            
+        is_success, stdout, stderr = transaction.commit(display_output=not self.is_executing_ability)
+        
+        if len(stdout) > 1000:
+            stdout = self.summarize(stdout)
+            
+        if len(stderr) > 1000:
+            stderr = self.summarize(stderr)
+            
+        status = "Installed" if is_success else "Failed to install"
+        
+        return f"{status} {', '.join(packages)}\n\n### Stdout Summary\n{stdout}\n\n### Stderr Summary\n{stderr}"
+    
+    def __execute_plan(self, step_args, require_mutation_approval=False):
+        """
+        Runs a plan of commands submitted in one go, asking the user to approve the whole plan first if required.
+        Only failed steps are described in full, the model already knows what the rest were meant to do.
+        
+        Args:
+            step_args (list): The steps of the plan, as submitted by the model
+            require_mutation_approval (bool): Whether to require user approval for commands that can change the system
+            
+        Returns:
+            str: The tool result content
+        """
+        
+        try:
+            executor = PlanExecutor.from_args(step_args)
+        except ValueError as e:
+            return f"The plan was not run: {e}"
+        
+        if require_mutation_approval:
+            is_approved, denial_message = self.__approve_command("\n".join(step.command for step in executor.steps), True)
+            
+            if not is_approved:
+                return denial_message
+            
+        if self.command_cache is not None and not all(is_read_only_command(step.command) for step in executor.steps):
+            self.command_cache.invalidate()
+            
+        results = executor.execute()
+        failed_results = [result for result in results if result.status == "failed"]
+        heading = "Plan failed" if len(failed_results) > 0 else "Plan complete"
+        
+        status_lines = []
+        
+        for result in results:
+            line = f"- {result.step.step_id}: {result.status}"
+            
+            if result.exit_code is not None:
+                line += f" (exit code {result.exit_code})"
+                
+            status_lines.append(line)
+            
+        sections = [f"{heading}\n\n### Steps\n" + "\n".join(status_lines)]
+        
+        for result in failed_results:
+            stdout = self.summarize(result.stdout) if len(result.stdout) > 1000 else result.stdout
+            stderr = self.summarize(result.stderr) if len(result.stderr) > 1000 else result.stderr
+            
+            sections.append(f"### Step {result.step.step_id} failed: {result.failure_reason}\nCommand: {result.step.command}\n\n#### Stdout Summary\n{stdout}\n\n#### Stderr Summary\n{stderr}")
+            
+        return "\n\n".join(sections)
+    
+    def __poll_background_command(self, job_id):
+        """
+        Reports the status of a background job and the output it has produced since it was last polled.
+        
+        Args:
+            job_id (int): The identifier of the job
+            
+        Returns:
+            str: The tool result content
+        """
+        
+        job = self.job_table.get(job_id) if self.job_table is not None else None
+        
+        if job is None:
+            return f"No background job with id {job_id}"
+        
+        if job.is_running:
+            status = f"Background job {job.job_id} is still running after {int(job.runtime)}s"
+        else:
+            status = f"Background job {job.job_id} exited with code {job.exit_code} after {int(job.runtime)}s"
+            
+        output, dropped = job.read_new_output()
+        
+        if len(output) > 1000:
+            output = self.summarize(output)
+            
+        if dropped > 0:
+            output = f"({dropped} earlier lines were discarded)\n{output}"
+            
+        return f"{status}\n\n### New Output\n{output if len(output) > 0 else 'None'}"
+
+    def execute_shell_command(self, command, monitored=False, output=None):
+        """
+        Runs a shell command on behalf of the model and builds the result to send back to it.
+        Results of idempotent read-only commands are reused from the command cache when available, and any command
+        that could modify the system invalidates the cache. When a command is a re-run of an earlier one, the result is
+        a diff against the earlier output instead of the full output.
+        
+        Args:
+            command (str): The command to run
+            monitored (bool): Whether to watch the output while the command runs, summarizing it incrementally and
+                              stopping the command early if it has clearly failed
+            output (tuple): The stdout and stderr of the command if it has already been run, such as speculatively
+                            while the user was approving it
+            
+        Returns:
+            str: The tool result content describing the command's output
+        """
+        
+        is_cacheable = self.command_cache is not None and is_cacheable_command(command)
+        
+        if is_cacheable:
+            cached = self.command_cache.get(command)
+            
+            if cached is not None:
+                print_fancy(f"Reusing result of '{command}' from {int(cached.age)}s ago", italic=True, color="light_gray")
+                return f"{cached.result}\n\n(Cached result from {int(cached.age)}s ago; nothing has modified the system since)"
+        elif self.command_cache is not None and not is_read_only_command(command):
+            self.command_cache.invalidate()
+        
+        if output is not None:
+            stdout, stderr = output
+            
+            # The output was captured while the user was deciding, so it hasn't been shown yet
+            if not self.is_executing_ability:
+                if len(stdout.strip()) > 0:
+                    print_fancy(stdout.rstrip(), italic=True, color="light_gray")
+                    
+                if len(stderr.strip()) > 0:
+                    print_fancy(stderr.rstrip(), italic=True, color="red")
+        elif monitored:
+            return self.__execute_monitored_command(command)
+        else:
+            stdout, stderr = run_command(command, display_output=not self.is_executing_ability)
+        
+        if self.command_history is not None:
+            previous_run = self.command_history.find_previous(command)
+            run = self.command_history.record(command, stdout, stderr, was_sent_in_full=len(stdout) <= 1000 and len(stderr) <= 1000)
+            heading = f"Execution #{run.run_number} complete"
+            result = self.__make_rerun_result(heading, previous_run, run) if previous_run is not None else None
+        else:
+            heading = "Execution complete"
+            result = None
+        
+        if result is None:
+            if len(stdout) > 1000:
+                stdout = self.summarize(stdout)
+            
+            if len(stderr) > 1000:
+                stderr = self.summarize(stderr)
+                
+            result = f"{heading}\n\n### Stdout Summary\n{stdout}\n\n### Stderr Summary\n{stderr}"
+        
+        if is_cacheable:
+            self.command_cache.put(command, result)
+            
+        return result
+    
+    def __make_rerun_result(self, heading, previous_run, run, max_diff_length=1000):
+        """
+        Describes the output of a re-run command as a diff against an earlier run. A diff is only useful against output
+        the model has actually seen, so earlier runs that were summarized are only compared to say they're identical.
+        
+        Args:
+            heading (str): The heading of the result
+            previous_run (CommandRun): The earlier run of the command
+            run (CommandRun): The new run of the command
+            max_diff_length (int): The longest diff worth sending; longer diffs fall back to the full output
+            
+        Returns:
+            str | None: The result content, or None if the full output should be sent instead
+        """
+        
+        reference = f"execution #{previous_run.run_number} (`{previous_run.command}`)"
+        diff = make_output_diff(previous_run, run)
+        
+        if len(diff) == 0:
+            return f"{heading}\n\nThe output is identical to {reference}"
+        
+        if not previous_run.was_sent_in_full:
+            return None
+        
+        if len(diff) > max_diff_length or len(diff) >= len(run.stdout) + len(run.stderr):
+            return None
+        
+        return f"{heading}\n\nThe output differs from {reference} as follows:\n\n```diff\n{diff}\n```"
+    
+    def __execute_monitored_command(self, command):
+        """
+        Runs a long-running command under a CommandMonitor. The summaries computed while the command ran are reused
+        in the result, so only the output that arrived after the last of them still needs summarizing.
+        
+        Args:
+            command (str): The command to run
+            
+        Returns:
+            str: The tool result content describing the command's output
+        """
+        
+        monitor = CommandMonitor(reviewer=lambda output, summaries: self.review_command_progress(command, output, summaries))
+        stdout, stderr = run_command(command, display_output=not self.is_executing_ability, monitor=monitor)
+        
+        if monitor.abort_reason is not None:
+            print_fancy(f"Stopped the command early: {monitor.abort_reason}", italic=True, color="yellow")
+            status = f"Execution stopped early: {monitor.abort_reason}"
+        else:
+            status = "Execution complete"
+        
+        if len(monitor.summaries) == 0:
+            if len(stdout) > 1000:
+                stdout = self.summarize(stdout)
+            
+            if len(stderr) > 1000:
+                stderr = self.summarize(stderr)
+                
+            return f"{status}\n\n### Stdout Summary\n{stdout}\n\n### Stderr Summary\n{stderr}"
+        
+        progress_str = "\n".join([f"{index + 1}. {summary}" for index, summary in enumerate(monitor.summaries)])
+        remaining_output = monitor.get_unreviewed_output()
+        
+        if len(remaining_output) > 1000:
+            remaining_output = self.summarize(remaining_output)
+        
+        return f"{status}\n\n### Progress Summaries\n{progress_str}\n\n### Final Output Summary\n{remaining_output}"
+    
+    def review_command_progress(self, command, output, previous_summaries):
+        """
+        Has the lowest cost model available summarize new output from a running command and decide whether the
+        command has clearly failed, in which case there is no point waiting for it to finish.
+        
+        Args:
+            command (str): The command that is running
+            output (str): The compressed output produced since the last review
+            previous_summaries (list): The summaries from earlier reviews
+            
+        Returns:
+            tuple: The summary, whether the command should be stopped, and the reason for stopping it
+        """
+        
+        from models.base_model_factory import ModelFactory
+        model = ModelFactory().get_model(lowest_cost=True)
+        
+        previous_str = "\n".join(previous_summaries) if len(previous_summaries) > 0 else "None"
+        messages = [
+            {
+                "role": "system",
+                "content": "You are monitoring the output of a long-running shell command. Summarize the new output in one or two sentences using the report_progress tool. Only set abort to true if the output shows the command has already failed in a way that makes waiting for it to finish pointless"
+            },
+            {
+                "role": "user",
+                "content": f"Command: {command}\n\nEarlier summaries:\n{previous_str}\n\nNew output:\n{output}"
+            }
+        ]
+        tools = [
+            model.make_tool(
+                "report_progress",
+                "Reports a summary of the command's progress and whether it should be stopped",
+                {"summary": "string", "abort": "boolean", "reason": "string"},
+                ["summary", "abort"]
+            )
+        ]
+        
+        response = model.run_inference(
+            messages=messages,
+            tools=tools,
+            temperature=0.0,
+            require_tool_usage=True
+        )
+        
+        call_id, call_args, _ = model.get_tool_call("report_progress", response)
+        
+        if call_id is None:
+            return None, False, None
+        
+        return call_args.get("summary"), call_args.get("abort", False), call_args.get("reason")
+
     def get_unhandled_tool_calls(self, message, returned_messages):
         """
         Locates any tool calls that do not have responses associated with them
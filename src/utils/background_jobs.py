@@ -0,0 +1,216 @@
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+from utils.shell_utils import get_process_group_kwargs, kill_process_group
+
+
+class BackgroundJob:
+    """
+    A shell command running in the background. Its combined stdout and stderr are kept in a bounded ring buffer so
+    that a chatty process can't grow without limit.
+
+    Attributes:
+        job_id (int): The job's identifier within its job table
+        command (str): The command being run
+        process (Popen): The running process
+        started_at (float): When the job was started (monotonic time)
+    """
+
+    def __init__(self, job_id, command, buffer_lines=500):
+        self.job_id = job_id
+        self.command = command
+        self.process = None
+        self.started_at = None
+        self.__output = deque(maxlen=buffer_lines)
+        self.__line_count = 0
+        self.__read_position = 0
+        self.__lock = threading.Lock()
+        self.__reader = None
+
+    def start(self):
+        """
+        Starts the command in its own process group so that it, and anything it spawns, can be stopped together.
+        """
+
+        self.process = subprocess.Popen(
+            self.command,
+            shell=True,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            **get_process_group_kwargs()
+        )
+        self.started_at = time.monotonic()
+
+        self.__reader = threading.Thread(target=self.__read_output, daemon=True)
+        self.__reader.start()
+
+    @property
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None
+
+    @property
+    def exit_code(self):
+        return None if self.process is None else self.process.poll()
+
+    @property
+    def runtime(self):
+        """
+        How long the job has been running, in seconds.
+        """
+
+        return 0 if self.started_at is None else time.monotonic() - self.started_at
+
+    def read_new_output(self):
+        """
+        Returns the output produced since the last time this was called.
+
+        Returns:
+            tuple: The new output, and how many lines were dropped from the ring buffer before they could be read
+        """
+
+        with self.__lock:
+            first_buffered = self.__line_count - len(self.__output)
+            dropped = max(0, first_buffered - self.__read_position)
+            start = max(self.__read_position, first_buffered) - first_buffered
+            lines = list(self.__output)[start:]
+            self.__read_position = self.__line_count
+
+        return "".join(lines), dropped
+
+    def stop(self, timeout=5):
+        """
+        Stops the job, escalating from a polite termination to a kill if it doesn't exit in time. The whole process
+        group is stopped even if the shell itself has exited, since what it started in the background may still be
+        running.
+
+        Args:
+            timeout (float): How many seconds to wait for the job to exit after asking it to
+        """
+
+        if self.process is None:
+            return
+
+        kill_process_group(self.process)
+        deadline = time.monotonic() + timeout
+
+        while self.__is_group_running() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        if self.__is_group_running():
+            kill_process_group(self.process, force=True)
+
+        self.process.wait()
+
+    def __is_group_running(self):
+        if self.process.poll() is None:
+            return True
+
+        if os.name == "nt":
+            return False
+
+        # Signal 0 only checks whether anything in the group is left to signal
+        try:
+            os.killpg(self.process.pid, 0)
+        except OSError:
+            return False
+
+        return True
+
+    def __read_output(self):
+        for line in iter(self.process.stdout.readline, ''):
+            with self.__lock:
+                self.__output.append(line)
+                self.__line_count += 1
+
+        self.process.stdout.close()
+
+
+class JobTable:
+    """
+    Tracks the background jobs started during a flow.
+
+    Attributes:
+        max_jobs (int): The maximum number of jobs that can run at once
+        buffer_lines (int): How many lines of output to keep for each job
+    """
+
+    def __init__(self, max_jobs=8, buffer_lines=500):
+        self.max_jobs = max_jobs
+        self.buffer_lines = buffer_lines
+        self.__jobs = {}
+        self.__next_id = 1
+
+    def start(self, command):
+        """
+        Starts a command in the background.
+
+        Args:
+            command (str): The command to run
+
+        Returns:
+            BackgroundJob: The started job
+
+        Raises:
+            RuntimeError: If too many jobs are already running
+        """
+
+        running_count = len([job for job in self.__jobs.values() if job.is_running])
+
+        if running_count >= self.max_jobs:
+            raise RuntimeError(f"There are already {running_count} background jobs running. Stop one before starting another")
+
+        job = BackgroundJob(self.__next_id, command, buffer_lines=self.buffer_lines)
+        job.start()
+
+        self.__jobs[job.job_id] = job
+        self.__next_id += 1
+
+        return job
+
+    def get(self, job_id):
+        """
+        Args:
+            job_id (int): The identifier of the job
+
+        Returns:
+            BackgroundJob | None: The job, or None if there is no job with that identifier
+        """
+
+        return self.__jobs.get(job_id)
+
+    def stop(self, job_id):
+        """
+        Stops a job.
+
+        Args:
+            job_id (int): The identifier of the job
+
+        Returns:
+            BackgroundJob | None: The stopped job, or None if there is no job with that identifier
+        """
+
+        job = self.__jobs.get(job_id)
+
+        if job is not None:
+            job.stop()
+
+        return job
+
+    def stop_all(self):
+        """
+        Stops every job, including what finished jobs left running in the background.
+
+        Returns:
+            list: The jobs whose commands were still running
+        """
+
+        stopped_jobs = [job for job in self.__jobs.values() if job.is_running]
+
+        for job in self.__jobs.values():
+            job.stop()
+
+        return stopped_jobs
@@ -0,0 +1,126 @@
+import shlex
+import time
+from collections import OrderedDict
+
+
+class CachedCommandResult:
+    """
+    A previously computed result for a command.
+
+    Attributes:
+        command (str): The command that produced the result
+        result (str): The tool result that was returned to the model
+        created_at (float): When the result was stored (monotonic time)
+    """
+
+    def __init__(self, command, result):
+        self.command = command
+        self.result = result
+        self.created_at = time.monotonic()
+
+    @property
+    def age(self):
+        """
+        How long ago the result was computed, in seconds.
+        """
+
+        return time.monotonic() - self.created_at
+
+
+class CommandResultCache:
+    """
+    Caches the results of idempotent, read-only commands for the lifetime of a flow.
+    Any command that could change the system should invalidate the cache.
+
+    Attributes:
+        ttl_seconds (int): How long a result stays valid
+        max_entries (int): The maximum number of results to keep before evicting the oldest
+        hits (int): The number of lookups that returned a cached result
+        misses (int): The number of lookups that did not
+        invalidations (int): The number of times the cache was cleared
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=128):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.__entries = OrderedDict()
+
+    def get(self, command):
+        """
+        Looks up a cached result for a command.
+
+        Args:
+            command (str): The command to look up
+
+        Returns:
+            CachedCommandResult | None: The cached result, or None if there isn't a valid one
+        """
+
+        key = self.__make_key(command)
+        entry = self.__entries.get(key)
+
+        if entry is not None and entry.age > self.ttl_seconds:
+            del self.__entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.__entries.move_to_end(key)
+
+        return entry
+
+    def put(self, command, result):
+        """
+        Stores the result of a command.
+
+        Args:
+            command (str): The command that was run
+            result (str): The tool result that was returned to the model
+        """
+
+        key = self.__make_key(command)
+
+        self.__entries[key] = CachedCommandResult(command, result)
+        self.__entries.move_to_end(key)
+
+        while len(self.__entries) > self.max_entries:
+            self.__entries.popitem(last=False)
+
+    def invalidate(self):
+        """
+        Drops every cached result, e.g. after a command that may have changed the system.
+        """
+
+        if len(self.__entries) > 0:
+            self.invalidations += 1
+
+        self.__entries.clear()
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: The hit, miss and invalidation counters along with the number of cached results
+        """
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "entries": len(self.__entries)
+        }
+
+    def __make_key(self, command):
+        """
+        Normalizes a command so that differences in whitespace or quoting style don't cause misses.
+        """
+
+        try:
+            return shlex.join(shlex.split(command))
+        except ValueError:
+            return command.strip()
@@ -0,0 +1,278 @@
+from utils.shell_parser import parse_command
+
+# Commands that never modify the system, regardless of the arguments they are given (aside from output redirection)
+READ_ONLY_COMMANDS = {
+    "arch", "basename", "cat", "cksum", "column", "cut", "df", "diff", "dirname", "du", "echo", "egrep", "fgrep",
+    "file", "free", "getconf", "getent", "grep", "groups", "head", "id", "jq", "last",
+    "locale", "ls", "lsb_release", "lsblk", "lscpu", "lsmod", "lsof", "lspci", "lsusb", "md5sum", "nproc", "printenv",
+    "printf", "ps", "pwd", "readlink", "realpath", "sha1sum", "sha256sum", "stat", "sw_vers", "tail", "test",
+    "tr", "true", "type", "uname", "uptime", "w", "wc", "whereis", "which", "who", "whoami", "[",
+}
+
+# Commands that are read-only unless given one of these arguments (flags also match by prefix, e.g. `-i.bak`)
+READ_ONLY_UNLESS_FLAGS = {
+    "command": ["-p"],
+    "date": ["-s", "--set"],
+    "find": ["-delete", "-exec", "-execdir", "-ok", "-okdir", "-fprint", "-fprintf", "-fls"],
+    "sed": ["-i", "--in-place"],
+    "sort": ["-o", "--output"],
+    "hostname": ["-F", "--file", "-b", "--boot"],
+    "ip": ["add", "del", "delete", "set", "flush", "change", "replace", "append"],
+    "netstat": [],
+    "ss": ["-K", "--kill"],
+    "tree": ["-o"],
+    "rg": ["--pre"],
+    "uniq": [],
+}
+
+# Commands that are read-only only when used with one of these subcommands
+READ_ONLY_SUBCOMMANDS = {
+    "apt": ["list", "show", "search", "policy", "depends", "rdepends"],
+    "apt-cache": ["show", "search", "policy", "depends", "rdepends", "showpkg", "madison"],
+    "brew": ["list", "info", "search", "config", "doctor", "outdated", "deps"],
+    "docker": ["ps", "images", "info", "inspect", "logs", "version", "stats"],
+    "dpkg": ["-l", "--list", "-s", "--status", "-L", "--listfiles", "-S", "--search", "--print-architecture"],
+    "hostnamectl": [None, "status"],
+    "git": ["status", "log", "diff", "show", "rev-parse", "ls-files", "describe", "blame", "shortlog"],
+    "kubectl": ["get", "describe", "logs", "version", "explain", "top", "api-resources"],
+    "npm": ["ls", "list", "view", "outdated", "root", "bin"],
+    "pip": ["list", "show", "freeze", "check"],
+    "pip3": ["list", "show", "freeze", "check"],
+    "rpm": ["-q", "-qa", "-qi", "-ql", "-qf"],
+    "systemctl": [None, "status", "is-active", "is-enabled", "is-failed", "list-units", "list-unit-files", "show", "cat"],
+    "yum": ["list", "info", "search", "repolist"],
+    "dnf": ["list", "info", "search", "repolist"],
+}
+
+# Read-only commands whose output changes from moment to moment, so their results should never be reused
+VOLATILE_COMMANDS = {"date", "free", "last", "lsof", "netstat", "ps", "ss", "uptime", "w", "who"}
+VOLATILE_SUBCOMMANDS = {
+    "docker": ["ps", "logs", "stats"],
+    "kubectl": ["get", "describe", "logs", "top"],
+    "systemctl": [None, "status", "is-active", "is-failed", "list-units"],
+}
+
+# Flags of subcommand-style commands that can write files or run other programs
+FORBIDDEN_SUBCOMMAND_FLAGS = {
+    "git": ["-c", "--config-env", "--output", "--ext-diff"],
+}
+
+# Arguments that only ever print information about a program, for the programs known to treat them that way.
+# The subcommand forms (e.g. `git help`) only apply to commands with subcommands, elsewhere they'd be an operand
+INFORMATIONAL_ARGUMENTS = {"--version", "-V", "--help", "-h"}
+INFORMATIONAL_SUBCOMMANDS = {"version", "help"}
+INFORMATIONAL_COMMANDS = {
+    "cargo", "clang", "cmake", "gcc", "go", "java", "make", "node", "perl", "php", "python", "python3", "ruby",
+    "rustc", "terraform"
+}
+
+# Global options that take a value, which must be skipped when looking for a subcommand
+OPTIONS_WITH_VALUES = {"-C", "-c", "-H", "--host", "-n", "--namespace", "--context"}
+
+# Wrappers that run another command without changing what it does
+TRANSPARENT_WRAPPERS = {"sudo", "env", "nice", "time", "timeout", "nohup", "stdbuf"}
+
+# Options of the wrappers that take a value as a separate argument
+WRAPPER_OPTIONS_WITH_VALUES = {
+    "sudo": {"-u", "-g", "-C", "-D", "-h", "-p", "-r", "-t", "-U"},
+    "env": {"-u", "-C", "-S"},
+    "nice": {"-n"},
+    "timeout": {"-s", "-k"},
+    "stdbuf": {"-i", "-o", "-e"}
+}
+
+
+def is_read_only_command(command):
+    """
+    Determines if a shell command line only reads information and can not modify the system.
+    Every simple command within the command line (pipeline stages, list members and substitutions) must be read-only.
+
+    Args:
+        command (str): The shell command line to classify
+
+    Returns:
+        bool: True if the command is known to be read-only, False if it may modify the system
+    """
+
+    parsed = parse_command(command)
+
+    if not parsed.is_valid or parsed.has_heredoc or parsed.runs_in_background or len(parsed.commands) == 0:
+        return False
+
+    for simple_command in parsed.walk():
+        if simple_command.writes_output():
+            return False
+
+        argv = unwrap_command(simple_command.argv)
+
+        if not __is_read_only_argv(argv):
+            return False
+
+    return True
+
+
+def is_cacheable_command(command):
+    """
+    Determines if the result of a shell command line can be reused while nothing on the system changes.
+    These are read-only commands whose output doesn't vary from one moment to the next.
+
+    Args:
+        command (str): The shell command line to classify
+
+    Returns:
+        bool: True if the command's result can be reused
+    """
+
+    if not is_read_only_command(command):
+        return False
+
+    for simple_command in parse_command(command).walk():
+        argv = unwrap_command(simple_command.argv)
+
+        if len(argv) == 0:
+            continue
+
+        name = argv[0].split("/")[-1]
+
+        if name in VOLATILE_COMMANDS:
+            return False
+
+        if name in VOLATILE_SUBCOMMANDS and __get_subcommand(argv) in VOLATILE_SUBCOMMANDS[name]:
+            return False
+
+        # Following a file never produces the same output twice
+        if name == "tail" and any(arg in ["-f", "-F", "--follow"] for arg in argv[1:]):
+            return False
+
+    return True
+
+
+def unwrap_command(argv):
+    """
+    Strips transparent wrappers such as `sudo` or `timeout` (along with their options) from a command's arguments.
+
+    Args:
+        argv (list): The command name followed by its arguments
+
+    Returns:
+        list: The arguments of the wrapped command
+    """
+
+    argv = list(argv)
+
+    while len(argv) > 0 and argv[0].split("/")[-1] in TRANSPARENT_WRAPPERS:
+        wrapper = argv.pop(0).split("/")[-1]
+
+        # Drop the wrapper's own options, along with the values for the ones that take them
+        while len(argv) > 0 and argv[0].startswith("-"):
+            option = argv.pop(0)
+
+            if option in WRAPPER_OPTIONS_WITH_VALUES.get(wrapper, set()) and len(argv) > 0:
+                argv.pop(0)
+
+        # env sets variables before the command
+        while wrapper == "env" and len(argv) > 0 and "=" in argv[0] and not argv[0].startswith("="):
+            argv.pop(0)
+
+        # timeout takes a duration before the command
+        if wrapper == "timeout" and len(argv) > 0:
+            argv.pop(0)
+
+    return argv
+
+
+def __is_read_only_argv(argv):
+    """
+    Checks a single (unwrapped) command against the read-only allowlists.
+    """
+
+    if len(argv) == 0:
+        return True
+
+    name = argv[0].split("/")[-1]
+    args = argv[1:]
+
+    # A relative path runs a local script, whatever it happens to be called
+    if "/" in argv[0] and not argv[0].startswith("/"):
+        return False
+
+    if name in INFORMATIONAL_COMMANDS | set(READ_ONLY_UNLESS_FLAGS) | set(READ_ONLY_SUBCOMMANDS) and len(args) > 0:
+        informational_arguments = INFORMATIONAL_ARGUMENTS | (INFORMATIONAL_SUBCOMMANDS if name in READ_ONLY_SUBCOMMANDS else set())
+
+        if all(arg in informational_arguments for arg in args):
+            return True
+
+    if name in READ_ONLY_COMMANDS:
+        return True
+
+    if name in READ_ONLY_UNLESS_FLAGS:
+        forbidden_flags = READ_ONLY_UNLESS_FLAGS[name]
+
+        # hostname with a positional argument sets the hostname
+        if name == "hostname" and any(not arg.startswith("-") for arg in args):
+            return False
+
+        # `command` only looks things up when asked to, otherwise it runs its argument
+        if name == "command" and not any(arg in ["-v", "-V"] for arg in args):
+            return False
+
+        # uniq writes to its second operand
+        if name == "uniq" and len(__get_operands(args, ["-f", "-s", "-w", "--skip-fields", "--skip-chars", "--check-chars"])) > 1:
+            return False
+
+        return not any(
+            arg == flag or (flag.startswith("-") and arg.startswith(flag))
+            for arg in args
+            for flag in forbidden_flags
+        )
+
+    if name in READ_ONLY_SUBCOMMANDS:
+        forbidden_flags = FORBIDDEN_SUBCOMMAND_FLAGS.get(name, [])
+
+        if any(arg == flag or arg.startswith(f"{flag}=") or (flag.startswith("--") and arg.startswith(flag)) for arg in args for flag in forbidden_flags):
+            return False
+
+        return __get_subcommand(argv) in READ_ONLY_SUBCOMMANDS[name]
+
+    return False
+
+
+def __get_operands(args, options_with_values):
+    """
+    Finds the arguments that aren't options, skipping the values of the options that take them.
+    """
+
+    operands = []
+    skip_next = False
+
+    for arg in args:
+        if skip_next:
+            skip_next = False
+        elif arg.startswith("-") and arg != "-":
+            skip_next = arg in options_with_values
+        else:
+            operands.append(arg)
+
+    return operands
+
+
+def __get_subcommand(argv):
+    """
+    Finds the subcommand of a command, skipping global options (e.g. `git --no-pager log` -> `log`).
+    Commands like dpkg and rpm use their first flag as the subcommand.
+    """
+
+    name = argv[0].split("/")[-1]
+    skip_next = False
+
+    for arg in argv[1:]:
+        if skip_next:
+            skip_next = False
+            continue
+
+        if name in ["dpkg", "rpm"] or not arg.startswith("-"):
+            return arg
+
+        skip_next = arg in OPTIONS_WITH_VALUES
+
+    return None
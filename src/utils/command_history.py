@@ -0,0 +1,127 @@
+import difflib
+import shlex
+
+# Outputs longer than this are truncated before being kept for comparison
+MAX_STORED_OUTPUT = 200_000
+
+
+class CommandRun:
+    """
+    A record of a command that was executed during a flow.
+
+    Attributes:
+        run_number (int): The position of the run within the flow, starting at 1
+        command (str): The command that was run
+        stdout (str): The captured stdout
+        stderr (str): The captured stderr
+        was_sent_in_full (bool): Whether the model was given the output itself rather than a summary of it
+    """
+
+    def __init__(self, run_number, command, stdout, stderr, was_sent_in_full=True):
+        self.run_number = run_number
+        self.command = command
+        self.stdout = stdout[:MAX_STORED_OUTPUT]
+        self.stderr = stderr[:MAX_STORED_OUTPUT]
+        self.was_sent_in_full = was_sent_in_full
+
+
+class CommandHistory:
+    """
+    Keeps the output of the commands executed during a flow so that re-runs of the same command can be reported as a
+    diff against the earlier run rather than in full. Commands are only compared after normalizing their quoting and
+    whitespace, since commands that differ in any argument (e.g. `ls /var/log/app` and `ls /var/log/apt`) are
+    looking at different things.
+
+    Attributes:
+        max_entries (int): How many runs to keep
+    """
+
+    def __init__(self, max_entries=50):
+        self.max_entries = max_entries
+        self.__runs = []
+        self.__run_count = 0
+
+    def find_previous(self, command):
+        """
+        Finds the most recent earlier run of a command.
+
+        Args:
+            command (str): The command about to be recorded
+
+        Returns:
+            CommandRun | None: The earlier run, or None if the command hasn't been run before
+        """
+
+        normalized = self.__normalize_command(command)
+
+        for run in reversed(self.__runs):
+            if self.__normalize_command(run.command) == normalized:
+                return run
+
+        return None
+
+    def record(self, command, stdout, stderr, was_sent_in_full=True):
+        """
+        Records the output of a command.
+
+        Args:
+            command (str): The command that was run
+            stdout (str): The captured stdout
+            stderr (str): The captured stderr
+            was_sent_in_full (bool): Whether the model was given the output itself rather than a summary of it
+
+        Returns:
+            CommandRun: The recorded run
+        """
+
+        self.__run_count += 1
+        run = CommandRun(self.__run_count, command, stdout, stderr, was_sent_in_full)
+
+        self.__runs.append(run)
+
+        if len(self.__runs) > self.max_entries:
+            self.__runs.pop(0)
+
+        return run
+
+    @staticmethod
+    def __normalize_command(command):
+        try:
+            return shlex.join(shlex.split(command))
+        except ValueError:
+            return " ".join(command.split())
+
+
+def make_output_diff(previous, current, context_lines=2):
+    """
+    Builds a compact unified diff of the output of two runs.
+
+    Args:
+        previous (CommandRun): The earlier run
+        current (CommandRun): The new run
+        context_lines (int): How many unchanged lines to show around each change
+
+    Returns:
+        str: The diff, or an empty string if the output is identical
+    """
+
+    sections = []
+
+    for stream_name, previous_output, current_output in [
+        ("stdout", previous.stdout, current.stdout),
+        ("stderr", previous.stderr, current.stderr)
+    ]:
+        diff_lines = list(difflib.unified_diff(
+            previous_output.splitlines(),
+            current_output.splitlines(),
+            fromfile=f"{stream_name} (execution #{previous.run_number})",
+            tofile=f"{stream_name} (execution #{current.run_number})",
+            n=context_lines,
+            lineterm=""
+        ))
+
+        if len(diff_lines) > 0:
+            sections.append("\n".join(diff_lines))
+
+    return "\n".join(sections)
+
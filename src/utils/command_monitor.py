@@ -0,0 +1,192 @@
+import re
+import threading
+from utils.shell_utils import kill_process_group
+
+# Output that means a command has already failed, so there's no point waiting for it to finish
+FAILURE_RULES = [
+    (r"^E: Unable to locate package (\S+)", "The package could not be found"),
+    (r"^E: Package '.+' has no installation candidate", "The package has no installation candidate"),
+    (r"^E: Could not get lock", "The package manager is locked by another process"),
+    (r"^No package .+ available\.", "The package could not be found"),
+    (r"^Error: Unable to find a match", "The package could not be found"),
+    (r"^error: target not found", "The package could not be found"),
+    (r"ERROR: No matching distribution found for", "The Python package could not be found"),
+    (r"^npm ERR! (code E404|404)", "The npm package could not be found"),
+    (r"make(\[\d+\])?: \*\*\* .*Error \d+", "The build failed"),
+    (r"^\S+:\d+:\d+: (fatal )?error:", "Compilation failed"),
+    (r"^FAILED \S+::\S+", "A test failed"),
+    (r"^--- FAIL: ", "A test failed"),
+    (r"No space left on device", "The disk is full"),
+    (r"Could not resolve host", "The network is unreachable"),
+]
+
+
+class CommandMonitor:
+    """
+    Watches the output of a long-running command while it runs so it can be stopped early on a clear failure.
+    Each line is checked against a set of local failure rules as it arrives, and new output is periodically compressed
+    and passed to a reviewer (typically a cheap model) which summarizes it and may also decide to stop the command.
+
+    Attributes:
+        reviewer (Callable | None): Called with (compressed_output, previous_summaries) and returns a tuple of
+                                    (summary, should_abort, reason)
+        interval (float): How many seconds to wait between reviews
+        min_review_chars (int): How much new output is needed before a review is worthwhile
+        summaries (list): The summaries produced by the reviewer so far, in order
+        abort_reason (str | None): Why the command was stopped early, if it was
+    """
+
+    def __init__(self, reviewer=None, rules=None, interval=15, min_review_chars=500):
+        self.reviewer = reviewer
+        self.interval = interval
+        self.min_review_chars = min_review_chars
+        self.summaries = []
+        self.abort_reason = None
+        self.__rules = [(re.compile(pattern, re.MULTILINE), reason) for pattern, reason in (rules or FAILURE_RULES)]
+        self.__lines = []
+        self.__reviewed_count = 0
+        self.__process = None
+        self.__lock = threading.Lock()
+        self.__stop_event = threading.Event()
+        self.__thread = None
+
+    def attach(self, process):
+        """
+        Attaches the process being monitored so it can be terminated, and starts the review thread.
+
+        Args:
+            process (Popen): The running process, started in its own process group
+        """
+
+        self.__process = process
+
+        if self.reviewer is not None:
+            self.__thread = threading.Thread(target=self.__review_loop, daemon=True)
+            self.__thread.start()
+
+    def feed(self, line):
+        """
+        Records a line of output and checks it against the failure rules.
+
+        Args:
+            line (str): The line of output
+        """
+
+        with self.__lock:
+            self.__lines.append(line)
+
+        if self.abort_reason is not None:
+            return
+
+        for pattern, reason in self.__rules:
+            if pattern.search(line):
+                self.abort(f"{reason} ({line.strip()})")
+                break
+
+    def abort(self, reason):
+        """
+        Stops the monitored command.
+
+        Args:
+            reason (str): Why the command is being stopped
+        """
+
+        if self.abort_reason is not None:
+            return
+
+        self.abort_reason = reason
+
+        # The shell may have spawned processes that keep running, and keep the pipes open, after it's gone
+        if self.__process is not None:
+            kill_process_group(self.__process)
+
+    def stop(self):
+        """
+        Stops the review thread once the command has finished.
+        """
+
+        self.__stop_event.set()
+
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def get_unreviewed_output(self):
+        """
+        Returns:
+            str: The output that arrived after the last review, which none of the summaries cover
+        """
+
+        with self.__lock:
+            return "".join(self.__lines[self.__reviewed_count:])
+
+    def __review_loop(self):
+        while not self.__stop_event.wait(self.interval):
+            if self.abort_reason is not None:
+                return
+
+            with self.__lock:
+                new_output = "".join(self.__lines[self.__reviewed_count:])
+                line_count = len(self.__lines)
+
+            if len(new_output) < self.min_review_chars:
+                continue
+
+            try:
+                summary, should_abort, reason = self.reviewer(compress_output(new_output), list(self.summaries))
+            except Exception:
+                # A failed review shouldn't take the command down with it
+                continue
+
+            self.__reviewed_count = line_count
+
+            if summary:
+                self.summaries.append(summary)
+
+            if should_abort:
+                self.abort(reason or "The reviewer decided the command has failed")
+
+
+def compress_output(output, max_chars=4000):
+    """
+    Shrinks command output before it's shown to a model by collapsing runs of repeated or near-repeated lines
+    (progress bars, download counters) and keeping the start and end when it's still too long.
+
+    Args:
+        output (str): The output to compress
+        max_chars (int): The maximum length of the compressed output
+
+    Returns:
+        str: The compressed output
+    """
+
+    compressed = []
+    previous_shape = None
+    repeats = 0
+
+    for line in output.splitlines():
+        # Lines that only differ in their numbers are treated as repeats of each other
+        shape = re.sub(r"\d+", "#", line.strip())
+
+        if shape == previous_shape:
+            repeats += 1
+            compressed[-1] = line
+            continue
+
+        if repeats > 0:
+            compressed.insert(len(compressed) - 1, f"[... {repeats} similar lines ...]")
+
+        previous_shape = shape
+        repeats = 0
+        compressed.append(line)
+
+    if repeats > 0:
+        compressed.insert(len(compressed) - 1, f"[... {repeats} similar lines ...]")
+
+    result = "\n".join(compressed)
+
+    if len(result) > max_chars:
+        half = max_chars // 2
+        result = f"{result[:half]}\n[... {len(result) - max_chars} characters omitted ...]\n{result[-half:]}"
+
+    return result
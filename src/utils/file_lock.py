@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    An advisory lock on a file, shared between processes, for use in a `with` block.
+    The lock file is created if it doesn't exist and is left in place afterwards.
+
+    Attributes:
+        path (str): The path of the lock file
+        shared (bool): Whether to take a shared (read) lock instead of an exclusive one
+    """
+
+    def __init__(self, path, shared=False):
+        self.path = path
+        self.shared = shared
+        self.__file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.__file = open(self.path, "a+")
+
+        if fcntl is not None:
+            fcntl.flock(self.__file.fileno(), fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX)
+        else:
+            # msvcrt has no shared locks and only retries for 10 seconds, so keep trying until it's ours
+            self.__file.seek(0)
+
+            while True:
+                try:
+                    msvcrt.locking(self.__file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if fcntl is not None:
+            fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.__file.seek(0)
+            msvcrt.locking(self.__file.fileno(), msvcrt.LK_UNLCK, 1)
+
+        self.__file.close()
+        self.__file = None
+
+
+def write_atomically(path, data):
+    """
+    Writes a file so that readers only ever see the old or the new contents, never a partial write.
+    The data is written to a temporary file in the same directory which is then renamed over the destination.
+
+    Args:
+        path (str): The path of the file to write
+        data (str | bytes): The contents of the file
+    """
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(file_descriptor, "wb" if isinstance(data, bytes) else "w", encoding=None if isinstance(data, bytes) else "utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+        raise
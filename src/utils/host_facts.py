@@ -0,0 +1,132 @@
+import getpass
+import os
+import platform
+import socket
+import threading
+import time
+import requests
+from config.config_manager import ConfigManager
+from config.json_store import get_json_store
+
+HOST_FACTS_FILE = os.path.expanduser("~/.buddy_cli/cache/host_facts.json")
+
+UNAVAILABLE = "Unavailable"
+
+
+def probe_operating_system(timeout):
+    return f"{platform.system()} {platform.version()}"
+
+
+def probe_os_details(timeout):
+    return str(platform.uname())
+
+
+def probe_local_ip(timeout):
+    """
+    Finds the address of the interface used for outbound traffic. Connecting a UDP socket sends no packets and needs
+    no DNS, unlike resolving the hostname, which can stall on misconfigured hosts.
+    """
+
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as udp_socket:
+        try:
+            udp_socket.connect(("192.0.2.1", 80))
+            return udp_socket.getsockname()[0]
+        except OSError:
+            # No route at all, the host is offline
+            return "127.0.0.1"
+
+
+def probe_external_ip(timeout):
+    return requests.get("https://api.ipify.org", timeout=timeout).text.strip()
+
+
+def probe_username(timeout):
+    return getpass.getuser()
+
+
+# Facts that don't change while Buddy runs, in the order they're shown to the model. Every probe is given the
+# timeout so that those doing I/O can respect it
+PROBES = {
+    "operating_system": ("Operating System", probe_operating_system),
+    "os_details": ("OS Details", probe_os_details),
+    "local_ip": ("Local Network IP", probe_local_ip),
+    "external_ip": ("External IP", probe_external_ip),
+    "username": ("Username", probe_username)
+}
+
+
+def collect_host_facts():
+    """
+    Collects facts about the host, reusing the cached facts while they're fresh.
+    Stale or missing facts are probed concurrently, each with a strict timeout, and a probe that times out or fails is
+    reported as unavailable rather than holding up the flow. Failed probes aren't cached, so they're tried again next
+    time.
+    The "host_facts.ttl", "host_facts.probe_timeout" and "host_facts.skip_probes" settings tune the cache lifetime,
+    the per-probe timeout in seconds, and which probes (by name in PROBES) are never run.
+
+    Returns:
+        dict: The facts, keyed by their label
+    """
+
+    config = ConfigManager()
+    ttl = config.get_setting("host_facts.ttl", 3600)
+    probe_timeout = config.get_setting("host_facts.probe_timeout", 2)
+    skipped_probes = set(config.get_setting("host_facts.skip_probes", []))
+
+    store = get_json_store(HOST_FACTS_FILE)
+    cached = store.read()
+
+    # Cached facts belong to this host and user, a shared home directory could otherwise mix them up
+    is_fresh = (
+        cached.get("hostname") == socket.gethostname()
+        and cached.get("username") == getpass.getuser()
+        and time.time() - cached.get("collected_at", 0) < ttl
+    )
+    facts = dict(cached.get("facts", {})) if is_fresh else {}
+
+    missing_probes = [name for name in PROBES if name not in skipped_probes and name not in facts]
+
+    if len(missing_probes) > 0:
+        facts.update(__run_probes(missing_probes, probe_timeout))
+
+        def save_facts(data):
+            data["hostname"] = socket.gethostname()
+            data["username"] = getpass.getuser()
+            data["collected_at"] = time.time() if not is_fresh else cached.get("collected_at", time.time())
+            data["facts"] = {name: value for name, value in facts.items() if value != UNAVAILABLE}
+
+        store.update(save_facts)
+
+    return {PROBES[name][0]: facts[name] for name in PROBES if name not in skipped_probes}
+
+
+def __run_probes(names, timeout):
+    """
+    Runs probes in parallel, giving up on any that take longer than the timeout.
+    Each probe gets a daemon thread, so one stuck in a blocking call (e.g. DNS) is left behind without holding up exit.
+    """
+
+    results = {}
+    results_lock = threading.Lock()
+
+    def run_probe(name):
+        try:
+            value = PROBES[name][1](timeout)
+        except Exception:
+            return
+
+        with results_lock:
+            results[name] = value
+
+    threads = [threading.Thread(target=run_probe, args=(name,), name=f"host_facts_{name}", daemon=True) for name in names]
+
+    for thread in threads:
+        thread.start()
+
+    deadline = time.monotonic() + timeout
+
+    for thread in threads:
+        thread.join(max(0, deadline - time.monotonic()))
+
+    with results_lock:
+        return {name: results.get(name, UNAVAILABLE) for name in names}
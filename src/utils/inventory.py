@@ -0,0 +1,178 @@
+import os
+import platform
+import threading
+
+# Files that identify the distribution, and with it the package manager
+RELEASE_FILES = [
+    "/etc/os-release",
+    "/etc/debian_version",
+    "/etc/redhat-release",
+    "/etc/arch-release",
+    "/etc/alpine-release",
+    "/etc/SuSE-release"
+]
+
+# Tools worth telling the model about up front, so it doesn't have to go looking for them
+KNOWN_TOOLS = [
+    "git", "curl", "wget", "ssh", "rsync", "tar", "unzip", "jq", "make", "gcc", "cmake", "python3", "pip3", "node",
+    "npm", "go", "cargo", "java", "docker", "podman", "kubectl", "systemctl", "vim", "nano", "google-chrome"
+]
+
+__cache = {"fingerprint": None, "executables": {}, "package_manager": None}
+__cache_lock = threading.Lock()
+
+
+def find_executable(command):
+    """
+    Finds the path of a command the way the shell would, without spawning `which` or `where`.
+
+    Args:
+        command (str): The command to find
+
+    Returns:
+        str | None: The path of the executable, or None if it isn't installed
+    """
+
+    if os.path.dirname(command):
+        return command if __is_executable(command) else None
+
+    executables = __get_inventory()["executables"]
+
+    for path in executables.get(command.lower() if platform.system() == "Windows" else command, []):
+        if __is_executable(path):
+            return path
+
+    return None
+
+
+def detect_package_manager():
+    """
+    Works out which package manager the system uses.
+
+    Returns:
+        str | None: The package manager's command (e.g. "apt"), or None if it's unknown
+    """
+
+    return __get_inventory()["package_manager"]
+
+
+def get_inventory_summary():
+    """
+    Describes the package manager and which well known tools are installed, compactly enough to give to the model.
+
+    Returns:
+        str: The summary
+    """
+
+    available_tools = [tool for tool in KNOWN_TOOLS if find_executable(tool) is not None]
+    missing_tools = [tool for tool in KNOWN_TOOLS if tool not in available_tools]
+
+    return (
+        f"package manager: {detect_package_manager() or 'unknown'}; "
+        f"installed: {', '.join(available_tools) or 'none'}; "
+        f"not installed: {', '.join(missing_tools) or 'none'}"
+    )
+
+
+def get_fingerprint():
+    """
+    Identifies the current state of the PATH and the release files. Installing or removing a program changes the
+    modification time of its directory, so a changed fingerprint means the inventory has to be rebuilt.
+
+    Returns:
+        tuple: The fingerprint
+    """
+
+    fingerprint = [os.environ.get("PATH", ""), os.environ.get("PATHEXT", "")]
+
+    for path in __get_path_directories() + RELEASE_FILES:
+        try:
+            fingerprint.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            fingerprint.append(None)
+
+    return tuple(fingerprint)
+
+
+def __get_inventory():
+    fingerprint = get_fingerprint()
+
+    with __cache_lock:
+        if __cache["fingerprint"] != fingerprint:
+            __cache["executables"] = __scan_path()
+            __cache["package_manager"] = __detect_package_manager(__cache["executables"])
+            __cache["fingerprint"] = fingerprint
+
+        return __cache
+
+
+def __get_path_directories():
+    return [directory for directory in os.environ.get("PATH", "").split(os.pathsep) if directory]
+
+
+def __scan_path():
+    """
+    Lists every file in the PATH directories once, by command name, in PATH order.
+    Whether a file is actually executable is only checked when it's looked up.
+    """
+
+    is_windows = platform.system() == "Windows"
+    extensions = [extension.lower() for extension in os.environ.get("PATHEXT", ".COM;.EXE;.BAT;.CMD").split(";")]
+    executables = {}
+
+    for directory in __get_path_directories():
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+
+        for entry in entries:
+            name = entry.name
+
+            # On Windows commands are run without their extension and names aren't case sensitive
+            if is_windows:
+                name = name.lower()
+                stem, extension = os.path.splitext(name)
+
+                if extension in extensions:
+                    executables.setdefault(stem, []).append(entry.path)
+
+            executables.setdefault(name, []).append(entry.path)
+
+    return executables
+
+
+def __detect_package_manager(executables):
+    os_type = platform.system()
+
+    def has_command(command):
+        return command in executables
+
+    if os_type == "Linux":
+        if os.path.exists("/etc/debian_version"):
+            return "apt"
+        elif os.path.exists("/etc/redhat-release"):
+            return "yum"
+        elif has_command("pacman"):
+            return "pacman"
+        elif has_command("dnf"):
+            return "dnf"
+        elif has_command("zypper"):
+            return "zypper"
+        elif has_command("apk"):
+            return "apk"
+    elif os_type == "Darwin":
+        if has_command("brew"):
+            return "brew"
+    elif os_type == "Windows":
+        if has_command("choco"):
+            return "choco"
+
+    return None
+
+
+def __is_executable(path):
+    if platform.system() == "Windows":
+        return os.path.isfile(path)
+
+    return os.path.isfile(path) and os.access(path, os.X_OK)
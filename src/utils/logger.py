@@ -0,0 +1,31 @@
+import logging
+import os
+
+LOG_DIRECTORY = os.path.expanduser("~/.buddy_cli/logs")
+
+
+def get_logger(name):
+    """
+    Gets a logger that writes to its own file in the log directory, e.g. "approvals" logs to approvals.log.
+    Nothing is printed to the terminal, and the file isn't created until something is logged.
+
+    Args:
+        name (str): The name of the logger and its file
+
+    Returns:
+        Logger: The logger
+    """
+
+    logger = logging.getLogger(f"buddy.{name}")
+
+    if len(logger.handlers) == 0:
+        os.makedirs(LOG_DIRECTORY, exist_ok=True)
+
+        handler = logging.FileHandler(os.path.join(LOG_DIRECTORY, f"{name}.log"), delay=True)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    return logger
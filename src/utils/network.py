@@ -1,19 +1,323 @@
+import glob
+import hashlib
+import os
+import shutil
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from config.config_manager import ConfigManager
+from utils.output_renderer import OutputRenderer
+from utils.shell_utils import console, print_fancy
 
+CHUNK_SIZE = 256 * 1024
 
-def download_file(url, dest):
+# Smaller files finish faster over one connection than it takes to set up several
+SEGMENTED_DOWNLOAD_THRESHOLD = 32 * 1024 * 1024
+
+# How many times an interrupted transfer is resumed before giving up
+MAX_RETRIES = 3
+
+
+class DownloadProgress:
+    """
+    Tracks how much of a download has been written across all of its part files and shows it as a status line.
+    
+    Attributes:
+        name (str): The name of the file being downloaded
+        total_bytes (int | None): The size of the file, if the server reported it
+        renderer (OutputRenderer | None): The renderer to show the progress with, if it's being displayed
     """
-    Download a file from a URL to a destination on disk.
+    
+    def __init__(self, name, total_bytes=None, renderer=None):
+        self.name = name
+        self.total_bytes = total_bytes
+        self.renderer = renderer
+        self.started_at = time.monotonic()
+        self.__written = {}
+        self.__lock = threading.Lock()
+        
+    def update(self, path, written_bytes):
+        """
+        Records how many bytes a part file holds and refreshes the status line.
+        
+        Args:
+            path (str): The part file
+            written_bytes (int): How many bytes it holds
+        """
+        
+        with self.__lock:
+            self.__written[path] = written_bytes
+            status = self.get_status()
+            
+        if self.renderer is not None:
+            self.renderer.set_status(status)
+            
+    def get_written_bytes(self):
+        return sum(self.__written.values())
+        
+    def get_status(self):
+        """
+        Returns:
+            str: The progress, such as "Downloading chrome.deb: 12.5/104.2 MB (12%) at 8.1 MB/s"
+        """
+        
+        written = self.get_written_bytes()
+        elapsed = max(time.monotonic() - self.started_at, 0.001)
+        rate = f"{written / elapsed / 1024 / 1024:.1f} MB/s"
+        
+        if self.total_bytes:
+            percentage = min(written * 100 // self.total_bytes, 100)
+            return f"Downloading {self.name}: {_format_megabytes(written)}/{_format_megabytes(self.total_bytes)} MB ({percentage}%) at {rate}"
+            
+        return f"Downloading {self.name}: {_format_megabytes(written)} MB at {rate}"
+
+
+def download_file(url, dest, sha256=None, timeout=30, segments=None, display_progress=True):
+    """
+    Downloads a file without holding it in memory. The file is streamed to a ".part" file next to the destination
+    and only renamed into place once it's complete (and matches the checksum, if one is given), so an interrupted
+    download never leaves a truncated file behind. Interrupted transfers are resumed with Range requests, both within
+    a call and from a ".part" file left behind by an earlier one, when the server supports them. The file's ETag or
+    Last-Modified date is saved next to the part file and sent as If-Range, so a part file is only ever extended with
+    the same version of the file; a changed file, or one the server gives no validator for, is downloaded from scratch.
+    Large files are fetched in parallel segments over several connections, set by the "downloads.segments" setting.
     
     Args:
-        url (str): The URL to download the file from
-        dest (str): The destination path on disk to save the file to
+        url (str): The URL of the file
+        dest (str): Where to save the file
+        sha256 (str): The expected SHA-256 hex digest of the file, checked before it's renamed into place
+        timeout (float): How many seconds to wait for the server to connect or send data
+        segments (int): How many connections to download large files with, instead of the setting
+        display_progress (bool): Whether to show the download's progress in the terminal
+        
+    Returns:
+        str: The destination path
     """
     
-    response = requests.get(url)
-    response.raise_for_status()
+    if segments is None:
+        segments = ConfigManager().get_setting("downloads.segments", 4)
+        
+    part_path = f"{dest}.part"
+    validator_path = f"{part_path}.validator"
+    renderer = OutputRenderer(console) if display_progress else None
+    
+    with requests.Session() as session:
+        total_bytes, supports_ranges, validator = __probe(session, url, timeout)
+        __discard_stale_parts(part_path, validator_path, validator)
+        progress = DownloadProgress(os.path.basename(dest), total_bytes, renderer)
+        
+        if renderer is not None:
+            renderer.start()
+            
+        try:
+            is_segmented = (
+                supports_ranges
+                and total_bytes is not None
+                and total_bytes >= SEGMENTED_DOWNLOAD_THRESHOLD
+                and segments > 1
+            )
+            
+            # The server ignoring range requests part way through falls back to a single stream
+            if not is_segmented or not __download_segments(session, url, part_path, total_bytes, segments, validator, timeout, progress):
+                __download_stream(session, url, part_path, total_bytes, supports_ranges, validator, timeout, progress)
+        finally:
+            if renderer is not None:
+                renderer.stop()
+                
+    if sha256 is not None:
+        digest = __hash_file(part_path)
+        
+        if digest.lower() != sha256.lower():
+            # A corrupt file can't be resumed, so the next attempt has to start from scratch
+            os.remove(part_path)
+            __remove_if_exists(validator_path)
+            raise ValueError(f"Checksum mismatch for {url}: expected {sha256}, got {digest}")
+            
+    os.replace(part_path, dest)
+    __remove_if_exists(validator_path)
     
-    with open(dest, 'wb') as f:
-        f.write(response.content)
+    if display_progress:
+        elapsed = time.monotonic() - progress.started_at
+        print_fancy(f"Downloaded {os.path.basename(dest)} ({_format_megabytes(progress.get_written_bytes())} MB) in {elapsed:.1f}s", italic=True, color="light_gray")
         
     return dest
+
+
+def __probe(session, url, timeout):
+    """
+    Asks the server for the file's size, whether it accepts range requests and what identifies this version of it
+    (a strong ETag or the Last-Modified date, usable with If-Range), without downloading it.
+    Servers that don't answer HEAD requests are treated as reporting none of these.
+    """
+    
+    try:
+        response = session.head(url, allow_redirects=True, timeout=timeout, headers={"Accept-Encoding": "identity"})
+    except requests.RequestException:
+        return None, False, None
+        
+    if response.status_code >= 400:
+        return None, False, None
+        
+    content_length = response.headers.get("Content-Length")
+    total_bytes = int(content_length) if content_length is not None and content_length.isdigit() else None
+    supports_ranges = response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    
+    # Weak ETags can't be used with If-Range
+    etag = response.headers.get("ETag")
+    validator = etag if etag is not None and not etag.startswith("W/") else response.headers.get("Last-Modified")
+    
+    return total_bytes, supports_ranges, validator
+
+
+def __discard_stale_parts(part_path, validator_path, validator):
+    """
+    Removes the part file and segment files left behind by an earlier call unless they were downloaded from the same
+    version of the file, then saves the validator of the version about to be downloaded.
+    """
+    
+    saved_validator = None
+    
+    if os.path.exists(validator_path):
+        with open(validator_path, "r", encoding="utf-8") as f:
+            saved_validator = f.read()
+            
+    if validator is None or saved_validator != validator:
+        for path in [part_path] + glob.glob(f"{glob.escape(part_path)}.*-of-*"):
+            __remove_if_exists(path)
+            
+    if validator is None:
+        __remove_if_exists(validator_path)
+    else:
+        with open(validator_path, "w", encoding="utf-8") as f:
+            f.write(validator)
+
+
+def __download_stream(session, url, part_path, total_bytes, supports_ranges, validator, timeout, progress):
+    """
+    Downloads the whole file over one connection, picking up from an existing part file if the server allows it.
+    """
+    
+    if not supports_ranges and os.path.exists(part_path):
+        os.remove(part_path)
+        
+    # Left behind complete by an earlier call that failed before the rename
+    if total_bytes is not None and os.path.exists(part_path) and os.path.getsize(part_path) == total_bytes:
+        progress.update(part_path, total_bytes)
+        return
+        
+    __fetch_to_file(session, url, part_path, 0, None, supports_ranges, validator, timeout, progress)
+
+
+def __download_segments(session, url, part_path, total_bytes, segments, validator, timeout, progress):
+    """
+    Downloads the file as byte ranges in parallel, each to its own file so that it can be resumed on its own, then
+    joins them into the part file.
+    
+    Returns:
+        bool: False if the server ignored the range requests or the file changed, in which case nothing was joined
+    """
+    
+    segment_size = -(-total_bytes // segments)
+    ranges = [(start, min(start + segment_size, total_bytes) - 1) for start in range(0, total_bytes, segment_size)]
+    segment_paths = [f"{part_path}.{index}-of-{len(ranges)}" for index in range(len(ranges))]
+    
+    with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="download") as executor:
+        results = list(executor.map(
+            lambda index: __fetch_to_file(session, url, segment_paths[index], ranges[index][0], ranges[index][1], True, validator, timeout, progress),
+            range(len(ranges))
+        ))
+        
+    if not all(results):
+        for segment_path in segment_paths:
+            if os.path.exists(segment_path):
+                os.remove(segment_path)
+                
+        return False
+        
+    with open(part_path, "wb") as part_file:
+        for segment_path in segment_paths:
+            with open(segment_path, "rb") as segment_file:
+                shutil.copyfileobj(segment_file, part_file, CHUNK_SIZE)
+                
+    for segment_path in segment_paths:
+        os.remove(segment_path)
+        
+    return True
+
+
+def __fetch_to_file(session, url, path, start, end, can_resume, validator, timeout, progress):
+    """
+    Streams the file, or the byte range from start to end, into a file in chunks. Dropped connections are retried,
+    resuming from what the file already holds when the server accepts range requests. Ranges are only resumed from
+    the version of the file identified by the validator, the server sends the whole file instead if it changed.
+    
+    Returns:
+        bool: False if a byte range was asked for and the server sent the whole file instead
+    """
+    
+    for attempt in range(MAX_RETRIES + 1):
+        written = os.path.getsize(path) if can_resume and validator is not None and os.path.exists(path) else 0
+        
+        if end is not None and start + written > end:
+            progress.update(path, written)
+            return True
+            
+        headers = {"Accept-Encoding": "identity"}
+        
+        if written > 0 or end is not None:
+            headers["Range"] = f"bytes={start + written}-{'' if end is None else end}"
+            
+            if validator is not None:
+                headers["If-Range"] = validator
+                
+        try:
+            with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416:
+                    # The file changed on the server since the part file was written, or there was nothing to resume
+                    __remove_if_exists(path)
+                    continue
+                    
+                response.raise_for_status()
+                
+                if "Range" in headers and response.status_code != 206:
+                    if end is not None:
+                        return False
+                        
+                    # The file changed since the part file was started, or the server can't resume, so it's sending the
+                    # whole file again
+                    written = 0
+                    
+                with open(path, "ab" if written > 0 else "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        written += len(chunk)
+                        progress.update(path, written)
+                        
+            return True
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            if attempt == MAX_RETRIES:
+                raise
+                
+            time.sleep(attempt + 1)
+            
+    raise requests.HTTPError(f"Could not resume the download of {url}")
+
+
+def __remove_if_exists(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def __hash_file(path):
+    sha256 = hashlib.sha256()
+    
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            
+    return sha256.hexdigest()
+
+
+def _format_megabytes(byte_count):
+    return f"{byte_count / 1024 / 1024:.1f}"
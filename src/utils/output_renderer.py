@@ -0,0 +1,238 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from rich.console import Group
+from rich.live import Live
+from rich.text import Text
+
+
+class OutputRenderer:
+    """
+    Renders live command output to the terminal in batches at a fixed frame rate.
+    Lines are queued by the threads reading the command's pipes and drawn by a separate render thread, so a command
+    that prints faster than the terminal can draw is never slowed down by it. When output arrives too quickly to
+    follow, the renderer collapses it into a scrolling tail of the most recent lines.
+    The collapsed tail and the status line are drawn in a live area that redraws itself, which would draw over a prompt
+    on the terminal. So the live area only exists while it's needed: once collapsed output goes quiet (e.g. because the
+    command is waiting for a password) it's left on screen as it is, and every renderer is paused while Buddy itself
+    asks the user for input (see `paused`).
+
+    Attributes:
+        console (Console): The rich console to render to
+        frame_rate (int): How many times per second the output is redrawn
+        tail_size (int): How many lines to show while output is collapsed
+        burst_threshold (int): How many lines in a single frame cause the output to be collapsed
+        idle_timeout (float): How many seconds collapsed output has to be quiet before it's left on screen
+    """
+
+    # The renderers that have been started and not yet stopped
+    __active = set()
+    __active_lock = threading.Lock()
+
+    def __init__(self, console, frame_rate=12, tail_size=12, burst_threshold=100, idle_timeout=0.5):
+        self.console = console
+        self.frame_rate = frame_rate
+        self.tail_size = tail_size
+        self.burst_threshold = burst_threshold
+        self.idle_timeout = idle_timeout
+        self.__pending = deque()
+        self.__tail = deque(maxlen=tail_size)
+        self.__collapsed_count = 0
+        self.__last_output_at = 0
+        self.__status = None
+        self.__stop_event = threading.Event()
+        self.__thread = None
+        self.__live = None
+        self.__is_paused = False
+        self.__render_lock = threading.Lock()
+
+    @classmethod
+    @contextmanager
+    def paused(cls):
+        """
+        Pauses every active renderer while the user is prompted for input, so nothing is drawn over the prompt.
+        Output that arrives in the meantime is drawn once the renderers resume.
+        """
+
+        with cls.__active_lock:
+            renderers = list(cls.__active)
+
+        for renderer in renderers:
+            renderer.pause()
+
+        try:
+            yield
+        finally:
+            for renderer in renderers:
+                renderer.resume()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """
+        Starts the render thread.
+        """
+
+        if self.__thread is not None:
+            return
+
+        with OutputRenderer.__active_lock:
+            OutputRenderer.__active.add(self)
+
+        self.__thread = threading.Thread(target=self.__render_loop, daemon=True)
+        self.__thread.start()
+
+    def write(self, line, style=None):
+        """
+        Queues a line of output to be rendered. This never blocks on the terminal.
+
+        Args:
+            line (str): The line to render, without a trailing newline
+            style (str): The rich style to render the line with
+        """
+
+        self.__pending.append((line, style))
+
+    def set_status(self, status):
+        """
+        Sets a status line that is shown beneath the output, such as download progress.
+
+        Args:
+            status (str | None): The status to show, or None to clear it
+        """
+
+        self.__status = status
+
+    def pause(self):
+        """
+        Draws the output so far and takes the live area off the screen until `resume` is called.
+        """
+
+        with self.__render_lock:
+            self.__render_frame()
+            self.__close_live_area()
+            self.__is_paused = True
+
+    def resume(self):
+        """
+        Carries on rendering after `pause`.
+        """
+
+        with self.__render_lock:
+            self.__is_paused = False
+
+    def stop(self):
+        """
+        Renders any remaining output and stops the render thread.
+        """
+
+        if self.__thread is None:
+            return
+
+        self.__stop_event.set()
+        self.__thread.join()
+        self.__thread = None
+
+        with OutputRenderer.__active_lock:
+            OutputRenderer.__active.discard(self)
+
+        with self.__render_lock:
+            self.__status = None
+            self.__render_frame()
+            self.__close_live_area()
+
+    def __render_loop(self):
+        interval = 1 / self.frame_rate
+
+        while not self.__stop_event.wait(interval):
+            with self.__render_lock:
+                if not self.__is_paused:
+                    self.__render_frame()
+
+    def __render_frame(self):
+        """
+        Draws everything that has been queued since the last frame.
+        """
+
+        batch = []
+
+        while len(self.__pending) > 0:
+            batch.append(self.__pending.popleft())
+
+        if len(batch) > 0:
+            self.__last_output_at = time.monotonic()
+
+        # Once output has been collapsed it stays collapsed, otherwise lines would be printed out of order
+        if self.__collapsed_count > 0 or len(batch) > self.burst_threshold:
+            for line in batch:
+                if len(self.__tail) == self.__tail.maxlen:
+                    self.__collapsed_count += 1
+
+                self.__tail.append(line)
+        elif len(batch) > 0:
+            text = Text()
+
+            for line, style in batch:
+                text.append(f"{line}\n", style=style)
+
+            text.rstrip()
+            self.console.print(text)
+
+        # The command may be waiting for the user, so quiet output is left alone rather than redrawn
+        if self.__collapsed_count > 0 and time.monotonic() - self.__last_output_at >= self.idle_timeout:
+            self.__close_live_area()
+
+        if self.__collapsed_count == 0 and self.__status is None:
+            self.__close_live_area()
+            return
+
+        if self.__live is None:
+            self.__live = Live(Text(""), console=self.console, auto_refresh=False, transient=False)
+            self.__live.start()
+
+        self.__live.update(self.__make_renderable(), refresh=True)
+
+    def __close_live_area(self):
+        """
+        Leaves the collapsed tail (if any) on screen as ordinary output and removes the rest of the live area.
+        Output after this is printed normally again, until it next has to be collapsed.
+        """
+
+        if self.__live is None:
+            return
+
+        self.__live.update(self.__make_renderable(include_status=False), refresh=True)
+        self.__live.transient = self.__collapsed_count == 0
+        self.__live.stop()
+        self.__live = None
+
+        # Rich doesn't terminate the final render when the console isn't interactive
+        if self.__collapsed_count > 0 and not self.console.is_terminal:
+            self.console.line()
+
+        self.__collapsed_count = 0
+        self.__tail.clear()
+
+    def __make_renderable(self, include_status=True):
+        """
+        Builds the live area of the display: the collapsed tail (if any) and the status line.
+        """
+
+        parts = []
+
+        if self.__collapsed_count > 0:
+            parts.append(Text(f"... {self.__collapsed_count} lines collapsed ...", style="bold light_gray"))
+
+        for line, style in self.__tail if self.__collapsed_count > 0 else []:
+            parts.append(Text(line, style=style))
+
+        if self.__status is not None and include_status:
+            parts.append(Text(self.__status, style="italic cyan"))
+
+        return Group(*parts)
@@ -0,0 +1,247 @@
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from utils.shell_utils import kill_process_group, print_fancy, run_command
+
+
+class PlanStep:
+    """
+    A command in a plan, with the steps that have to succeed before it runs and the checks its result has to pass.
+
+    Attributes:
+        step_id (str): The step's identifier within the plan
+        command (str): The command to run
+        depends_on (list): The identifiers of the steps that have to succeed first
+        expect_exit_code (int): The exit code the command has to finish with
+        expect_output (str): A regular expression that has to match somewhere in the command's stdout or stderr
+    """
+
+    def __init__(self, step_id, command, depends_on=None, expect_exit_code=0, expect_output=None):
+        self.step_id = step_id
+        self.command = command
+        self.depends_on = depends_on or []
+        self.expect_exit_code = expect_exit_code
+        self.expect_output = expect_output
+        self.pattern = re.compile(expect_output, re.MULTILINE) if expect_output else None
+
+    def check(self, stdout, stderr, exit_code):
+        """
+        Checks a result of the command against the step's expectations.
+
+        Returns:
+            str | None: Why the result isn't what was expected, or None if it is
+        """
+
+        if exit_code is None:
+            return "the command could not be started"
+
+        if self.expect_exit_code is not None and exit_code != self.expect_exit_code:
+            return f"exited with code {exit_code}, expected {self.expect_exit_code}"
+
+        if self.pattern is not None and self.pattern.search(stdout) is None and self.pattern.search(stderr) is None:
+            return f"output did not match /{self.expect_output}/"
+
+        return None
+
+
+class StepResult:
+    """
+    What happened to a step when the plan was executed.
+
+    Attributes:
+        step (PlanStep): The step
+        status (str): "succeeded", "failed", "skipped" (a step it depends on failed) or "not run" (the plan stopped first)
+        stdout (str): The command's stdout, if it ran
+        stderr (str): The command's stderr, if it ran
+        exit_code (int | None): The command's exit code, if it ran
+        failure_reason (str | None): Why the step failed, if it did
+    """
+
+    def __init__(self, step, status, stdout="", stderr="", exit_code=None, failure_reason=None):
+        self.step = step
+        self.status = status
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+        self.failure_reason = failure_reason
+
+
+class PlanExecutor:
+    """
+    Runs a plan of commands as a dependency graph. Every step whose dependencies have succeeded is started straight
+    away, so independent steps run in parallel. As soon as a step fails its checks no further steps are started;
+    those already running are left to finish, and everything else is reported as not run so the plan can be repaired.
+    Steps can't read from the terminal and each runs in its own process group, which is stopped if the plan is
+    interrupted.
+
+    Attributes:
+        steps (list): The steps of the plan, in the order they were given
+        max_workers (int): The most steps to run at once
+    """
+
+    def __init__(self, steps, max_workers=4):
+        self.steps = steps
+        self.max_workers = max_workers
+        self.__processes = {}
+
+    @staticmethod
+    def from_args(step_args):
+        """
+        Builds an executor from the steps the model submitted, checking that they form a valid graph.
+
+        Args:
+            step_args (list): The steps, as dictionaries with "id", "command" and optionally "depends_on",
+                              "expect_exit_code" and "expect_output"
+
+        Returns:
+            PlanExecutor: The executor
+
+        Raises:
+            ValueError: If a step is malformed, an identifier is repeated, a dependency is unknown or the steps depend
+                        on each other in a cycle
+        """
+
+        steps = []
+
+        for args in step_args:
+            if "id" not in args or "command" not in args:
+                raise ValueError("Every step needs an id and a command")
+
+            try:
+                steps.append(PlanStep(
+                    str(args["id"]),
+                    args["command"],
+                    [str(dependency) for dependency in args.get("depends_on", [])],
+                    args.get("expect_exit_code", 0),
+                    args.get("expect_output")
+                ))
+            except re.error as e:
+                raise ValueError(f"Step {args['id']} has an invalid expect_output pattern: {e}")
+
+        step_ids = [step.step_id for step in steps]
+
+        if len(step_ids) != len(set(step_ids)):
+            raise ValueError("Step ids must be unique")
+
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in step_ids:
+                    raise ValueError(f"Step {step.step_id} depends on unknown step {dependency}")
+
+        executor = PlanExecutor(steps)
+        cycle = executor.__find_cycle()
+
+        if cycle is not None:
+            raise ValueError(f"Steps {' -> '.join(cycle)} depend on each other in a cycle")
+
+        return executor
+
+    def execute(self):
+        """
+        Runs the plan until it either finishes or a step fails its checks.
+
+        Returns:
+            list: A StepResult for every step, in the order the steps were given
+        """
+
+        results = {}
+        pending = list(self.steps)
+        running = {}
+        has_failed = False
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="plan") as pool:
+            while True:
+                # Skip anything downstream of a failure, and start everything whose dependencies have succeeded.
+                # Skipping a step can make its own dependents skippable, so this repeats until nothing more is skipped
+                has_skipped = True
+
+                while has_skipped:
+                    has_skipped = False
+
+                    for step in list(pending):
+                        dependency_statuses = [results[dependency].status for dependency in step.depends_on if dependency in results]
+
+                        if any(status in ("failed", "skipped") for status in dependency_statuses):
+                            results[step.step_id] = StepResult(step, "skipped")
+                            pending.remove(step)
+                            has_skipped = True
+                        elif not has_failed and len(dependency_statuses) == len(step.depends_on) and all(status == "succeeded" for status in dependency_statuses):
+                            print_fancy(f"[{step.step_id}] {step.command}", italic=True, color="light_gray")
+                            running[pool.submit(self.__run_step, step)] = step
+                            pending.remove(step)
+
+                if len(running) == 0:
+                    break
+
+                try:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                except KeyboardInterrupt:
+                    # Otherwise the pool would wait for the running steps to finish on their own
+                    for process in list(self.__processes.values()):
+                        kill_process_group(process, force=True)
+
+                    raise
+
+                for future in done:
+                    step = running.pop(future)
+                    result = future.result()
+                    results[step.step_id] = result
+
+                    if result.status == "failed":
+                        has_failed = True
+                        print_fancy(f"[{step.step_id}] failed: {result.failure_reason}", italic=True, color="red")
+
+        for step in pending:
+            results[step.step_id] = StepResult(step, "not run")
+
+        return [results[step.step_id] for step in self.steps]
+
+    def __run_step(self, step):
+        # Steps run side by side, so their output is collected rather than drawn over each other
+        stdout, stderr, exit_code = run_command(
+            step.command,
+            display_output=False,
+            return_exit_code=True,
+            interactive=False,
+            on_start=lambda process: self.__processes.update({step.step_id: process})
+        )
+        self.__processes.pop(step.step_id, None)
+
+        failure_reason = step.check(stdout, stderr, exit_code)
+
+        return StepResult(step, "failed" if failure_reason is not None else "succeeded", stdout, stderr, exit_code, failure_reason)
+
+    def __find_cycle(self):
+        """
+        Looks for steps that depend on each other in a cycle, with a depth first search.
+
+        Returns:
+            list | None: The identifiers of the steps in the cycle, or None if there isn't one
+        """
+
+        dependencies = {step.step_id: step.depends_on for step in self.steps}
+        states = {}
+
+        def visit(step_id, path):
+            states[step_id] = "visiting"
+
+            for dependency in dependencies[step_id]:
+                if states.get(dependency) == "visiting":
+                    return path[path.index(dependency):] + [dependency]
+
+                if dependency not in states:
+                    cycle = visit(dependency, path + [dependency])
+
+                    if cycle is not None:
+                        return cycle
+
+            states[step_id] = "visited"
+            return None
+
+        for step_id in dependencies:
+            if step_id not in states:
+                cycle = visit(step_id, [step_id])
+
+                if cycle is not None:
+                    return cycle
+
+        return None
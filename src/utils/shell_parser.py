@@ -0,0 +1,304 @@
+import os
+import re
+import shlex
+
+PUNCTUATION_CHARS = "();<>|&\n"
+CONTROL_OPERATORS = {"|", "|&", "||", "&&", ";", "&", ";;"}
+REDIRECTION_OPERATORS = {">", ">>", ">|", "<", "<<", "<<<", "<>", ">&", ">>&", "<&", "&>", "&>>"}
+OUTPUT_REDIRECTION_OPERATORS = {">", ">>", ">|", "<>", ">&", ">>&", "&>", "&>>"}
+FD_DUPLICATION_OPERATORS = {">&", ">>&"}
+SUBSTITUTION_PLACEHOLDER = "__BUDDY_SUBSTITUTION_{}__"
+
+# A file descriptor number is only part of a redirection when it's written directly against the operator (`2>f`,
+# not `echo 2 > f`). The lexer loses that adjacency, so such numbers are marked before lexing
+FD_PLACEHOLDER = "__BUDDY_FD_{}__"
+FD_PREFIX_PATTERN = re.compile(r"(?<![^\s;&|()])(\d+)(?=[<>])")
+FD_PLACEHOLDER_PATTERN = re.compile(r"__BUDDY_FD_(\d+)__")
+
+
+class SimpleCommand:
+    """
+    A single command within a larger command line, e.g. one stage of a pipeline.
+
+    Attributes:
+        argv (list): The command name followed by its arguments
+        env_assignments (list): Any `NAME=value` assignments that prefix the command
+        redirections (list): A list of (operator, target) tuples
+        operator (str | None): The control operator that follows this command, if any
+    """
+
+    def __init__(self):
+        self.argv = []
+        self.env_assignments = []
+        self.redirections = []
+        self.operator = None
+
+    @property
+    def name(self):
+        """
+        The base name of the executable being run, or None if the command is empty.
+        """
+
+        if len(self.argv) == 0:
+            return None
+
+        return os.path.basename(self.argv[0])
+
+    @property
+    def args(self):
+        """
+        The arguments passed to the executable.
+        """
+
+        return self.argv[1:]
+
+    def writes_output(self):
+        """
+        Checks if the command redirects output anywhere other than /dev/null or another file descriptor.
+
+        Returns:
+            bool: True if the command writes output to a file
+        """
+
+        for operator, target in self.redirections:
+            if operator not in OUTPUT_REDIRECTION_OPERATORS:
+                continue
+
+            if target in ["/dev/null", "/dev/stdout", "/dev/stderr"]:
+                continue
+
+            # `>&2` duplicates a file descriptor, while `>& file` writes to a file like `&>` does
+            if operator in FD_DUPLICATION_OPERATORS and (target.isdigit() or target == "-"):
+                continue
+
+            return True
+
+        return False
+
+
+class ParsedCommand:
+    """
+    The result of parsing a shell command line.
+
+    Attributes:
+        source (str): The original command line
+        commands (list): The simple commands that make up the command line, in order
+        substitutions (list): Parsed `$(...)` and backtick substitutions found within the command line
+        has_subshell (bool): Whether the command line contains a `( ... )` subshell or `{ ... }` group
+        has_heredoc (bool): Whether the command line contains a heredoc, whose body can't be reliably parsed
+        runs_in_background (bool): Whether any part of the command line is sent to the background with `&`
+        error (str | None): The reason the command line could not be parsed, if it could not
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.commands = []
+        self.substitutions = []
+        self.has_subshell = False
+        self.has_heredoc = False
+        self.runs_in_background = False
+        self.error = None
+
+    @property
+    def is_valid(self):
+        return self.error is None
+
+    def walk(self):
+        """
+        Iterates over every simple command, including those nested within substitutions.
+
+        Yields:
+            SimpleCommand: Each simple command found in the command line
+        """
+
+        for command in self.commands:
+            yield command
+
+        for substitution in self.substitutions:
+            yield from substitution.walk()
+
+
+def parse_command(command):
+    """
+    Parses a shell command line into its simple commands, taking pipelines, lists, redirections,
+    subshells and command substitutions into account.
+
+    Args:
+        command (str): The command line to parse
+
+    Returns:
+        ParsedCommand: The parsed command line. If parsing failed, `error` will be set.
+    """
+
+    parsed = ParsedCommand(command)
+
+    try:
+        stripped_command, substitution_sources = __extract_substitutions(command)
+    except ValueError as e:
+        parsed.error = str(e)
+        return parsed
+
+    for substitution_source in substitution_sources:
+        substitution = parse_command(substitution_source)
+
+        if not substitution.is_valid:
+            parsed.error = substitution.error
+            return parsed
+
+        parsed.substitutions.append(substitution)
+
+    stripped_command = FD_PREFIX_PATTERN.sub(lambda match: FD_PLACEHOLDER.format(match.group(1)), stripped_command)
+
+    lexer = shlex.shlex(stripped_command, posix=True, punctuation_chars=PUNCTUATION_CHARS)
+    lexer.whitespace_split = True
+    lexer.whitespace = " \t\r"
+
+    try:
+        tokens = list(lexer)
+    except ValueError as e:
+        parsed.error = str(e)
+        return parsed
+
+    current = SimpleCommand()
+    index = 0
+
+    while index < len(tokens):
+        token = __normalize_operator(tokens[index])
+        index += 1
+
+        if token in ["(", ")"] or (token in ["{", "}"] and len(current.argv) == 0):
+            parsed.has_subshell = True
+            continue
+
+        if token in CONTROL_OPERATORS:
+            if token == "&":
+                parsed.runs_in_background = True
+
+            current.operator = token
+            __append_command(parsed, current)
+            current = SimpleCommand()
+            continue
+
+        if token in REDIRECTION_OPERATORS:
+            if token == "<<":
+                parsed.has_heredoc = True
+
+            target = __restore_fd_numbers(tokens[index]) if index < len(tokens) else ""
+            index += 1
+            current.redirections.append((token, target))
+            continue
+
+        if all(char in PUNCTUATION_CHARS for char in token):
+            parsed.error = f"Unsupported operator '{token}'"
+            return parsed
+
+        # A file descriptor number written against the operator that follows belongs to the redirection
+        if FD_PLACEHOLDER_PATTERN.fullmatch(token) and index < len(tokens) and __normalize_operator(tokens[index]) in REDIRECTION_OPERATORS:
+            continue
+
+        token = __restore_fd_numbers(token)
+
+        if len(current.argv) == 0 and "=" in token and not token.startswith("="):
+            current.env_assignments.append(token)
+            continue
+
+        current.argv.append(token)
+
+    __append_command(parsed, current)
+
+    return parsed
+
+
+def __append_command(parsed, command):
+    """
+    Adds a simple command to the parsed result, ignoring empty commands left behind by trailing operators.
+    """
+
+    if len(command.argv) > 0 or len(command.redirections) > 0 or len(command.env_assignments) > 0:
+        parsed.commands.append(command)
+
+
+def __normalize_operator(token):
+    """
+    Collapses newline separators produced by the lexer into the equivalent control operator.
+    """
+
+    if "\n" not in token or not all(char in PUNCTUATION_CHARS for char in token):
+        return token
+
+    operator = token.replace("\n", "")
+
+    return operator if len(operator) > 0 else ";"
+
+
+def __restore_fd_numbers(token):
+    """
+    Puts back file descriptor numbers that were marked before lexing but turned out not to be part of a redirection,
+    e.g. because they were inside quotes.
+    """
+
+    return FD_PLACEHOLDER_PATTERN.sub(lambda match: match.group(1), token)
+
+
+def __extract_substitutions(command):
+    """
+    Pulls `$(...)` and backtick command substitutions out of a command line, replacing each one with a placeholder.
+
+    Args:
+        command (str): The command line to process
+
+    Returns:
+        tuple: The command line with placeholders, and a list of the substituted command sources
+
+    Raises:
+        ValueError: If a substitution is not terminated
+    """
+
+    output = []
+    substitutions = []
+    in_single_quote = False
+    index = 0
+
+    while index < len(command):
+        char = command[index]
+
+        if char == "\\" and not in_single_quote:
+            output.append(command[index:index + 2])
+            index += 2
+            continue
+
+        if char == "'":
+            in_single_quote = not in_single_quote
+        elif not in_single_quote and command.startswith("$(", index) and not command.startswith("$((", index):
+            depth = 1
+            end = index + 2
+
+            while end < len(command) and depth > 0:
+                if command[end] == "(":
+                    depth += 1
+                elif command[end] == ")":
+                    depth -= 1
+                end += 1
+
+            if depth > 0:
+                raise ValueError("Unterminated command substitution")
+
+            output.append(SUBSTITUTION_PLACEHOLDER.format(len(substitutions)))
+            substitutions.append(command[index + 2:end - 1])
+            index = end
+            continue
+        elif not in_single_quote and char == "`":
+            end = command.find("`", index + 1)
+
+            if end == -1:
+                raise ValueError("Unterminated command substitution")
+
+            output.append(SUBSTITUTION_PLACEHOLDER.format(len(substitutions)))
+            substitutions.append(command[index + 1:end])
+            index = end + 1
+            continue
+
+        output.append(char)
+        index += 1
+
+    return "".join(output), substitutions
@@ -1,17 +1,26 @@
+import atexit
 import os
-import socket
+import signal
 import subprocess
+import sys
+import threading
 from datetime import datetime
 from rich.console import Console
 from rich.markdown import Markdown
 from rich.text import Text
 from rich.panel import Panel
-import requests
 import platform
 import getpass
+from utils.host_facts import collect_host_facts
+from utils.inventory import get_inventory_summary
+from utils.output_renderer import OutputRenderer
 
 console = Console()
 
+# Commands started in their own process group, which don't get the terminal's Ctrl+C and have to be stopped on exit
+__running_groups = set()
+__running_groups_lock = threading.Lock()
+
 
 def format_markdown_for_terminal(markdown_text):
     """
@@ -25,52 +34,228 @@ def format_markdown_for_terminal(markdown_text):
     console.print(Panel(md, expand=True, border_style="bold blue"))
 
 
-def run_command(command, superuser=False, display_output=True):
+def run_command(command, superuser=False, display_output=True, monitor=None, return_exit_code=False, interactive=True, on_start=None):
     """
     Runs a shell command, capturing the stdout and stderr and printing them to the terminal with styling.
+    Both pipes are drained concurrently and output is drawn by a throttled renderer, so commands that print a lot
+    aren't held back by the terminal. The full output is always captured.
+    Monitored and non-interactive commands are started in their own process group, so that stopping them early also
+    stops everything they spawned, which would otherwise keep the pipes open until they finished. They are stopped
+    when Buddy exits, and non-interactive ones on Ctrl+C since they no longer get the terminal's signals.
+    Interactive commands keep the terminal so that they can still prompt, e.g. for a sudo password. A monitored one is
+    made the terminal's foreground group while it runs, so it also gets Ctrl+C itself, like it would in a shell.
     
     Args:
         command (str): The shell command to run
         superuser (bool): Whether to run the command as a superuser
         display_output (bool): Whether to display the output of the command in real-time
+        monitor (CommandMonitor): A monitor to watch the output as it arrives, which may stop the command early
+        return_exit_code (bool): Whether to also return the exit code of the command
+        interactive (bool): Whether the command may read from the terminal, commands run in the background or
+                            side by side shouldn't compete with Buddy for the user's input
+        on_start (Callable): Called with the process once it has started, e.g. to stop it with kill_process_group
         
     Returns:
-        tuple: A tuple containing the stdout and stderr of the command
+        tuple: A tuple containing the stdout and stderr of the command, followed by its exit code (None if it couldn't
+               be started) when return_exit_code is set
     """
 
     full_stdout = []
     full_stderr = []
+    exit_code = None
     os_type = platform.system()
     current_user = getpass.getuser()
     
     if superuser and os_type != "Windows" and not command.startswith("sudo") and current_user != "root":
         command = f"sudo {command}"
     
+    renderer = OutputRenderer(console) if display_output else None
+    is_grouped = monitor is not None or not interactive
+    process = None
+    terminal = None
+    
     try:
-        process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-        stdout_iter = iter(process.stdout.readline, '')
-        stderr_iter = iter(process.stderr.readline, '')
+        group_kwargs = get_process_group_kwargs(keep_terminal=interactive) if is_grouped else {}
+        stdin = None if interactive else subprocess.DEVNULL
+        process = subprocess.Popen(command, shell=True, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, **group_kwargs)
+        
+        if is_grouped:
+            with __running_groups_lock:
+                __running_groups.add(process)
+                
+        if is_grouped and interactive:
+            terminal = __give_terminal_to(process)
+                
+        if on_start is not None:
+            on_start(process)
+            
+        if renderer is not None:
+            renderer.start()
             
-        for stdout_line in stdout_iter:
-            if display_output:
-                print_fancy(stdout_line.strip(), italic=True, color="light_gray")
-            full_stdout.append(stdout_line)
+        if monitor is not None:
+            monitor.attach(process)
         
-        for stderr_line in stderr_iter:
-            if display_output:
-                print_fancy(stderr_line.strip(), italic=True, color="red")
-            full_stderr.append(stderr_line)
+        readers = [
+            threading.Thread(target=__drain_stream, args=(process.stdout, full_stdout, renderer, "italic light_gray", monitor), daemon=True),
+            threading.Thread(target=__drain_stream, args=(process.stderr, full_stderr, renderer, "italic red", monitor), daemon=True)
+        ]
+        
+        for reader in readers:
+            reader.start()
+            
+        for reader in readers:
+            reader.join()
 
         process.stdout.close()
         process.stderr.close()
-        process.wait()
+        exit_code = process.wait()
+    except KeyboardInterrupt:
+        if is_grouped and process is not None:
+            kill_process_group(process)
+            
+        raise
     except Exception as e:
         full_stderr.append(str(e))
+    finally:
+        if terminal is not None:
+            __take_terminal_back(terminal)
+            
+        if is_grouped and process is not None:
+            with __running_groups_lock:
+                __running_groups.discard(process)
+                
+        if monitor is not None:
+            monitor.stop()
+            
+        if renderer is not None:
+            renderer.stop()
 
+    if return_exit_code:
+        return ''.join(full_stdout), ''.join(full_stderr), exit_code
+    
     return ''.join(full_stdout), ''.join(full_stderr)
 
 
+def get_process_group_kwargs(keep_terminal=False):
+    """
+    Args:
+        keep_terminal (bool): Whether the command should stay in Buddy's session, so it can still use the terminal
+                              (and e.g. sudo's cached credentials for it), rather than being detached from it
+    
+    Returns:
+        dict: The Popen arguments that start a command in its own process group, so it can be stopped along with
+              everything it spawns
+    """
+    
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    
+    if not keep_terminal:
+        return {"start_new_session": True}
+    
+    if sys.version_info >= (3, 11):
+        return {"process_group": 0}
+    
+    return {"preexec_fn": os.setpgrp}
+
+
+def kill_process_group(process, force=False):
+    """
+    Stops a process started with get_process_group_kwargs, along with everything it spawned. The group is signalled
+    even if the process itself has exited, since its children may still be running.
+    
+    Args:
+        process (Popen): The process
+        force (bool): Whether to kill the processes outright rather than asking them to exit
+    """
+    
+    try:
+        if os.name == "nt":
+            process.kill()
+        else:
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def __give_terminal_to(process):
+    """
+    Makes a process's group the terminal's foreground group, so it can prompt the user without being stopped.
+    
+    Args:
+        process (Popen): The process, started in its own process group within Buddy's session
+        
+    Returns:
+        int | None: The terminal's file descriptor if it was handed over, to take it back with once the process is done
+    """
+    
+    if os.name == "nt" or not sys.stdin.isatty():
+        return None
+    
+    terminal = sys.stdin.fileno()
+    
+    try:
+        # Only the foreground group can hand the terminal over, Buddy itself may be running in the background
+        if os.tcgetpgrp(terminal) != os.getpgrp():
+            return None
+        
+        os.tcsetpgrp(terminal, process.pid)
+    except OSError:
+        return None
+    
+    return terminal
+
+
+def __take_terminal_back(terminal):
+    """
+    Makes Buddy's group the terminal's foreground group again after __give_terminal_to.
+    
+    Args:
+        terminal (int): The terminal's file descriptor
+    """
+    
+    # Changing the foreground group from the background stops the caller, unless it blocks SIGTTOU
+    previous_mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTTOU})
+    
+    try:
+        os.tcsetpgrp(terminal, os.getpgrp())
+    except OSError:
+        pass
+    finally:
+        signal.pthread_sigmask(signal.SIG_SETMASK, previous_mask)
+
+
+@atexit.register
+def __stop_running_groups():
+    with __running_groups_lock:
+        processes = list(__running_groups)
+        
+    for process in processes:
+        kill_process_group(process, force=True)
+
+
+def __drain_stream(stream, lines, renderer, style, monitor=None):
+    """
+    Reads a pipe line by line until it closes, collecting every line and queueing it for display.
+    
+    Args:
+        stream (IO): The pipe to read from
+        lines (list): The list to collect the lines in
+        renderer (OutputRenderer | None): The renderer to display the lines with, if output is being displayed
+        style (str): The style to display the lines with
+        monitor (CommandMonitor | None): The monitor watching the command's output, if any
+    """
+    
+    for line in iter(stream.readline, ''):
+        lines.append(line)
+        
+        if renderer is not None:
+            renderer.write(line.rstrip(), style)
+            
+        if monitor is not None:
+            monitor.feed(line)
+
+
 def print_fancy(text, bold=False, italic=False, underline=False, color=None, bg=None):
     """
     Helper function to print styled text to the terminal with simple arguments using rich.
@@ -108,38 +293,19 @@ def get_system_context():
         str: A string containing the system context information
     """
     
-    # Operating system
-    os_name = platform.system()
-    os_version = platform.version()
-    os_details = platform.uname()
-
-    # Local network IP
-    local_ip = socket.gethostbyname(socket.gethostname())
-
-    # External IP
-    try:
-        external_ip = requests.get('https://api.ipify.org').text
-    except requests.RequestException:
-        external_ip = 'Unavailable'
-
-    # Username
-    username = getpass.getuser()
+    # Facts about the host are cached, only the volatile ones are worked out every time
+    facts = collect_host_facts()
 
+    # Installed tools, so the model doesn't have to look for them itself
+    facts["Tools"] = get_inventory_summary()
+    
     # Current working directory
-    cwd = os.getcwd()
+    facts["Current Working Directory"] = os.getcwd()
 
     # Current date and time
-    current_datetime = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    context = (
-        f"**Operating System:** {os_name} {os_version}\n"
-        f"**OS Details:** {os_details}\n"
-        f"**Local Network IP:** {local_ip}\n"
-        f"**External IP:** {external_ip}\n"
-        f"**Username:** {username}\n"
-        f"**Current Working Directory:** {cwd}\n"
-        f"**Current Date and Time:** {current_datetime}"
-    )
+    facts["Current Date and Time"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    context = "\n".join(f"**{label}:** {value}" for label, value in facts.items())
 
     return context
 
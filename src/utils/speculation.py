@@ -0,0 +1,111 @@
+import threading
+from utils.shell_utils import kill_process_group, run_command
+
+
+class Speculation:
+    """
+    Work started in the background on the assumption that the user will approve what they are being asked about, so
+    that it overlaps with the time they spend reading and answering. If their answer turns out as assumed the result
+    is used, otherwise it's discarded. Discarded work can't be interrupted, it's left to finish and its result ignored,
+    except for commands run with CommandSpeculation.
+
+    Attributes:
+        assumed_messages (list): The tool results the work assumes the user's answer will produce, if any
+        is_discarded (bool): Whether the result has been thrown away
+    """
+
+    def __init__(self, work, assumed_messages=None):
+        self.assumed_messages = assumed_messages
+        self.is_discarded = False
+        self.__work = work
+        self.__result = None
+        self.__error = None
+        self.__done = threading.Event()
+
+        # A daemon thread, so that work nobody is waiting for anymore never holds up exiting
+        threading.Thread(target=self.__run, daemon=True).start()
+
+    def matches(self, messages):
+        """
+        Checks whether the tool results the user's answer actually produced are the ones that were assumed.
+
+        Args:
+            messages (list): The tool results
+
+        Returns:
+            bool: True if the result can be used
+        """
+
+        return not self.is_discarded and self.assumed_messages == messages
+
+    def get_result(self):
+        """
+        Waits for the work to finish.
+
+        Returns:
+            Any: Whatever the work returned
+
+        Raises:
+            Exception: Whatever the work raised
+        """
+
+        self.__done.wait()
+
+        if self.__error is not None:
+            raise self.__error
+
+        return self.__result
+
+    def discard(self):
+        self.is_discarded = True
+
+    def __run(self):
+        try:
+            self.__result = self.__work()
+        except Exception as e:
+            self.__error = e
+        finally:
+            self.__done.set()
+
+
+class CommandSpeculation(Speculation):
+    """
+    A command run before the user has approved it, with its output collected rather than displayed. The command can't
+    read from the terminal, where it would compete with the approval prompt, and discarding it stops it along with
+    everything it spawned, since commands such as `tail -f` would otherwise never finish.
+
+    Attributes:
+        command (str): The command
+    """
+
+    def __init__(self, command, assumed_messages=None):
+        self.command = command
+        self.__process = None
+        self.__lock = threading.Lock()
+
+        super().__init__(self.__run_command, assumed_messages)
+
+    def discard(self):
+        super().discard()
+
+        with self.__lock:
+            process = self.__process
+
+        if process is not None:
+            kill_process_group(process, force=True)
+
+    def __run_command(self):
+        try:
+            return run_command(self.command, display_output=False, interactive=False, on_start=self.__on_start)
+        finally:
+            # The process has been waited for, so its id may be reused by an unrelated process
+            with self.__lock:
+                self.__process = None
+
+    def __on_start(self, process):
+        with self.__lock:
+            self.__process = process
+
+        # Discarded before the command got going
+        if self.is_discarded:
+            kill_process_group(process, force=True)
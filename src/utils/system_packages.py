@@ -1,10 +1,14 @@
+import glob
 import os
+import shlex
 import sys
-import subprocess
+import time
 import platform
 import getpass
 from enum import Enum
 from typing import Optional
+from config.config_manager import ConfigManager
+from utils.inventory import detect_package_manager, find_executable
 from utils.shell_utils import print_fancy, run_command
 
 
@@ -22,79 +26,204 @@ class PackageManager(Enum):
 def get_package_manager() -> Optional[PackageManager]:
     """
     Determines the package manager used by the system.
+    The result is cached by the inventory until the PATH or the distribution's release files change.
     
     Returns:
         Optional[PackageManager]: The package manager used by the system, or None if unknown.
     """
 
-    os_type = platform.system()
-    
-    if os_type == "Linux":
-        if os.path.exists("/etc/debian_version"):
-            return PackageManager.APT
-        elif os.path.exists("/etc/redhat-release"):
-            return PackageManager.YUM
-        elif is_installed("pacman"):
-            return PackageManager.PACMAN
-        elif is_installed("dnf"):
-            return PackageManager.DNF
-        elif is_installed("zypper"):
-            return PackageManager.ZYPPER
-        elif is_installed("apk"):
-            return PackageManager.APK
-    elif os_type == "Darwin":
-        if is_installed("brew"):
-            return PackageManager.BREW
-    elif os_type == "Windows":
-        if is_installed("choco"):
-            return PackageManager.CHOCO
-        
-    return None
-
-
-def update_packages():
-    package_manager = get_package_manager()
-    os_type = platform.system()
-    username = getpass.getuser()
+    package_manager = detect_package_manager()
     
-    if not package_manager:
-        print_fancy(f"Could not determine package manager.", italic=True, color="red")
-        sys.exit(1)
+    return PackageManager(package_manager) if package_manager is not None else None
+
+
+# Glob patterns for the files each package manager downloads when it refreshes its package index, used to tell how
+# long ago it was refreshed. Directories and caches built from the index are touched by other operations too
+PACKAGE_INDEX_FILES = {
+    PackageManager.APT: ["/var/lib/apt/lists/*_Packages*"],
+    PackageManager.YUM: ["/var/cache/yum/*/*/*/repomd.xml", "/var/cache/yum/*/repomd.xml"],
+    PackageManager.DNF: ["/var/cache/dnf/*/repodata/repomd.xml"],
+    PackageManager.PACMAN: ["/var/lib/pacman/sync/*.db"],
+    PackageManager.ZYPPER: ["/var/cache/zypp/raw/*/repodata/repomd.xml"],
+    PackageManager.APK: ["/var/cache/apk/APKINDEX.*.tar.gz"]
+}
+
+# Commands that only refresh the package index, never upgrade installed packages.
+# brew isn't listed since `brew install` already updates itself when its metadata is stale
+REFRESH_COMMANDS = {
+    PackageManager.APT: ["apt-get", "update"],
+    PackageManager.YUM: ["yum", "makecache"],
+    PackageManager.DNF: ["dnf", "makecache"],
+    PackageManager.PACMAN: ["pacman", "-Sy"],
+    PackageManager.ZYPPER: ["zypper", "refresh"],
+    PackageManager.APK: ["apk", "update"]
+}
+
+# Package managers that have to run as the current user, Homebrew refuses to run as root
+UNPRIVILEGED_PACKAGE_MANAGERS = {PackageManager.BREW, PackageManager.CHOCO}
+
+# Commands that install packages, which are appended to the end
+INSTALL_COMMANDS = {
+    PackageManager.APT: ["apt-get", "install", "-y"],
+    PackageManager.YUM: ["yum", "install", "-y"],
+    PackageManager.PACMAN: ["pacman", "-S", "--noconfirm", "--needed"],
+    PackageManager.DNF: ["dnf", "install", "-y"],
+    PackageManager.ZYPPER: ["zypper", "--non-interactive", "install"],
+    PackageManager.APK: ["apk", "add", "--no-cache"],
+    PackageManager.BREW: ["brew", "install"],
+    PackageManager.CHOCO: ["choco", "install", "-y"]
+}
+
+
+class PackageTransaction:
+    """
+    Queues up packages and installs them all with a single package manager invocation, refreshing the package index
+    first only if it's stale. Can be used as a context manager, which commits when the `with` block exits cleanly and
+    raises a RuntimeError if the install fails.
     
-    if os_type == "Linux":
-        if package_manager == PackageManager.APT:
-            update_args = ["apt-get", "update"]
-        elif package_manager == PackageManager.YUM:
-            update_args = ["yum", "update"]
-        elif package_manager == PackageManager.PACMAN:
-            update_args = ["pacman", "-Sy"]
-        elif package_manager == PackageManager.DNF:
-            update_args = ["dnf", "update"]
-        elif package_manager == PackageManager.ZYPPER:
-            update_args = ["zypper", "refresh"]
-        elif package_manager == PackageManager.APK:
-            update_args = ["apk", "update"]
-        else:
-            print_fancy(f"Unknown package manager: {package_manager}", italic=True, color="red")
-            sys.exit(1)
-        
-        if username != "root":
-            update_args.insert(0, "sudo")
+    Attributes:
+        package_manager (PackageManager | None): The package manager to install with
+        packages (list): The queued packages
+    """
+    
+    def __init__(self, package_manager=None):
+        self.package_manager = package_manager or get_package_manager()
+        self.packages = []
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            is_success, _, stderr = self.commit()
+            
+            if not is_success:
+                raise RuntimeError(f"Failed to install packages: {stderr.strip()}")
+            
+    def add(self, *package_names):
+        """
+        Queues packages to be installed.
+        
+        Args:
+            *package_names (str): The names of the packages, or paths to local package files
+        """
+        
+        for package_name in package_names:
+            if package_name not in self.packages:
+                self.packages.append(package_name)
+                
+    def get_command(self):
+        """
+        Returns:
+            str | None: The command that installs the queued packages, or None if nothing can be installed
+        """
+        
+        if len(self.packages) == 0 or self.package_manager not in INSTALL_COMMANDS:
+            return None
             
-        run_command(" ".join(update_args), display_output=False)
-    elif os_type == "Darwin":
-        if package_manager == PackageManager.BREW:
-            subprocess.check_call(["brew", "update"])
-        else:
-            print_fancy(f"Unknown package manager: {package_manager}", italic=True, color="red")
-            sys.exit(1)
-    elif os_type == "Windows":
-        if package_manager == PackageManager.CHOCO:
-            subprocess.check_call(["choco", "upgrade", "all", "-y"])
-        else:
-            print_fancy(f"Unknown package manager: {package_manager}", italic=True, color="red")
-            sys.exit(1)
+        return _make_command(INSTALL_COMMANDS[self.package_manager] + self.packages, self.package_manager)
+        
+    def commit(self, refresh_max_age=None, display_output=False):
+        """
+        Installs the queued packages.
+        
+        Args:
+            refresh_max_age (float | None): The maximum age in seconds of the package index before it's refreshed,
+                                            defaults to the "packages.index_max_age" setting
+            display_output (bool): Whether to display the package manager's output
             
+        Returns:
+            tuple: Whether the install succeeded, and the stdout and stderr of the package manager
+        """
+        
+        if len(self.packages) == 0:
+            return True, "", ""
+            
+        if self.package_manager is None:
+            print_fancy("Could not determine package manager.", italic=True, color="red")
+            return False, "", "Could not determine package manager"
+            
+        refresh_index(refresh_max_age, self.package_manager)
+        
+        print_fancy(f"Installing {', '.join(self.packages)} using {self.package_manager.value}...", italic=True, color="cyan")
+        stdout, stderr, exit_code = run_command(self.get_command(), display_output=display_output, return_exit_code=True)
+        
+        if exit_code != 0:
+            print_fancy(f"Failed to install {', '.join(self.packages)} using {self.package_manager.value}", italic=True, color="red")
+            return False, stdout, stderr
+            
+        self.packages = []
+        
+        return True, stdout, stderr
+
+
+def get_index_age(package_manager=None):
+    """
+    Works out how long ago the package index was refreshed, from the newest of the index files it downloaded.
+    
+    Args:
+        package_manager (PackageManager | None): The package manager, defaults to the system's
+        
+    Returns:
+        float | None: The age of the index in seconds, or None if there are no index files (e.g. they were cleaned
+                      up to keep an image small), in which case the index has to be refreshed before installing
+    """
+    
+    package_manager = package_manager or get_package_manager()
+    newest_mtime = None
+    
+    for pattern in PACKAGE_INDEX_FILES.get(package_manager, []):
+        for path in glob.glob(pattern):
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+                
+            newest_mtime = mtime if newest_mtime is None else max(newest_mtime, mtime)
+            
+    if newest_mtime is None:
+        return None
+        
+    return max(0.0, time.time() - newest_mtime)
+
+
+def refresh_index(max_age=None, package_manager=None):
+    """
+    Refreshes the package index, unless it was refreshed recently enough.
+    
+    Args:
+        max_age (float | None): The maximum age in seconds of the index before it's refreshed, defaults to the
+                                "packages.index_max_age" setting. 0 always refreshes
+        package_manager (PackageManager | None): The package manager, defaults to the system's
+        
+    Returns:
+        bool: True if the index was refreshed
+    """
+    
+    package_manager = package_manager or get_package_manager()
+    
+    if not package_manager:
+        print_fancy("Could not determine package manager.", italic=True, color="red")
+        sys.exit(1)
+        
+    # Package managers without a local index (e.g. choco) or that refresh it themselves (brew) are left alone
+    if package_manager not in REFRESH_COMMANDS:
+        return False
+        
+    if max_age is None:
+        max_age = ConfigManager().get_setting("packages.index_max_age", 6 * 60 * 60)
+        
+    index_age = get_index_age(package_manager)
+    
+    if index_age is not None and index_age < max_age:
+        print_fancy(f"Package index was refreshed {int(index_age // 60)} minutes ago, skipping refresh", italic=True, color="light_gray")
+        return False
+        
+    print_fancy("Refreshing package index...", italic=True, color="light_gray")
+    run_command(_make_command(REFRESH_COMMANDS[package_manager], package_manager), display_output=False)
+    
+    return True
+
 
 def install_package(package_name):
     """
@@ -102,47 +231,36 @@ def install_package(package_name):
     
     Args:
         package_name (str): The name of the package to install.
+        
+    Returns:
+        bool: True if the package was installed
     """
-    package_manager = get_package_manager()
     
-    if not package_manager:
-        print_fancy(f"Could not determine package manager.", italic=True, color="red")
-        return
-
-    print_fancy(f"Installing {package_name} using {package_manager.value}...", italic=True, color="cyan")
-    
-    try:
-        if package_manager == PackageManager.APT:
-            install_args = ["apt-get", "install", "-y", package_name]
-        elif package_manager == PackageManager.YUM:
-            install_args = ["yum", "install", "-y", package_name]
-        elif package_manager == PackageManager.PACMAN:
-            install_args = ["pacman", "-S", "--noconfirm", package_name]
-        elif package_manager == PackageManager.DNF:
-            install_args = ["dnf", "install", "-y", package_name]
-        elif package_manager == PackageManager.ZYPPER:
-            install_args = ["zypper", "--non-interactive", "install", package_name]
-        elif package_manager == PackageManager.APK:
-            install_args = ["apk", "add", "--no-cache", package_name]
-        elif package_manager == PackageManager.BREW:
-            install_args = ["brew", "install", package_name]
-        elif package_manager == PackageManager.CHOCO:
-            install_args = ["choco", "install", package_name, "-y"]
-        else:
-            raise ValueError(f"Unknown package manager: {package_manager}")
-        
-        if platform.system() != "Windows" and getpass.getuser() != "root":
-            install_args.insert(0, "sudo")
-            
-        run_command(" ".join(install_args), display_output=False)
+    return install_packages([package_name])
+
+
+def install_packages(package_names, refresh_max_age=None):
+    """
+    Installs several packages with a single package manager invocation.
+    
+    Args:
+        package_names (list): The names of the packages to install
+        refresh_max_age (float | None): The maximum age in seconds of the package index before it's refreshed
         
-    except subprocess.CalledProcessError as e:
-        print(f"Failed to install {package_name} using {package_manager.value}: {e}")
+    Returns:
+        bool: True if the packages were installed
+    """
+    
+    transaction = PackageTransaction()
+    transaction.add(*package_names)
+    
+    return transaction.commit(refresh_max_age)[0]
 
 
 def is_installed(command):
     """
     Checks if a command exists on the system.
+    Commands are looked up in an in-process index of the PATH rather than by running `which` or `where`.
     
     Args:
         command (str): The command to check.
@@ -150,11 +268,19 @@ def is_installed(command):
     Returns:
         bool: True if the command exists, False otherwise.
     """
-    try:
-        if platform.system() == "Windows":
-            subprocess.check_call(["where", command], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        else:
-            subprocess.check_call(["which", command], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        return True
-    except subprocess.CalledProcessError:
-        return False
+    return find_executable(command) is not None
+
+
+def _make_command(args, package_manager):
+    """
+    Joins a command's arguments, running it with sudo when not already root unless the package manager has to run as
+    the current user.
+    """
+    
+    if platform.system() == "Windows":
+        return " ".join(args)
+    
+    if getpass.getuser() != "root" and package_manager not in UNPRIVILEGED_PACKAGE_MANAGERS:
+        args = ["sudo"] + args
+        
+    return shlex.join(args)
@@ -1,22 +1,40 @@
-def is_approval(response):
-    """
-    Check if a user input string is a yes or similar
-    
-    Returns:
-        bool: Whether the response is an approval
-    """
-    
-    approval_responses = {"y", "yes", "ok", "yeah", "sure", "okay", "yep", "yea"}
-    return response.lower() in approval_responses
-
-
-def is_denial(response):
-    """
-    Check if a user input string is a no or similar
-    
-    Returns:
-        bool: Whether the response is a denial
-    """
-    
-    denial_responses = {"n", "no", "nope", "nah"}
-    return response.lower() in denial_responses
+from utils.output_renderer import OutputRenderer
+
+
+def prompt_user(prompt="> "):
+    """
+    Reads a line of input from the user, pausing any live output while they type so nothing is drawn over the prompt
+    
+    Args:
+        prompt (str): The prompt to show
+    
+    Returns:
+        str: What the user typed
+    """
+    
+    with OutputRenderer.paused():
+        return input(prompt)
+
+
+def is_approval(response):
+    """
+    Check if a user input string is a yes or similar
+    
+    Returns:
+        bool: Whether the response is an approval
+    """
+    
+    approval_responses = {"y", "yes", "ok", "yeah", "sure", "okay", "yep", "yea"}
+    return response.lower() in approval_responses
+
+
+def is_denial(response):
+    """
+    Check if a user input string is a no or similar
+    
+    Returns:
+        bool: Whether the response is a denial
+    """
+    
+    denial_responses = {"n", "no", "nope", "nah"}
+    return response.lower() in denial_responses
@@ -0,0 +1,105 @@
+import os
+import sys
+import tempfile
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Buddy is run from src, so its modules are imported the same way here
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# Settings, caches and logs live under the home directory, which the tests shouldn't touch
+os.environ["HOME"] = tempfile.mkdtemp(prefix="buddy_tests_")
+
+
+class LocalServer:
+    """
+    An HTTP server on localhost whose responses are set by the test.
+
+    Attributes:
+        routes (dict): Maps each path to a function that's called with the request handler and sends the response
+        requests (list): The (method, path, headers) of every request received, in order
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.__server = ThreadingHTTPServer(("127.0.0.1", 0), self.__make_handler())
+        self.__thread = threading.Thread(target=self.__server.serve_forever, args=(0.05,), daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.__server.server_address[1]}{path}"
+
+    def serve(self, path, body, status=200, headers=None):
+        """
+        Makes the server answer every request for a path with the same response.
+        """
+
+        self.routes[path] = lambda handler: self.respond(handler, body, status, headers)
+
+    @staticmethod
+    def respond(handler, body, status=200, headers=None):
+        """
+        Sends a complete response from a route, leaving out the body for HEAD requests.
+
+        Args:
+            handler (BaseHTTPRequestHandler): The request handler
+            body (bytes): The response body
+            status (int): The status code
+            headers (dict): Headers to send along with the Content-Length
+        """
+
+        handler.send_response(status)
+        handler.send_header("Content-Length", str(len(body)))
+
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+
+        handler.end_headers()
+
+        if handler.command != "HEAD":
+            handler.wfile.write(body)
+
+    def start(self):
+        self.__thread.start()
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.__respond("GET")
+
+            def do_HEAD(self):
+                self.__respond("HEAD")
+
+            def log_message(self, *args):
+                pass
+
+            def __respond(self, method):
+                server.requests.append((method, self.path, dict(self.headers)))
+
+                if self.path not in server.routes:
+                    self.send_error(404)
+                    return
+
+                server.routes[self.path](self)
+
+        return Handler
+
+
+@pytest.fixture
+def local_server(monkeypatch):
+    # Requests to the server mustn't go through a proxy from the environment
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1")
+
+    server = LocalServer()
+    server.start()
+
+    yield server
+
+    server.stop()
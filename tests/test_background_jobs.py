@@ -0,0 +1,91 @@
+import time
+from utils.background_jobs import BackgroundJob, JobTable
+
+
+def is_alive(pid):
+    """
+    Checks whether a process is still running. Killed orphans can linger as zombies until init reaps them, which
+    doesn't happen in every container, so those count as stopped.
+    """
+
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+def is_stopped(pid, timeout=2):
+    """
+    Waits a moment for a signalled process to be gone, since signals are delivered asynchronously.
+    """
+
+    deadline = time.monotonic() + timeout
+
+    while is_alive(pid) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    return not is_alive(pid)
+
+
+def start_with_child(command, tmp_path):
+    """
+    Starts a job whose command leaves a child running, returning the job and the child's process ID.
+    """
+
+    pid_file = tmp_path / "child.pid"
+    job = BackgroundJob(1, f"{command} & echo $! > {pid_file}; wait")
+    job.start()
+
+    while not pid_file.exists() or pid_file.read_text().strip() == "":
+        time.sleep(0.01)
+
+    return job, int(pid_file.read_text())
+
+
+def test_output_is_read_incrementally():
+    job = BackgroundJob(1, "echo one; echo two")
+    job.start()
+    job.process.wait()
+    time.sleep(0.1)
+
+    assert job.read_new_output() == ("one\ntwo\n", 0)
+    assert job.read_new_output() == ("", 0)
+
+
+def test_dropped_output_is_counted():
+    job = BackgroundJob(1, "seq 1 10", buffer_lines=3)
+    job.start()
+    job.process.wait()
+    time.sleep(0.1)
+
+    assert job.read_new_output() == ("8\n9\n10\n", 7)
+
+
+def test_stopping_a_job_stops_its_children(tmp_path):
+    job, child_pid = start_with_child("sleep 30", tmp_path)
+
+    job.stop(timeout=2)
+
+    assert not job.is_running
+    assert is_stopped(child_pid)
+
+
+def test_children_that_ignore_termination_are_killed(tmp_path):
+    job, child_pid = start_with_child("trap '' TERM; sleep 30", tmp_path)
+
+    started_at = time.monotonic()
+    job.stop(timeout=0.5)
+
+    assert is_stopped(child_pid)
+    assert time.monotonic() - started_at < 5
+
+
+def test_children_are_stopped_after_the_shell_exits(tmp_path):
+    pid_file = tmp_path / "child.pid"
+    job_table = JobTable()
+    job = job_table.start(f"sleep 30 & echo $! > {pid_file}")
+    job.process.wait()
+
+    assert job_table.stop_all() == []
+    assert is_stopped(int(pid_file.read_text()))
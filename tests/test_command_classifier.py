@@ -0,0 +1,101 @@
+import pytest
+from utils.command_classifier import is_cacheable_command, is_read_only_command, unwrap_command
+
+
+@pytest.mark.parametrize("command", [
+    "ls -la",
+    "cat README.md | grep buddy | wc -l",
+    "git status",
+    "git --no-pager log --oneline",
+    "git diff HEAD~1",
+    "sudo cat /var/log/syslog",
+    "/bin/ls /tmp",
+    "find . -name '*.py'",
+    "sed -n 1,10p file.txt",
+    "uniq input.txt",
+    "uniq -f 1 input.txt",
+    "tree -L 2",
+    "rg TODO src",
+    "python --version",
+    "git --version",
+    "docker version",
+    "kubectl get pods",
+    "echo $(date)",
+    "ls 2>&1 | grep a",
+])
+def test_read_only_commands(command):
+    assert is_read_only_command(command)
+
+
+@pytest.mark.parametrize("command", [
+    "rm -rf build",
+    "ls > out.txt",
+    "ls >& out.txt",
+    "sed -i s/a/b/ file.txt",
+    "find . -delete",
+    "sort -o sorted.txt input.txt",
+    "git push",
+    "git commit -m message",
+    "ls $(rm -rf build)",
+    "ls &",
+    "cat <<EOF\nhello\nEOF",
+])
+def test_modifying_commands(command):
+    assert not is_read_only_command(command)
+
+
+@pytest.mark.parametrize("command", [
+    "shutdown -h",
+    "sudo shutdown -h",
+    "sudo /sbin/shutdown -h",
+    "/sbin/shutdown -h",
+    "make help",
+    "./install.sh --help",
+    "./ls",
+    "bin/cat file",
+    "node help",
+])
+def test_informational_arguments_only_apply_to_known_programs(command):
+    assert not is_read_only_command(command)
+
+
+@pytest.mark.parametrize("command", [
+    "uniq a /etc/passwd",
+    "uniq -c input.txt output.txt",
+    "tree -o /etc/hosts",
+    "rg --pre ./evil.sh pattern",
+    "rg --pre=./evil.sh pattern",
+    "git log --output=/etc/hosts",
+    "git diff --output /etc/hosts",
+    "git -c core.pager='rm -rf ~' log",
+    "git -c diff.external=./evil.sh diff",
+    "git diff --ext-diff",
+    "git --config-env=core.pager=EVIL log",
+])
+def test_flags_that_write_files_or_run_programs(command):
+    assert not is_read_only_command(command)
+
+
+@pytest.mark.parametrize("argv, expected", [
+    (["sudo", "ls"], ["ls"]),
+    (["sudo", "-u", "root", "ls"], ["ls"]),
+    (["env", "FOO=1", "BAR=2", "ls"], ["ls"]),
+    (["nice", "-n", "5", "ls"], ["ls"]),
+    (["timeout", "-s", "KILL", "5", "ls"], ["ls"]),
+    (["sudo", "env", "A=b", "nohup", "ls"], ["ls"]),
+    (["ls", "-la"], ["ls", "-la"]),
+])
+def test_unwrap_command(argv, expected):
+    assert unwrap_command(argv) == expected
+
+
+@pytest.mark.parametrize("command, expected", [
+    ("cat /etc/os-release", True),
+    ("ps aux", False),
+    ("sudo docker ps", False),
+    ("tail -f /var/log/syslog", False),
+    ("git log -1", True),
+    ("rm -rf build", False),
+])
+def test_is_cacheable_command(command, expected):
+    assert is_cacheable_command(command) == expected
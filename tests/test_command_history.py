@@ -0,0 +1,34 @@
+import pytest
+from utils.command_history import CommandHistory
+
+
+@pytest.mark.parametrize("earlier, later", [
+    ("ls -la /tmp", "ls   -la  /tmp"),
+    ("grep 'a b' file", "grep \"a b\" file"),
+    ("echo hello", "echo 'hello'"),
+])
+def test_commands_are_compared_after_normalizing_quotes_and_whitespace(earlier, later):
+    history = CommandHistory()
+    run = history.record(earlier, "output", "")
+
+    assert history.find_previous(later) is run
+
+
+@pytest.mark.parametrize("earlier, later", [
+    ("grep 'a b' file", "grep a b file"),
+    ("echo 'a;b'", "echo a; b"),
+    ("ls /var/log/app", "ls /var/log/apt"),
+])
+def test_commands_with_different_arguments_are_not_confused(earlier, later):
+    history = CommandHistory()
+    history.record(earlier, "output", "")
+
+    assert history.find_previous(later) is None
+
+
+def test_the_most_recent_run_is_found():
+    history = CommandHistory()
+    history.record("uptime", "first", "")
+    second = history.record("uptime", "second", "")
+
+    assert history.find_previous("uptime") is second
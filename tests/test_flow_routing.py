@@ -0,0 +1,38 @@
+import pytest
+from flows import discover_flows, route_flow
+
+discover_flows()
+
+
+@pytest.mark.parametrize("task, expected", [
+    ("help what is a symlink", ("help", "what is a symlink")),
+    ("teach me how to use grep", ("teach me", "how to use grep")),
+    ("show me the disks", ("show me", "the disks")),
+    ("explain ls -la", ("explain", "ls -la")),
+    ("carefully update the system", ("carefully", "update the system")),
+    ("update the system", ("__default", "update the system")),
+])
+def test_tasks_are_routed_by_prefix(task, expected):
+    assert route_flow(task) == expected
+
+
+@pytest.mark.parametrize("task, expected", [
+    ("help: what is a symlink", ("help", "what is a symlink")),
+    ("teach me, how to use grep", ("teach me", "how to use grep")),
+    ("show me: the disks", ("show me", "the disks")),
+    ("explain: ls -la", ("explain", "ls -la")),
+    ("carefully, update the system", ("carefully", "update the system")),
+    ("Carefully! update the system", ("carefully", "update the system")),
+])
+def test_punctuation_after_a_prefix_is_ignored(task, expected):
+    assert route_flow(task) == expected
+
+
+@pytest.mark.parametrize("task", ["helpful script", "explainer video", "teacher me", "careful update"])
+def test_prefixes_only_match_whole_words(task):
+    assert route_flow(task) == ("__default", task)
+
+
+def test_longest_prefix_wins():
+    assert route_flow("teach me")[0] == "teach me"
+    assert route_flow("show")[0] == "__default"
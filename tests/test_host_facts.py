@@ -0,0 +1,64 @@
+import threading
+import time
+import pytest
+from utils import host_facts
+from utils.host_facts import UNAVAILABLE, collect_host_facts
+
+
+@pytest.fixture
+def probes(tmp_path, monkeypatch):
+    """
+    Replaces the probes with ones set by the test, counting how often each is run.
+    """
+
+    monkeypatch.setattr(host_facts, "HOST_FACTS_FILE", str(tmp_path / "host_facts.json"))
+    calls = {}
+
+    def set_probes(**probe_functions):
+        def counted(name, probe):
+            def run(timeout):
+                calls[name] = calls.get(name, 0) + 1
+                return probe(timeout)
+
+            return run
+
+        monkeypatch.setattr(host_facts, "PROBES", {name: (name.title(), counted(name, probe)) for name, probe in probe_functions.items()})
+
+    return set_probes, calls
+
+
+def fail(timeout):
+    raise OSError("offline")
+
+
+def test_facts_are_cached(probes):
+    set_probes, calls = probes
+    set_probes(username=lambda timeout: "buddy")
+
+    assert collect_host_facts() == {"Username": "buddy"}
+    assert collect_host_facts() == {"Username": "buddy"}
+    assert calls == {"username": 1}
+
+
+def test_failed_probes_are_not_cached(probes):
+    set_probes, calls = probes
+    set_probes(username=lambda timeout: "buddy", external_ip=fail)
+
+    assert collect_host_facts() == {"Username": "buddy", "External_Ip": UNAVAILABLE}
+    assert collect_host_facts() == {"Username": "buddy", "External_Ip": UNAVAILABLE}
+    assert calls == {"username": 1, "external_ip": 2}
+
+
+def test_stuck_probes_time_out_on_daemon_threads(monkeypatch):
+    run_probes = getattr(host_facts, "__run_probes")
+    release = threading.Event()
+    monkeypatch.setattr(host_facts, "PROBES", {"stuck": ("Stuck", lambda timeout: release.wait()), "quick": ("Quick", lambda timeout: "ok")})
+
+    started_at = time.monotonic()
+    results = run_probes(["stuck", "quick"], 0.2)
+
+    assert results == {"stuck": UNAVAILABLE, "quick": "ok"}
+    assert time.monotonic() - started_at < 1
+    assert all(thread.daemon for thread in threading.enumerate() if thread.name.startswith("host_facts_"))
+
+    release.set()
@@ -0,0 +1,129 @@
+import json
+import pytest
+from abilities.browsing import http_fetch, view_webpage
+from abilities.browsing.http_fetch import fetch_page
+
+ARTICLE = "<p>" + "Buddy fetches static pages over plain HTTP before it ever opens a browser. " * 10 + "</p>"
+HTML_PAGE = f"<html><head><title>Static page</title></head><body><nav>Home | Docs</nav><main>{ARTICLE}</main></body></html>"
+
+
+def test_html_pages_are_extracted_without_the_browser(local_server):
+    local_server.serve("/page", HTML_PAGE.encode(), headers={"Content-Type": "text/html; charset=utf-8"})
+
+    result = fetch_page(local_server.url("/page"))
+
+    assert not result.needs_browser
+    assert result.status_code == 200
+    assert result.extraction.title == "Static page"
+    assert "plain HTTP" in result.extraction.text
+    assert "Home | Docs" not in result.extraction.text
+
+
+def test_json_is_pretty_printed(local_server):
+    local_server.serve("/data", json.dumps({"name": "buddy", "tags": ["a", "b"]}).encode(), headers={"Content-Type": "application/json"})
+
+    result = fetch_page(local_server.url("/data"))
+
+    assert not result.needs_browser
+    assert json.loads(result.extraction.text) == {"name": "buddy", "tags": ["a", "b"]}
+    assert "\n  " in result.extraction.text
+
+
+def test_plain_text_is_kept_as_is(local_server):
+    local_server.serve("/notes.txt", b"line one\nline two\n", headers={"Content-Type": "text/plain"})
+
+    assert fetch_page(local_server.url("/notes.txt")).extraction.text == "line one\nline two"
+
+
+def test_missing_content_types_are_sniffed(local_server):
+    local_server.serve("/page", HTML_PAGE.encode())
+
+    result = fetch_page(local_server.url("/page"))
+
+    assert result.content_type == "text/html"
+    assert result.extraction.title == "Static page"
+
+
+@pytest.mark.parametrize("content_type", ["image/png", "application/pdf", "application/octet-stream"])
+def test_other_content_types_need_the_browser(local_server, content_type):
+    local_server.serve("/file", b"\x89PNG\r\n\x1a\n\x00\x00", headers={"Content-Type": content_type})
+
+    result = fetch_page(local_server.url("/file"))
+
+    assert result.needs_browser
+    assert result.reason == f"the page is {content_type}"
+
+
+def test_pages_declared_too_large_need_the_browser(local_server, monkeypatch):
+    monkeypatch.setattr(http_fetch, "MAX_CONTENT_BYTES", 1024)
+    local_server.serve("/large", b"a" * 2048, headers={"Content-Type": "text/plain"})
+
+    result = fetch_page(local_server.url("/large"))
+
+    assert result.needs_browser
+    assert result.reason == "the page is too large"
+
+
+def test_pages_too_large_without_a_content_length_need_the_browser(local_server, monkeypatch):
+    monkeypatch.setattr(http_fetch, "MAX_CONTENT_BYTES", 1024)
+
+    def send_without_length(handler):
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/plain")
+        handler.end_headers()
+        handler.wfile.write(b"a" * 2048)
+
+    local_server.routes["/large"] = send_without_length
+
+    result = fetch_page(local_server.url("/large"))
+
+    assert result.needs_browser
+    assert result.reason == "the page is too large"
+
+
+@pytest.mark.parametrize("status", [403, 429, 503])
+def test_error_responses_need_the_browser(local_server, status):
+    local_server.serve("/blocked", b"Forbidden", status=status, headers={"Content-Type": "text/html"})
+
+    result = fetch_page(local_server.url("/blocked"))
+
+    assert result.needs_browser
+    assert result.status_code == status
+    assert result.reason == f"HTTP {status}"
+
+
+def test_bot_checks_need_the_browser(local_server):
+    local_server.serve("/check", b"<html><body><h1>Just a moment...</h1>" + ARTICLE.encode() + b"</body></html>", headers={"Content-Type": "text/html"})
+
+    assert fetch_page(local_server.url("/check")).reason == "the page is a bot check"
+
+
+def test_javascript_rendered_pages_need_the_browser(local_server):
+    local_server.serve("/app", b"<html><body><div id=\"root\"></div><script src=\"app.js\"></script></body></html>", headers={"Content-Type": "text/html"})
+
+    assert fetch_page(local_server.url("/app")).reason == "the page renders with JavaScript"
+
+
+def test_failed_requests_need_the_browser(local_server):
+    result = fetch_page("http://127.0.0.1:1/unreachable", timeout=1)
+
+    assert result.needs_browser
+    assert result.reason.startswith("the request failed")
+
+
+def test_pages_that_need_the_browser_fall_back_to_it(local_server):
+    load_page_text = getattr(view_webpage, "__load_page_text")
+    local_server.serve("/app", b"<html><body><div id=\"root\"></div></body></html>", headers={"Content-Type": "text/html"})
+
+    extraction, _ = load_page_text(local_server.url("/app"), None)
+
+    assert extraction is None
+
+
+def test_fetched_pages_are_read_without_the_browser(local_server):
+    load_page_text = getattr(view_webpage, "__load_page_text")
+    local_server.serve("/page", HTML_PAGE.encode(), headers={"Content-Type": "text/html"})
+
+    extraction, _ = load_page_text(local_server.url("/page"), None)
+
+    assert extraction.title == "Static page"
@@ -0,0 +1,123 @@
+import json
+import os
+import threading
+import pytest
+from config import json_store
+from config.json_store import JsonStore, get_json_store
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "store.json")
+
+
+@pytest.fixture
+def load_count(monkeypatch):
+    """
+    Counts how many times the store parses its file.
+    """
+
+    count = [0]
+    load = json.load
+
+    def counting_load(f):
+        count[0] += 1
+        return load(f)
+
+    monkeypatch.setattr(json_store.json, "load", counting_load)
+
+    return count
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+
+def test_missing_files_use_the_default(store_path):
+    store = JsonStore(store_path, lambda: {"rules": []})
+
+    assert store.read() == {"rules": []}
+    assert not store.exists()
+
+
+def test_unchanged_files_are_not_parsed_again(store_path, load_count):
+    write_json(store_path, {"a": 1})
+    store = JsonStore(store_path)
+
+    assert store.read() == {"a": 1}
+    assert store.read() == {"a": 1}
+    assert load_count[0] == 1
+
+
+def test_files_changed_on_disk_are_read_again(store_path):
+    write_json(store_path, {"a": 1})
+    store = JsonStore(store_path)
+    store.read()
+
+    write_json(store_path, {"a": 2})
+    os.utime(store_path, ns=(0, 0))
+
+    assert store.read() == {"a": 2}
+
+
+def test_files_replaced_with_the_same_size_and_time_are_read_again(store_path):
+    write_json(store_path, {"a": 1})
+    store = JsonStore(store_path)
+    store.read()
+    stat = os.stat(store_path)
+
+    # A new file in its place has a different inode, even if it looks the same otherwise
+    write_json(f"{store_path}.new", {"a": 2})
+    os.utime(f"{store_path}.new", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(f"{store_path}.new", store_path)
+
+    assert store.read() == {"a": 2}
+
+
+def test_updates_start_from_the_latest_contents(store_path):
+    store = JsonStore(store_path)
+    store.read()
+
+    # Another process writes to the file in the meantime
+    write_json(store_path, {"theirs": True})
+
+    store.update(lambda data: data.update({"ours": True}))
+
+    with open(store_path) as f:
+        assert json.load(f) == {"theirs": True, "ours": True}
+
+
+def test_updates_return_the_mutators_result_and_refresh_the_cache(store_path, load_count):
+    store = JsonStore(store_path)
+
+    assert store.update(lambda data: data.setdefault("count", 1)) == 1
+    assert store.exists()
+
+    load_count[0] = 0
+
+    assert store.read() == {"count": 1}
+    assert load_count[0] == 0
+
+
+def test_concurrent_updates_are_not_lost(store_path):
+    store = JsonStore(store_path, lambda: {"count": 0})
+
+    def increment():
+        for _ in range(20):
+            store.update(lambda data: data.update({"count": data["count"] + 1}))
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert store.read() == {"count": 80}
+
+
+def test_stores_are_shared_per_file(store_path, tmp_path):
+    assert get_json_store(store_path) is get_json_store(os.path.join(str(tmp_path), ".", "store.json"))
+    assert get_json_store(store_path) is not get_json_store(str(tmp_path / "other.json"))
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import re
+import pytest
+import requests
+from utils import network
+from utils.network import download_file
+
+CONTENT = bytes(range(256)) * 400
+ETAG = '"v1"'
+
+
+def serve_file(local_server, path="/file.bin", content=CONTENT, etag=ETAG, supports_ranges=True, status_for_ranges=None):
+    """
+    Serves a file that can be fetched in byte ranges (honouring If-Range), returning its URL.
+    """
+
+    def respond(handler):
+        headers = {"ETag": etag}
+
+        if supports_ranges:
+            headers["Accept-Ranges"] = "bytes"
+
+        range_header = handler.headers.get("Range")
+        if_range = handler.headers.get("If-Range")
+
+        if not supports_ranges or range_header is None or (if_range is not None and if_range != etag):
+            local_server.respond(handler, content, headers=headers)
+            return
+
+        if status_for_ranges is not None:
+            local_server.respond(handler, b"", status=status_for_ranges, headers=headers)
+            return
+
+        start, end = re.match(r"bytes=(\d+)-(\d*)", range_header).groups()
+        start = int(start)
+        end = int(end) if end else len(content) - 1
+
+        if start >= len(content):
+            local_server.respond(handler, b"", status=416, headers=headers)
+            return
+
+        headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+        local_server.respond(handler, content[start:end + 1], status=206, headers=headers)
+
+    local_server.routes[path] = respond
+
+    return local_server.url(path)
+
+
+def get_range_requests(local_server):
+    return [(headers.get("Range"), headers.get("If-Range")) for method, _, headers in local_server.requests if method == "GET"]
+
+
+def write_part_file(dest, content, validator=ETAG):
+    with open(f"{dest}.part", "wb") as f:
+        f.write(content)
+
+    with open(f"{dest}.part.validator", "w", encoding="utf-8") as f:
+        f.write(validator)
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_files_are_downloaded_into_place(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+
+    assert download_file(serve_file(local_server), dest, display_progress=False) == dest
+    assert read_file(dest) == CONTENT
+    assert not os.path.exists(f"{dest}.part")
+    assert not os.path.exists(f"{dest}.part.validator")
+
+
+def test_part_files_are_resumed_with_if_range(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+    write_part_file(dest, CONTENT[:1000])
+
+    download_file(serve_file(local_server), dest, display_progress=False)
+
+    assert read_file(dest) == CONTENT
+    assert get_range_requests(local_server) == [("bytes=1000-", ETAG)]
+
+
+def test_part_files_of_another_version_are_discarded(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+    write_part_file(dest, b"x" * 1000, validator='"v0"')
+
+    download_file(serve_file(local_server), dest, display_progress=False)
+
+    assert read_file(dest) == CONTENT
+    assert get_range_requests(local_server) == [(None, None)]
+
+
+def test_full_responses_replace_the_part_file(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+    write_part_file(dest, b"x" * 1000)
+
+    # The file changes between the HEAD request and the ranged GET, so If-Range gets the whole file back
+    url = serve_file(local_server)
+    respond_to_head = local_server.routes["/file.bin"]
+
+    def respond(handler):
+        if handler.command == "HEAD":
+            respond_to_head(handler)
+        else:
+            local_server.respond(handler, CONTENT, headers={"ETag": '"v2"'})
+
+    local_server.routes["/file.bin"] = respond
+
+    download_file(url, dest, display_progress=False)
+
+    assert read_file(dest) == CONTENT
+    assert get_range_requests(local_server) == [("bytes=1000-", ETAG)]
+
+
+def test_part_files_larger_than_the_file_are_downloaded_again(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+    write_part_file(dest, CONTENT + b"x" * 1000)
+
+    download_file(serve_file(local_server), dest, display_progress=False)
+
+    assert read_file(dest) == CONTENT
+    assert get_range_requests(local_server) == [(f"bytes={len(CONTENT) + 1000}-", ETAG), (None, None)]
+
+
+def test_unsatisfiable_ranges_without_a_part_file_fail_cleanly(local_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(network, "SEGMENTED_DOWNLOAD_THRESHOLD", 1024)
+    dest = str(tmp_path / "file.bin")
+
+    with pytest.raises(requests.HTTPError):
+        download_file(serve_file(local_server, status_for_ranges=416), dest, segments=2, display_progress=False)
+
+    assert not os.path.exists(dest)
+
+
+def test_large_files_are_downloaded_in_segments(local_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(network, "SEGMENTED_DOWNLOAD_THRESHOLD", 1024)
+    dest = str(tmp_path / "file.bin")
+
+    download_file(serve_file(local_server), dest, segments=4, display_progress=False)
+
+    assert read_file(dest) == CONTENT
+    assert sorted(get_range_requests(local_server)) == sorted([
+        (f"bytes={start}-{start + len(CONTENT) // 4 - 1}", ETAG) for start in range(0, len(CONTENT), len(CONTENT) // 4)
+    ])
+    assert os.listdir(tmp_path) == ["file.bin"]
+
+
+def test_servers_without_ranges_are_downloaded_in_one_stream(local_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(network, "SEGMENTED_DOWNLOAD_THRESHOLD", 1024)
+    dest = str(tmp_path / "file.bin")
+    write_part_file(dest, CONTENT[:1000])
+
+    download_file(serve_file(local_server, supports_ranges=False), dest, segments=4, display_progress=False)
+
+    assert read_file(dest) == CONTENT
+    assert get_range_requests(local_server) == [(None, None)]
+
+
+def test_matching_checksums_are_accepted(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+
+    download_file(serve_file(local_server), dest, sha256=hashlib.sha256(CONTENT).hexdigest().upper(), display_progress=False)
+
+    assert read_file(dest) == CONTENT
+
+
+def test_checksum_mismatches_leave_nothing_behind(local_server, tmp_path):
+    dest = str(tmp_path / "file.bin")
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        download_file(serve_file(local_server), dest, sha256="0" * 64, display_progress=False)
+
+    assert os.listdir(tmp_path) == []
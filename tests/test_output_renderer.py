@@ -0,0 +1,73 @@
+import io
+import time
+from rich.console import Console
+from utils.output_renderer import OutputRenderer
+
+
+def make_renderer(**kwargs):
+    output = io.StringIO()
+    renderer = OutputRenderer(Console(file=output, force_terminal=False, width=80), idle_timeout=0.1, **kwargs)
+
+    return renderer, output
+
+
+def wait_for_frames():
+    time.sleep(0.3)
+
+
+def test_lines_are_printed_in_order():
+    renderer, output = make_renderer()
+
+    with renderer:
+        renderer.write("one")
+        renderer.write("two")
+
+    assert output.getvalue() == "one\ntwo\n"
+
+
+def test_bursts_are_collapsed_into_a_tail():
+    renderer, output = make_renderer(tail_size=3, burst_threshold=10)
+
+    # Queued before the renderer starts, so they all arrive in its first frame
+    for index in range(50):
+        renderer.write(f"line {index}")
+
+    renderer.start()
+    renderer.stop()
+
+    assert output.getvalue() == "... 47 lines collapsed ...\nline 47\nline 48\nline 49\n"
+
+
+def test_quiet_collapsed_output_is_left_on_screen():
+    renderer, output = make_renderer(tail_size=2, burst_threshold=10)
+
+    for index in range(20):
+        renderer.write(f"line {index}")
+
+    renderer.start()
+    wait_for_frames()
+    renderer.write("after")
+    renderer.stop()
+
+    assert output.getvalue() == "... 18 lines collapsed ...\nline 18\nline 19\nafter\n"
+
+
+def test_nothing_is_drawn_while_paused():
+    renderer, output = make_renderer()
+    renderer.start()
+    renderer.write("before")
+
+    with OutputRenderer.paused():
+        assert output.getvalue() == "before\n"
+
+        renderer.write("during")
+        wait_for_frames()
+
+        assert output.getvalue() == "before\n"
+
+    wait_for_frames()
+
+    assert output.getvalue() == "before\nduring\n"
+
+    renderer.stop()
+
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+import pytest
+from abilities.browsing import page_cache, view_webpage
+from abilities.browsing.page_cache import PageCache, get_cache_ttl
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(str(tmp_path / "cache"), default_ttl=60)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Freezes time.time for the cache, returning a function that moves it forward.
+    """
+
+    now = [time.time()]
+    monkeypatch.setattr(page_cache.time, "time", lambda: now[0])
+
+    def advance(seconds):
+        now[0] += seconds
+
+    return advance
+
+
+def test_entries_are_keyed_by_kind_and_key(cache):
+    cache.put("page", "https://example.com", value={"text": "page"})
+    cache.put("notes", "https://example.com", "instructions", value="notes")
+
+    assert cache.get("page", "https://example.com") == {"text": "page"}
+    assert cache.get("notes", "https://example.com", "instructions") == "notes"
+    assert cache.get("notes", "https://example.com", "other instructions") is None
+    assert cache.get_summary() == "Browsing cache: 2 hits, 1 misses"
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.put("page", "a", value="default ttl")
+    cache.put("page", "b", value="short ttl", ttl=10)
+
+    clock(30)
+
+    assert cache.get("page", "a") == "default ttl"
+    assert cache.get("page", "b") is None
+
+    clock(31)
+
+    assert cache.get("page", "a") is None
+
+
+@pytest.mark.parametrize("ttl", [0, -1])
+def test_entries_that_must_not_be_cached_are_not_stored(cache, ttl):
+    cache.put("page", "a", value="value", ttl=ttl)
+
+    assert cache.get("page", "a") is None
+    assert not os.path.exists(cache.directory) or get_entry_paths(cache) == []
+
+
+def get_entry_paths(cache):
+    return [os.path.join(cache.directory, name) for name in os.listdir(cache.directory) if name.endswith(".json")]
+
+
+def set_last_used(cache, key, seconds_ago):
+    for path in get_entry_paths(cache):
+        with open(path, "r", encoding="utf-8") as f:
+            if json.load(f)["key"] == [key]:
+                os.utime(path, (time.time() - seconds_ago, time.time() - seconds_ago))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = PageCache(str(tmp_path / "cache"))
+
+    for seconds_ago, key in [(30, "a"), (20, "b"), (10, "c")]:
+        cache.put("page", key, value="x" * 200)
+        set_last_used(cache, key, seconds_ago)
+
+    # Room for three entries, but not four
+    cache.max_bytes = os.path.getsize(get_entry_paths(cache)[0]) * 3.5
+
+    # Reading "a" makes "b" the least recently used
+    cache.get("page", "a")
+    cache.put("page", "d", value="x" * 200)
+
+    assert cache.get("page", "a") is not None
+    assert cache.get("page", "b") is None
+    assert cache.get("page", "c") is not None
+    assert cache.get("page", "d") is not None
+
+
+def test_clear_removes_every_entry(cache):
+    cache.put("page", "a", value="value")
+    cache.clear()
+
+    assert cache.get("page", "a") is None
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({}, 3600),
+    ({"Cache-Control": "max-age=60"}, 60),
+    ({"cache-control": "public, s-maxage=120"}, 120),
+    ({"Cache-Control": "max-age=86400"}, 3600),
+    ({"Cache-Control": "no-store"}, 0),
+    ({"Cache-Control": "no-cache, max-age=60"}, 0),
+    ({"Expires": "not a date"}, 0),
+    ({"Expires": "Thu, 01 Jan 1970 00:00:00 GMT"}, 0),
+])
+def test_cache_ttl_follows_the_caching_headers(headers, expected):
+    assert get_cache_ttl(headers, 3600) == expected
+
+
+def test_cached_pages_report_their_remaining_ttl(cache, clock):
+    load_page_text = getattr(view_webpage, "__load_page_text")
+    cache.put("page", "https://example.com", value={"title": "Title", "text": "Text", "ttl": 60, "cached_at": time.time()}, ttl=60)
+
+    clock(45)
+    extraction, remaining_ttl = load_page_text("https://example.com", cache)
+
+    assert extraction.title == "Title"
+    assert remaining_ttl == pytest.approx(15)
@@ -0,0 +1,87 @@
+import re
+import pytest
+from utils.plan_executor import PlanExecutor
+
+
+def execute(*step_args):
+    return {result.step.step_id: result for result in PlanExecutor.from_args(list(step_args)).execute()}
+
+
+def test_steps_run_after_their_dependencies(tmp_path):
+    log = tmp_path / "log"
+
+    results = execute(
+        {"id": "c", "command": f"echo c >> {log}", "depends_on": ["b"]},
+        {"id": "b", "command": f"echo b >> {log}", "depends_on": ["a"]},
+        {"id": "a", "command": f"sleep 0.2; echo a >> {log}"}
+    )
+
+    assert log.read_text().split() == ["a", "b", "c"]
+    assert all(result.status == "succeeded" for result in results.values())
+
+
+def test_results_are_in_the_order_the_steps_were_given():
+    steps = [{"id": "2", "command": "true", "depends_on": ["1"]}, {"id": "1", "command": "true"}]
+
+    assert [result.step.step_id for result in PlanExecutor.from_args(steps).execute()] == ["2", "1"]
+
+
+def test_independent_steps_run_in_parallel(tmp_path):
+    fifo = tmp_path / "fifo"
+
+    # Each step waits for the other, so they can only finish if they run at the same time
+    results = execute(
+        {"id": "writer", "command": f"mkfifo {fifo}; echo hello > {fifo}"},
+        {"id": "reader", "command": f"while [ ! -p {fifo} ]; do sleep 0.01; done; cat {fifo}", "expect_output": "hello"}
+    )
+
+    assert results["reader"].status == "succeeded"
+
+
+def test_failures_skip_their_dependents_and_stop_the_plan():
+    results = execute(
+        {"id": "fail", "command": "exit 3"},
+        {"id": "dependent", "command": "true", "depends_on": ["fail"]},
+        {"id": "indirect", "command": "true", "depends_on": ["dependent"]},
+        {"id": "running", "command": "sleep 0.3"},
+        {"id": "after", "command": "true", "depends_on": ["running"]}
+    )
+
+    assert results["fail"].status == "failed"
+    assert results["fail"].exit_code == 3
+    assert results["fail"].failure_reason == "exited with code 3, expected 0"
+    assert results["dependent"].status == "skipped"
+    assert results["indirect"].status == "skipped"
+    assert results["running"].status == "succeeded"
+    assert results["after"].status == "not run"
+
+
+def test_output_and_exit_code_expectations_are_checked():
+    results = execute(
+        {"id": "grep", "command": "echo nothing here", "expect_output": "^found$"},
+        {"id": "exit", "command": "exit 1", "expect_exit_code": 1},
+        {"id": "stderr", "command": "echo found >&2", "expect_output": "^found$"}
+    )
+
+    assert results["grep"].failure_reason == "output did not match /^found$/"
+    assert results["exit"].status == "succeeded"
+    assert results["stderr"].status == "succeeded"
+
+
+def test_steps_do_not_read_from_the_terminal():
+    assert execute({"id": "read", "command": "read -r line", "expect_exit_code": 1})["read"].status == "succeeded"
+
+
+@pytest.mark.parametrize("step_args, message", [
+    ([{"id": "a"}], "Every step needs an id and a command"),
+    ([{"id": "a", "command": "true"}, {"id": "a", "command": "true"}], "Step ids must be unique"),
+    ([{"id": "a", "command": "true", "depends_on": ["b"]}], "Step a depends on unknown step b"),
+    ([{"id": "a", "command": "true", "expect_output": "("}], "Step a has an invalid expect_output pattern"),
+    (
+        [{"id": "a", "command": "true", "depends_on": ["c"]}, {"id": "b", "command": "true", "depends_on": ["a"]}, {"id": "c", "command": "true", "depends_on": ["b"]}],
+        "Steps a -> c -> b -> a depend on each other in a cycle"
+    )
+])
+def test_invalid_plans_are_rejected(step_args, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        PlanExecutor.from_args(step_args)
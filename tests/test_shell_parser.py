@@ -0,0 +1,78 @@
+import pytest
+from utils.shell_parser import parse_command
+
+
+def get_argvs(command):
+    return [simple_command.argv for simple_command in parse_command(command).walk()]
+
+
+def test_lists_and_pipelines_are_split_into_simple_commands():
+    parsed = parse_command("a && b || c; d | e")
+
+    assert [simple_command.argv for simple_command in parsed.commands] == [["a"], ["b"], ["c"], ["d"], ["e"]]
+    assert [simple_command.operator for simple_command in parsed.commands][:4] == ["&&", "||", ";", "|"]
+
+
+def test_quoted_arguments_stay_together():
+    assert get_argvs("echo \"a b\" 'c d'") == [["echo", "a b", "c d"]]
+
+
+def test_substitutions_are_parsed_recursively():
+    assert get_argvs("x=$(echo $(date))")[1:] == [["echo", "__BUDDY_SUBSTITUTION_0__"], ["date"]]
+    assert get_argvs("ls `whoami`")[1] == ["whoami"]
+
+
+def test_env_assignments_are_separated_from_the_command():
+    simple_command = parse_command("FOO=1 BAR=2 make all").commands[0]
+
+    assert simple_command.argv == ["make", "all"]
+    assert simple_command.env_assignments == ["FOO=1", "BAR=2"]
+
+
+def test_name_is_the_base_name_of_the_executable():
+    assert parse_command("/usr/bin/git status").commands[0].name == "git"
+
+
+@pytest.mark.parametrize("command, has_subshell", [("(cd x && ls)", True), ("{ ls; }", True), ("ls", False)])
+def test_subshells_are_flagged(command, has_subshell):
+    assert parse_command(command).has_subshell == has_subshell
+
+
+def test_heredocs_are_flagged():
+    assert parse_command("cat <<EOF\nhello\nEOF").has_heredoc
+
+
+def test_background_commands_are_flagged():
+    assert parse_command("sleep 1 &").runs_in_background
+    assert not parse_command("sleep 1 && ls").runs_in_background
+
+
+def test_unbalanced_quotes_are_invalid():
+    parsed = parse_command("echo \"unterminated")
+
+    assert not parsed.is_valid
+    assert parsed.error is not None
+
+
+@pytest.mark.parametrize("command", ["ls > out", "ls >> out", "ls >| out", "ls &> out", "ls &>> out", "ls >& out", "ls >>& out", "ls 2> err"])
+def test_output_redirections_write_output(command):
+    assert parse_command(command).commands[0].writes_output()
+
+
+@pytest.mark.parametrize("command", ["ls 2>&1", "ls >&2", "ls > /dev/null", "ls 2>/dev/null", "grep a < in", "ls 2>&-"])
+def test_harmless_redirections_do_not_write_output(command):
+    assert not parse_command(command).commands[0].writes_output()
+
+
+def test_file_descriptor_numbers_must_touch_the_operator():
+    simple_command = parse_command("echo 2 > f").commands[0]
+
+    assert simple_command.argv == ["echo", "2"]
+    assert simple_command.redirections == [(">", "f")]
+
+
+def test_redirection_targets_are_not_arguments():
+    simple_command = parse_command("sort < in.txt > out.txt").commands[0]
+
+    assert simple_command.argv == ["sort"]
+    assert simple_command.redirections == [("<", "in.txt"), (">", "out.txt")]